@@ -0,0 +1,142 @@
+import json
+import os
+import sqlite3
+from array import array
+from typing import AbstractSet, Dict, Optional, Set, Tuple
+from .file_context import FileContext
+from .file_record import FileRecord
+from config import Config
+
+class AnalysisCache:
+    """
+    Persistent per-file analysis results stored in SQLite next to the report.
+
+    Entries are keyed by relative path and validated against size, mtime and
+    a content hash, so a warm run only re-analyzes files that changed. The
+    whole cache is dropped when CACHE_VERSION, the Config values or the
+    pygments/chardet versions change.
+    """
+    # Bump whenever the analyzers change what they produce for a file
+    CACHE_VERSION = 10
+
+    def __init__(self, cache_path: str):
+        self.cache_path = cache_path
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(cache_path)
+        self._connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._invalidate_if_stale()
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "relative_path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, content_hash TEXT, "
+            "language TEXT, todos TEXT, complexities TEXT, line_metrics TEXT, chunk_hashes BLOB, signatures TEXT, token_estimate INTEGER, "
+            "analyzers TEXT)"
+        )
+        self._index: Dict[str, Tuple[int, int, str]] = {
+            relative_path: (size, mtime_ns, content_hash)
+            for relative_path, size, mtime_ns, content_hash in
+            self._connection.execute("SELECT relative_path, size, mtime_ns, content_hash FROM files")
+        }
+        self._seen: Set[str] = set()
+
+    @staticmethod
+    def path_for_output(output_file: str) -> str:
+        """The cache lives next to the report, as a dot file so that it is never analyzed itself."""
+        directory, name = os.path.split(output_file)
+        return os.path.join(directory, f".{name}{Config.CACHE_FILE_SUFFIX}")
+
+    @staticmethod
+    def fingerprint() -> str:
+        # Imported here so that runs without a cache do not pay for them at startup
+        import chardet
+        import pygments
+        settings = {key: repr(value) for key, value in sorted(vars(Config).items()) if key.isupper()}
+        return json.dumps({
+            'version': AnalysisCache.CACHE_VERSION,
+            'config': settings,
+            'pygments': pygments.__version__,
+            'chardet': chardet.__version__,
+        }, sort_keys=True)
+
+    def lookup(self, file_path: str, relative_path: str, analyzers: AbstractSet[str]) -> Optional[FileRecord]:
+        """
+        Return the cached record if the file is unchanged, or None if it must be analyzed.
+
+        Entries stored by a run with fewer analyzers do not satisfy one that
+        needs more; results of analyzers not asked for are left out.
+        """
+        self._seen.add(relative_path)
+        entry = self._index.get(relative_path)
+        if entry is None:
+            self.misses += 1
+            return None
+        cached_size, cached_mtime_ns, cached_hash = entry
+        try:
+            stat_result = os.stat(file_path)
+        except OSError:
+            self.misses += 1
+            return None
+        if stat_result.st_size != cached_size:
+            self.misses += 1
+            return None
+        if stat_result.st_mtime_ns != cached_mtime_ns:
+            # Touched but possibly unchanged: hashing is still far cheaper than analyzing
+            if FileContext.hash_file(file_path, cached_size, stat_result.st_mtime_ns,
+                                     Config.FILE_BYTE_BUDGET) != cached_hash:
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE files SET mtime_ns = ? WHERE relative_path = ?",
+                                     (stat_result.st_mtime_ns, relative_path))
+            self._index[relative_path] = (cached_size, stat_result.st_mtime_ns, cached_hash)
+        row = self._connection.execute(
+            "SELECT language, todos, complexities, line_metrics, chunk_hashes, signatures, token_estimate, analyzers "
+            "FROM files WHERE relative_path = ?",
+            (relative_path,)
+        ).fetchone()
+        if row is None or not set(analyzers) <= set(json.loads(row[7])):
+            self.misses += 1
+            return None
+        self.hits += 1
+        language, todos, complexities, line_metrics, chunk_hashes, signatures, token_estimate, _ = row
+        line_metrics = json.loads(line_metrics)
+        return FileRecord(
+            file_path, relative_path, language, cached_size, stat_result.st_mtime_ns, cached_hash,
+            [tuple(todo) for todo in json.loads(todos)] if 'todo' in analyzers else [],
+            [tuple(complexity) for complexity in json.loads(complexities)] if 'complexity' in analyzers else [],
+            tuple(line_metrics) if line_metrics is not None and 'metrics' in analyzers else None,
+            array('Q', chunk_hashes if 'dup' in analyzers else b''),
+            [(label, array('Q', bytes.fromhex(signature))) for label, signature in json.loads(signatures or '[]')]
+            if 'near-dup' in analyzers else [],
+            token_estimate,
+        )
+
+    def store(self, record: FileRecord, analyzers: AbstractSet[str]):
+        self._seen.add(record.relative_path)
+        signatures = None
+        if 'near-dup' in analyzers:
+            signatures = json.dumps([(label, signature.tobytes().hex()) for label, signature in record.signatures])
+        self._connection.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (record.relative_path, record.size, record.mtime_ns, record.content_hash, record.language,
+             json.dumps(record.todos), json.dumps(record.complexities), json.dumps(record.line_metrics),
+             array('Q', record.chunk_hashes).tobytes(), signatures, record.token_estimate,
+             json.dumps(sorted(analyzers)))
+        )
+        self._index[record.relative_path] = (record.size, record.mtime_ns, record.content_hash)
+
+    def close(self, prune: bool = True):
+        """Persist everything, first forgetting files not seen in this run unless `prune` is False."""
+        if prune:
+            stale = [(relative_path,) for relative_path in self._index if relative_path not in self._seen]
+            self._connection.executemany("DELETE FROM files WHERE relative_path = ?", stale)
+        self._connection.commit()
+        self._connection.close()
+
+    def _invalidate_if_stale(self):
+        fingerprint = AnalysisCache.fingerprint()
+        row = self._connection.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if row is None or row[0] != fingerprint:
+            # The schema may have changed along with the version, so start from scratch
+            self._connection.execute("DROP TABLE IF EXISTS files")
+            self._connection.execute("INSERT OR REPLACE INTO meta VALUES ('fingerprint', ?)", (fingerprint,))
+            self._connection.commit()
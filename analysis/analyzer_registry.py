@@ -0,0 +1,57 @@
+import importlib
+from types import ModuleType
+from typing import Dict, FrozenSet, Iterable, NamedTuple, Optional
+
+
+class AnalyzerSpec(NamedTuple):
+    name: str
+    module: str  # Imported on first use
+    description: str
+
+
+ANALYZERS: Dict[str, AnalyzerSpec] = {spec.name: spec for spec in (
+    AnalyzerSpec('todo', 'analysis.todo_scanner', "TODO/FIXME comments (Config.TODO_TAGS)"),
+    AnalyzerSpec('metrics', 'analysis.token_metrics', "code and comment line counts from the pygments token stream"),
+    AnalyzerSpec('complexity', 'analysis.complexity', "function complexity, nesting depth and length"),
+    AnalyzerSpec('dup', 'analysis.duplication', "exact code duplication"),
+    AnalyzerSpec('near-dup', 'analysis.near_duplication', "near-duplicate files and Python functions (MinHash/LSH)"),
+)}
+# metrics adds a tokenizer pass over every Python file (other languages share the lexing pass of complexity),
+# so it is opt-in
+DEFAULT_ANALYZERS: FrozenSet[str] = frozenset({'todo', 'complexity', 'dup'})
+
+
+class AnalyzerRegistry:
+    """
+    The optional analyzers, imported only when a run uses them.
+
+    Disabled analyzers cost nothing: neither their modules (pygments for
+    the token metrics, for example) are imported nor is their per-file
+    work done.
+    """
+
+    _modules: Dict[str, ModuleType] = {}
+
+    @staticmethod
+    def load(name: str) -> ModuleType:
+        module = AnalyzerRegistry._modules.get(name)
+        if module is None:
+            module = AnalyzerRegistry._modules[name] = importlib.import_module(ANALYZERS[name].module)
+        return module
+
+    @staticmethod
+    def parse(names: Optional[str]) -> FrozenSet[str]:
+        """The analyzers of a comma-separated list such as 'todo,complexity'; None selects the defaults."""
+        if names is None:
+            return DEFAULT_ANALYZERS
+        selected = frozenset(name.strip() for name in names.split(',') if name.strip())
+        return AnalyzerRegistry.validate(selected)
+
+    @staticmethod
+    def validate(names: Iterable[str]) -> FrozenSet[str]:
+        selected = frozenset(names)
+        unknown = selected - ANALYZERS.keys()
+        if unknown:
+            raise ValueError(f"Unknown analyzers: {', '.join(sorted(unknown))} "
+                             f"(available: {', '.join(ANALYZERS)})")
+        return selected
@@ -0,0 +1,144 @@
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from .code_analyzer import CodeAnalyzer
+from .result_memo import ResultMemo
+from utils.file_operations import FileUtils
+from utils.github_utils import GitHubUtils
+from config import Config
+
+
+class BatchEntry(NamedTuple):
+    project_path: str  # Local folder or GitHub URL
+    output_file: str
+    output_format: Optional[str] = None  # Defaults to the batch's format
+    ref: Optional[str] = None
+    sparse: Optional[List[str]] = None
+
+
+class BatchResult(NamedTuple):
+    entry: BatchEntry
+    file_count: int
+    seconds: float
+    results: Optional[Dict[str, Any]]  # Summaries of the analysis, without the file records
+    error: Optional[str]
+
+
+class BatchAnalyzer:
+    """
+    Analyzes many projects in one process.
+
+    All projects run on one worker pool, so workers start (and import their
+    analyzers) once, and share a ResultMemo, so a file that appears in
+    several projects, e.g. a vendored library, is analyzed once. Each
+    project still gets its own report; the batch adds a consolidated
+    summary.
+    """
+
+    def __init__(self, entries: List[BatchEntry], jobs: int = 1, output_format: str = 'text', **options):
+        self.entries = entries
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.output_format = output_format
+        # Further CodeAnalyzer arguments applied to every project, e.g. use_cache or top
+        self.options = options
+        self.memo = ResultMemo()
+
+    @staticmethod
+    def load_manifest(manifest_path: str) -> List[BatchEntry]:
+        """
+        Read a JSON list of projects such as
+        [{"project_path": "repos/app", "output_file": "reports/app.txt", "format": "jsonl"}, ...].
+
+        Relative paths are resolved against the manifest's directory.
+        """
+        with open(manifest_path, 'r', encoding='utf-8') as file:
+            items = json.load(file)
+        base = os.path.dirname(os.path.abspath(manifest_path))
+        entries = []
+        for number, item in enumerate(items, 1):
+            if not isinstance(item, dict) or 'project_path' not in item or 'output_file' not in item:
+                raise ValueError(f"Manifest entry {number} needs project_path and output_file")
+            project_path = item['project_path']
+            if not GitHubUtils.is_github_url(project_path):
+                project_path = os.path.join(base, project_path)
+            entries.append(BatchEntry(project_path, os.path.join(base, item['output_file']), item.get('format'),
+                                      item.get('ref'), item.get('sparse')))
+        return entries
+
+    def run(self, on_result: Optional[Callable[[BatchResult], None]] = None) -> List[BatchResult]:
+        """Analyze every project in manifest order; a failing project is reported and skipped."""
+        executor = ProcessPoolExecutor(max_workers=self.jobs) if self.jobs > 1 else None
+        results = []
+        try:
+            for entry in self.entries:
+                result = self._run_entry(entry, executor)
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        return results
+
+    def _run_entry(self, entry: BatchEntry, executor: Optional[ProcessPoolExecutor]) -> BatchResult:
+        started = time.perf_counter()
+        self.memo.begin_project(entry.project_path)
+        try:
+            if GitHubUtils.is_github_url(entry.project_path):
+                with GitHubUtils.checkout(entry.project_path, ref=entry.ref, sparse_paths=entry.sparse) as checkout_path:
+                    analyzer = self._analyze(checkout_path, entry, executor)
+            elif not os.path.isdir(entry.project_path):
+                raise ValueError(f"Project folder not found: {entry.project_path}")
+            else:
+                analyzer = self._analyze(entry.project_path, entry, executor)
+            return BatchResult(entry, analyzer.results['file_count'], time.perf_counter() - started,
+                               analyzer.results, None)
+        except Exception as e:
+            return BatchResult(entry, 0, time.perf_counter() - started, None, str(e))
+
+    def _analyze(self, folder_path: str, entry: BatchEntry, executor: Optional[ProcessPoolExecutor]) -> CodeAnalyzer:
+        analyzer = CodeAnalyzer(folder_path, jobs=self.jobs, output_format=entry.output_format or self.output_format,
+                                executor=executor, memo=self.memo, **self.options)
+        analyzer.analyze(entry.output_file)
+        return analyzer
+
+    def write_summary(self, summary_file: str, results: List[BatchResult]):
+        """The consolidated summary: one line per project, totals, and the files shared between projects."""
+        with FileUtils.open_output(summary_file) as outfile:
+            outfile.write(f"Batch Analysis Summary\nDate of Analysis: {FileUtils.get_current_datetime()}\n\n")
+            outfile.write("Projects:\n")
+            languages: Dict[str, int] = {}
+            for result in results:
+                if result.error is not None:
+                    outfile.write(f"{result.entry.project_path}: FAILED ({result.error})\n")
+                    continue
+                summary = result.results
+                for language, count in summary['language_distribution'].items():
+                    languages[language] = languages.get(language, 0) + count
+                outfile.write(f"{result.entry.project_path}: {result.file_count} code files, "
+                              f"{len(summary['todos'])} TODO/FIXME comments, "
+                              f"{len(summary['duplicates'])} duplicated regions, "
+                              f"{len(summary['large_files'])} large files "
+                              f"({result.seconds:.2f} s) -> {result.entry.output_file}\n")
+            outfile.write("\n")
+
+            succeeded = [result for result in results if result.error is None]
+            total_files = sum(result.file_count for result in succeeded)
+            outfile.write(f"Total: {len(succeeded)} of {len(results)} projects analyzed, {total_files} code files\n")
+            outfile.write(f"Files reused from identical files in other projects: {self.memo.hits} "
+                          f"({self.memo.hit_bytes / (1024 * 1024):.2f} MB not analyzed again)\n\n")
+
+            if languages:
+                outfile.write("Language Statistics:\n")
+                for language, count in sorted(languages.items(), key=lambda item: -item[1]):
+                    outfile.write(f"{language}: {count} files ({count / total_files * 100:.2f}%)\n")
+                outfile.write("\n")
+
+            shared = self.memo.shared_files(Config.BATCH_SHARED_FILES_LIMIT)
+            if shared:
+                outfile.write("Files Shared Between Projects:\n")
+                for project_count, relative_path, size in shared:
+                    outfile.write(f"{relative_path} ({size} bytes): identical in {project_count} projects\n")
+                outfile.write("\n")
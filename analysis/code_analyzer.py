@@ -1,138 +1,547 @@
 import os
-import fnmatch
-from typing import Dict, Any, List, Tuple
+import io
+import functools
+import heapq
+import json
+import logging
+from array import array
+from concurrent.futures import Executor
+from typing import Dict, Any, Callable, FrozenSet, Iterable, Iterator, List, Optional, Tuple
+from .analyzer_registry import AnalyzerRegistry
 from .language_detection import LanguageDetector
-from .complexity import ComplexityAnalyzer
-from .duplication import DuplicationDetector
-from .todo_scanner import TodoScanner
+from .file_context import FileContext
+from .result_memo import ResultMemo
+from .progress import (AnalysisCancelled, ProgressListener, ProgressTracker,
+                       ANALYZING, DISCOVERING, DONE, SUMMARIZING, WRITING)
+from .instrumentation import BudgetExceeded, NullProfiler, Profiler, StageClock, Watchdog
+from .context_packer import ContextPacker, PackedFile, PackingPlan, TokenEstimator, FULL, SKELETON, OMITTED
+from .file_record import FileRecord, SKIPPED_LANGUAGES
 from utils.file_operations import FileUtils
+from utils.gitignore import GitignoreWalker
+from utils.git_utils import FileChange, GitUtils
 from config import Config
 
+logger = logging.getLogger(__name__)
+
 class CodeAnalyzer:
-    def __init__(self, folder_path: str):
+    def __init__(self, folder_path: str, jobs: int = 1, stream: bool = False, use_cache: bool = False,
+                 near_duplicates: bool = False, top: Optional[int] = None, max_tokens: Optional[int] = None,
+                 shard_tokens: Optional[int] = None, use_git: bool = True, since: Optional[str] = None,
+                 progress: Optional[ProgressListener] = None, profile_path: Optional[str] = None,
+                 output_format: str = 'text', executor: Optional[Executor] = None,
+                 memo: Optional[ResultMemo] = None, analyzers: Optional[Iterable[str]] = None):
         self.folder_path = FileUtils.normalize_path(folder_path)
-        self.is_temp_directory = self.folder_path.startswith(FileUtils.normalize_path(os.path.join(os.getcwd(), 'temp')))
-        self.gitignore_patterns = self._load_gitignore()
-
-    def _load_gitignore(self) -> List[str]:
-        gitignore_path = os.path.join(self.folder_path, '.gitignore')
-        if os.path.exists(gitignore_path):
-            with open(gitignore_path, 'r') as f:
-                return [line.strip() for line in f if line.strip() and not line.startswith('#')]
-        return []
-
-    def _should_ignore(self, path: str) -> bool:
-        relative_path = os.path.relpath(path, self.folder_path)
-        
-        # Ignore folders starting with a dot
-        if any(part.startswith('.') for part in relative_path.split(os.sep)):
-            return True
-        
-        # Check against gitignore patterns
-        for pattern in self.gitignore_patterns:
-            if fnmatch.fnmatch(relative_path, pattern):
-                return True
-        
-        return False
-    
+        self.jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+        self.stream = stream
+        self.use_cache = use_cache
+        # --near-duplicates adds its analyzer to the selection
+        selected = AnalyzerRegistry.parse(None) if analyzers is None else AnalyzerRegistry.validate(analyzers)
+        self.analyzers: FrozenSet[str] = selected | {'near-dup'} if near_duplicates else selected
+        self.near_duplicates = 'near-dup' in self.analyzers
+        self.top = top if top is not None else Config.TOP_COMPLEX_FUNCTIONS
+        self.packer = ContextPacker(max_tokens, shard_tokens) if max_tokens or shard_tokens else None
+        if output_format not in REPORT_WRITERS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        if self.packer is not None and output_format != 'text':
+            raise ValueError("Token budgets and shards only apply to text reports")
+        self.output_format = output_format
+        self.cache = None  # An AnalysisCache while a cached run is in progress
+        self.use_git = use_git and GitUtils.is_work_tree(self.folder_path)
+        self.since = since
+        if since is not None and not self.use_git:
+            raise ValueError("--since needs a project inside a git work tree")
+        self.changes: List[FileChange] = []
+        self._changes_by_path: Dict[str, FileChange] = {}
+        self.progress_listener = progress
+        self.progress = ProgressTracker(progress)
+        self.profile_path = profile_path
+        # A batch shares its worker pool and the results of identical files across projects
+        self.executor = executor
+        self.memo = memo
+        self.results: Optional[Dict[str, Any]] = None
+        self.profiler: Profiler = NullProfiler()
+
     def analyze(self, output_file: str) -> int:
+        """
+        Analyze the project and write the report, returning the number of code files.
+
+        Structured formats are always streamed. Raises AnalysisCancelled if
+        the progress listener cancels the run; a partially streamed report
+        is removed in that case. With a profile path, stage timings and
+        counters of the run are written there as JSON.
+        """
+        output_file = FileUtils.normalize_path(output_file)
+        self.progress = ProgressTracker(self.progress_listener)
+        self.profiler = Profiler(Config.PROFILE_SLOWEST_FILES) if self.profile_path else NullProfiler()
+        if self.use_cache:
+            from .analysis_cache import AnalysisCache
+            self.cache = AnalysisCache(AnalysisCache.path_for_output(output_file))
+        streaming = self.packer is None and (self.stream or self.output_format != 'text')
         try:
-            analysis_results = self._collect_data()
-            self._write_report(FileUtils.normalize_path(output_file), analysis_results)
+            if streaming:
+                analysis_results = self._stream_report(output_file)
+            elif self.packer is not None:
+                analysis_results = self._collect_data()
+                self.progress.enter_stage(WRITING)
+                with self.profiler.stage('report'):
+                    self._write_packed_report(output_file, analysis_results)
+            else:
+                analysis_results = self._collect_data()
+                self.progress.enter_stage(WRITING)
+                with self.profiler.stage('report'):
+                    self._write_report(output_file, analysis_results)
+            self.progress.enter_stage(DONE)
+            self.results = {key: value for key, value in analysis_results.items() if key != 'files'}
+            self._write_profile()
             return analysis_results['file_count']
+        except AnalysisCancelled:
+            if streaming and os.path.exists(output_file):
+                os.remove(output_file)
+            raise
         finally:
-            if self.is_temp_directory:
-                import shutil
-                shutil.rmtree(self.folder_path, ignore_errors=True)
+            if self.cache is not None:
+                # A --since run only sees the changed files, so the others must not be forgotten
+                self.cache.close(prune=self.since is None)
+                self.cache = None
+
+    def _write_profile(self):
+        if self.profile_path is None:
+            return
+        if self.cache is not None:
+            self.profiler.count('cache_hits', self.cache.hits)
+            self.profiler.count('cache_misses', self.cache.misses)
+        self.profiler.write(self.profile_path)
+        logger.info("Profile written to %s", self.profile_path)
+
+    def _stream_report(self, output_file: str) -> Dict[str, Any]:
+        """
+        Write each file section as soon as its file is analyzed.
+
+        Only the compact summaries are kept until the end, so memory does not
+        grow with the amount of content in the project.
+        """
+        def write_section(record: FileRecord):
+            with self.profiler.stage('report'):
+                writer.write_file(record)
+
+        with FileUtils.open_output(output_file) as outfile:
+            writer = REPORT_WRITERS[self.output_format](self, outfile)
+            writer.begin()
+            analysis_results = self._collect_data(on_record=write_section)
+            with self.profiler.stage('report'):
+                writer.finish(analysis_results)
+        return analysis_results
+
+    def render_report(self, outfile, records: Iterable[FileRecord], output_format: str = 'text',
+                      sections: Optional[Dict[str, Tuple[Tuple, str]]] = None):
+        """
+        Write a report of files analyzed earlier, e.g. kept by a ProjectIndex.
+
+        The records must still carry their chunk hashes (and signatures for
+        near duplicates) and come in discovery order; for the same files the
+        report equals that of a fresh run. `sections` caches the rendered file
+        sections of this format by path, each with a stamp of the record it
+        was rendered from; a section is only reused for the same stamp.
+        """
+        writer = REPORT_WRITERS[output_format](self, outfile)
+
+        def write_cached_section(record: FileRecord):
+            stamp = (record.mtime_ns, record.size, record.content_hash, record.identical_to, record.degraded)
+            cached = sections.get(record.path)
+            if cached is not None and cached[0] == stamp:
+                section = cached[1]
+            else:
+                section = writer.file_section(record)
+                sections[record.path] = (stamp, section)
+            writer.write_section(section)
 
-    def _collect_data(self) -> Dict[str, Any]:
+        writer.begin()
+        writer.finish(self._summarize(records, on_record=writer.write_file if sections is None
+                                      else write_cached_section))
+
+    def _collect_data(self, on_record: Optional[Callable[[FileRecord], None]] = None) -> Dict[str, Any]:
+        self.progress.enter_stage(DISCOVERING)
+        with self.profiler.stage('discovery'):
+            file_paths = self._discover_files()
+        self.progress.discovered(len(file_paths))
+        self.profiler.count('files_discovered', len(file_paths))
+        self.progress.enter_stage(ANALYZING)
+        return self._summarize(self._analyze_files(file_paths), on_record)
+
+    def _summarize(self, records: Iterable[FileRecord],
+                   on_record: Optional[Callable[[FileRecord], None]] = None) -> Dict[str, Any]:
+        """
+        Aggregate the summaries over code file records, passing each on to `on_record` or keeping it.
+
+        Kept records hold on to their content up to Config.KEPT_CONTENT_CHARS
+        in total; the report reads the files past it again.
+
+        A file with the same content and language as an earlier one is passed
+        on as a reference to it: it counts as a file of the project, but its
+        TODOs, functions and code are only reported for the first copy, and
+        it takes no part in duplication detection.
+        """
         file_count = 0
         language_distribution = {}
         large_files: List[Tuple[str, int]] = []
+        # (relative path, size, budget, stage) of the files analyzed only in part
+        degraded_files: List[Tuple[str, int, str, str]] = []
         all_todos: List[Tuple[str, int, str]] = []
-        all_complexities: List[Tuple[str, str, int]] = []
-        files_content: List[Tuple[str, str, str, int]] = []
+        all_complexities: List[Tuple[str, str, int, int, int]] = []
+        # Per language: [code lines, comment lines, TODO comments]
+        line_metrics: Dict[str, List[int]] = {}
+        kept_records: List[FileRecord] = []
+        kept_content_chars = 0
+        first_copies: Dict[Tuple[str, str], str] = {}
+        # First copy's relative path -> (size, relative paths of the later copies)
+        identical_files: Dict[str, Tuple[int, List[str]]] = {}
+        duplication_index = AnalyzerRegistry.load('dup').DuplicationIndex() if 'dup' in self.analyzers else None
+        near_duplicate_index = (AnalyzerRegistry.load('near-dup').NearDuplicateIndex()
+                                if self.near_duplicates else None)
 
-        for root, dirs, files in os.walk(self.folder_path):
-            # Remove directories that should be ignored
-            dirs[:] = [d for d in dirs if not self._should_ignore(os.path.join(root, d))]
-
-            for filename in files:
-                file_path = FileUtils.join_paths(root, filename)
-                if self._should_ignore(file_path):
+        for record in records:
+            file_count += 1
+            language_distribution[record.language] = language_distribution.get(record.language, 0) + 1
+            if record.size > Config.LARGE_FILE_THRESHOLD:
+                large_files.append((record.path, record.size))
+            if record.degraded is not None:
+                degraded_files.append((record.relative_path, record.size, *record.degraded))
+            if record.size >= Config.IDENTICAL_FILE_MIN_BYTES:
+                first_copy = first_copies.setdefault((record.content_hash, record.language), record.relative_path)
+                if first_copy != record.relative_path:
+                    identical_files.setdefault(first_copy, (record.size, []))[1].append(record.relative_path)
+                    record = record._replace(todos=[], complexities=[], line_metrics=None, chunk_hashes=array('Q'),
+                                             signatures=[], token_estimate=0, identical_to=first_copy, content=None)
+                    if on_record is not None:
+                        on_record(record)
+                    else:
+                        kept_records.append(record)
                     continue
-                try:
-                    processed = self._process_file(file_path, language_distribution,
-                                                   large_files, all_todos, all_complexities, files_content)
-                    if processed:
-                        file_count += 1
-                except Exception as e:
-                    print(f"Error processing file {file_path}: {str(e)}")
+            all_todos.extend([(record.path, *todo) for todo in record.todos])
+            all_complexities.extend([(record.relative_path, *c) for c in record.complexities])
+            if record.line_metrics is not None:
+                totals = line_metrics.setdefault(record.language, [0, 0, 0])
+                for i, value in enumerate(record.line_metrics):
+                    totals[i] += value
+            with self.profiler.stage('duplication_index'):
+                if duplication_index is not None:
+                    duplication_index.add(record.relative_path, record.chunk_hashes)
+                if near_duplicate_index is not None:
+                    near_duplicate_index.add(record.relative_path, record.signatures)
 
-        code_duplicates = DuplicationDetector.detect_code_duplication(files_content)
+            # Hashes and signatures are only needed by the duplication indexes
+            record = record._replace(chunk_hashes=array('Q'), signatures=[])
+            if on_record is not None:
+                on_record(record)
+            else:
+                if record.content is not None:
+                    kept_content_chars += len(record.content)
+                    if kept_content_chars > Config.KEPT_CONTENT_CHARS:
+                        record = record._replace(content=None)
+                kept_records.append(record)
 
+        self.progress.enter_stage(SUMMARIZING)
+        with self.profiler.stage('near_duplicate_pairs'):
+            near_duplicate_pairs = near_duplicate_index.pairs() if near_duplicate_index is not None else []
+        duplicates = duplication_index.duplicates if duplication_index is not None else []
+        self.profiler.count('code_files', file_count)
+        self.profiler.count('todos', len(all_todos))
+        self.profiler.count('functions', len(all_complexities))
+        self.profiler.count('duplicate_regions', len(duplicates))
+        self.profiler.count('identical_files', sum(len(copies) for _, copies in identical_files.values()))
+        self.profiler.count('degraded_files', len(degraded_files))
         return {
             'file_count': file_count,
             'language_distribution': language_distribution,
             'large_files': large_files,
+            'degraded_files': degraded_files,
             'todos': all_todos,
             'complexities': all_complexities,
-            'duplicates': code_duplicates,
-            'files_content': files_content
+            'line_metrics': line_metrics,
+            'duplicates': duplicates,
+            'near_duplicates': near_duplicate_pairs,
+            # (first copy, size, later copies), most duplicated bytes first
+            'identical_files': sorted(((first_copy, size, copies) for first_copy, (size, copies) in identical_files.items()),
+                                      key=lambda item: (-item[1] * len(item[2]), item[0])),
+            'changes': self.changes,
+            'files': kept_records
         }
 
+    def _discover_files(self) -> List[str]:
+        if not self.use_git:
+            # Dot entries and .gitignore'd paths (including nested .gitignore files) are pruned by the walker
+            return [entry.path for entry in GitignoreWalker(self.folder_path).walk()]
+        if self.since is not None:
+            self.changes = GitUtils.changed_files(self.folder_path, self.since)
+            self._changes_by_path = {change.relative_path: change for change in self.changes}
+            relative_paths = [change.relative_path for change in self.changes if change.status != 'D']
+        else:
+            relative_paths = GitUtils.list_files(self.folder_path)
+        # Dot entries are skipped as in a walk, although git tracks them
+        return [GitUtils.full_path(self.folder_path, relative_path) for relative_path in relative_paths
+                if not any(part.startswith('.') for part in relative_path.split('/'))]
 
-    def _process_file(self, file_path: str, language_distribution: Dict[str, int],
-                      large_files: List[Tuple[str, int]], all_todos: List[Tuple[str, int, str]],
-                      all_complexities: List[Tuple[str, str, int]], files_content: List[Tuple[str, str, str, int]]) -> bool:
-        if not FileUtils.file_exists(file_path):
-            print(f"Warning: File not found: {file_path}")
-            return False
+    def _analyze_files(self, file_paths: List[str]) -> Iterator[FileRecord]:
+        """
+        Analyze files serially or on a process pool, yielding records in walk order.
 
-        language = LanguageDetector.guess_language(file_path)
-        
-        if language not in ["Unknown", "Binary"]:
-            language_distribution[language] = language_distribution.get(language, 0) + 1
-            
-            file_size = FileUtils.get_file_size(file_path)
-            if file_size > Config.LARGE_FILE_THRESHOLD:
-                large_files.append((file_path, file_size))
-            
-            todos = TodoScanner.scan_todos(file_path)
-            if todos:
-                all_todos.extend([(file_path, *todo) for todo in todos])
-
-            relative_path = FileUtils.get_relative_path(file_path, self.folder_path)
-            content = FileUtils.read_file_content(file_path)
-            files_content.append((relative_path, content, language, file_size))  # Added language and file_size
-
-            if language == "Python":
-                complexities = ComplexityAnalyzer.analyze_python_complexity(file_path)
-                all_complexities.extend([(relative_path, *c) for c in complexities])
-
-            return True
-        return False
+        Unchanged files are served from the cache, and files identical to one
+        analyzed earlier in a batch from the batch's memo. Of files with the
+        same name and content within the project only the first is analyzed.
+        Workers only return FileRecords, and Executor.map preserves input
+        order, so the merged results are identical to a serial, uncached run.
+        """
+        cached_records: Dict[int, FileRecord] = {}
+        pending_paths = []
+        with self.profiler.stage('cache_lookup'):
+            for position, file_path in enumerate(file_paths):
+                record = None
+                if self.cache is not None:
+                    self.progress.check_cancelled()
+                    record = self.cache.lookup(file_path, FileUtils.get_relative_path(file_path, self.folder_path),
+                                               self.analyzers)
+                if record is None and self.memo is not None:
+                    record = self.memo.lookup(file_path, FileUtils.get_relative_path(file_path, self.folder_path))
+                    if record is not None and record.degraded is None and self.cache is not None:
+                        self.cache.store(record, self.analyzers)
+                if record is not None:
+                    cached_records[position] = record
+                else:
+                    pending_paths.append(file_path)
+        with self.profiler.stage('identical_files'):
+            first_copies = self._find_identical_files(pending_paths)
+        if first_copies:
+            pending_paths = [file_path for file_path in pending_paths if file_path not in first_copies]
+        # Records of first copies, kept until their later copies are reached
+        copied_records: Dict[str, Optional[FileRecord]] = {file_path: None for file_path in first_copies.values()}
+
+        task = functools.partial(_process_file, folder_path=self.folder_path, analyzers=self.analyzers,
+                                 profile=self.profile_path is not None)
+        executor = None
+        if len(pending_paths) >= 2 and self.executor is not None:
+            chunk_size = max(1, min(Config.PARALLEL_CHUNK_SIZE, len(pending_paths) // (self.jobs * 4)))
+            outcomes = self.executor.map(task, pending_paths, chunksize=chunk_size)
+        elif self.jobs <= 1 or len(pending_paths) < 2:
+            outcomes = map(task, pending_paths)
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            executor = ProcessPoolExecutor(max_workers=self.jobs)
+            chunk_size = max(1, min(Config.PARALLEL_CHUNK_SIZE, len(pending_paths) // (self.jobs * 4)))
+            outcomes = executor.map(task, pending_paths, chunksize=chunk_size)
+        try:
+            for position in range(len(file_paths)):
+                record = cached_records.pop(position, None)
+                bytes_read = 0
+                file_path = file_paths[position]
+                if record is None and file_path in first_copies:
+                    record = self._copy_record(copied_records[first_copies[file_path]], file_path)
+                    if record is not None and record.degraded is None and self.cache is not None:
+                        self.cache.store(record, self.analyzers)
+                elif record is None:
+                    record, message, timings = next(outcomes)
+                    if file_path in copied_records:
+                        copied_records[file_path] = record
+                    if message:
+                        logger.warning(message)
+                        self.profiler.count('errors')
+                    if record is not None:
+                        bytes_read = record.bytes_read
+                        self.profiler.count('files_analyzed')
+                        self.profiler.count('bytes_read', bytes_read)
+                        if timings:
+                            self.profiler.add_file(record.relative_path, record.size, timings)
+                        # Cut short results are not kept, so that the file gets another chance next time
+                        if self.cache is not None and record.degraded is None:
+                            self.cache.store(record, self.analyzers)
+                        if self.memo is not None and record.degraded is None:
+                            self.memo.store(record)
+                self.progress.file_processed(bytes_read)
+                if record is not None and record.is_code:
+                    yield record
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    @staticmethod
+    def _find_identical_files(file_paths: List[str]) -> Dict[str, str]:
+        """
+        Map every file with the same name and content as an earlier one to that first copy.
+
+        The name takes part in language detection, so only such copies share
+        results. Files are only hashed when another file has the same size
+        and name, so unique files cost a stat, not a read. Files over
+        Config.FILE_BYTE_BUDGET are hashed only as far as they are read, with
+        their size and mtime, so their copies only match with the same mtime.
+        """
+        candidates: Dict[Tuple[int, str], List[Tuple[str, int]]] = {}
+        for file_path in file_paths:
+            try:
+                stat_result = os.stat(file_path)
+            except OSError:
+                continue
+            if stat_result.st_size >= Config.IDENTICAL_FILE_MIN_BYTES:
+                candidates.setdefault((stat_result.st_size, os.path.basename(file_path)), []).append(
+                    (file_path, stat_result.st_mtime_ns))
+        first_copies = {}
+        for (size, _), group in candidates.items():
+            if len(group) < 2:
+                continue
+            by_hash: Dict[str, str] = {}
+            for file_path, mtime_ns in group:
+                try:
+                    content_hash = FileContext.hash_file(file_path, size, mtime_ns, Config.FILE_BYTE_BUDGET)
+                except OSError:
+                    continue
+                first_copy = by_hash.setdefault(content_hash, file_path)
+                if first_copy != file_path:
+                    first_copies[file_path] = first_copy
+        return first_copies
+
+    def _copy_record(self, record: Optional[FileRecord], file_path: str) -> Optional[FileRecord]:
+        """The record of a copy of the file analyzed as `record`, or None if that file failed or changed."""
+        if record is None:
+            return None
+        try:
+            stat_result = os.stat(file_path)
+        except OSError:
+            return None
+        if stat_result.st_size != record.size:
+            return None
+        return record._replace(path=file_path, relative_path=FileUtils.get_relative_path(file_path, self.folder_path),
+                               mtime_ns=stat_result.st_mtime_ns)
 
     def _write_report(self, output_file: str, results: Dict[str, Any]):
-        with open(output_file, 'w', encoding='utf-8') as outfile:
-            self._write_report_header(outfile)
-            self._write_file_analysis(outfile, results['files_content'])
-            self._write_summary(outfile, results)
-            self._write_conclusion(outfile,results)
+        with FileUtils.open_output(output_file) as outfile:
+            writer = TextReportWriter(self, outfile)
+            writer.begin()
+            for record in results['files']:
+                writer.write_file(record)
+            writer.finish(results)
+
+    def _write_packed_report(self, output_file: str, results: Dict[str, Any]):
+        """
+        Write the report within the packer's token budgets.
+
+        Every shard starts with the same index of all files; file sections
+        follow in priority order and the summary closes the last shard. With
+        --shard-tokens the shards go to numbered files next to output_file.
+        """
+        summary = io.StringIO()
+        self._write_summary(summary, results)
+        self._write_conclusion(summary, results)
+        summary = summary.getvalue()
+        date = FileUtils.get_current_datetime()
+
+        # Size the index from a provisional plan; the final one differs only in its numbers
+        provisional = PackingPlan([PackedFile(record, FULL, ContextPacker.section_tokens(record), 1, None)
+                                   for record in results['files']], 1)
+        index_tokens = TokenEstimator.estimate(self._render_packed_header(provisional, 1, date))
+        plan = self.packer.plan(results['files'], index_tokens=index_tokens,
+                                summary_tokens=TokenEstimator.estimate(summary))
+
+        sharded = self.packer.shard_tokens is not None
+        for shard in range(1, plan.shard_count + 1):
+            shard_file = ContextPacker.shard_path(output_file, shard) if sharded else output_file
+            with FileUtils.open_output(shard_file) as outfile:
+                outfile.write(self._render_packed_header(plan, shard, date))
+                for packed in plan.files:
+                    if packed.shard == shard:
+                        self._write_packed_section(outfile, packed)
+                if shard == plan.shard_count:
+                    outfile.write(summary)
+        if sharded:
+            # Drop leftover shards of an earlier, longer run
+            stale = plan.shard_count + 1
+            while os.path.exists(ContextPacker.shard_path(output_file, stale)):
+                os.remove(ContextPacker.shard_path(output_file, stale))
+                stale += 1
+
+    def _render_packed_header(self, plan: PackingPlan, shard: int, date: str) -> str:
+        counts = {FULL: 0, SKELETON: 0, OMITTED: 0}
+        for packed in plan.files:
+            counts[packed.mode] += 1
+        total_tokens = sum(packed.tokens for packed in plan.files if packed.mode != OMITTED)
+        lines = [
+            f"Project Name: {os.path.basename(os.path.normpath(self.folder_path))}",
+            f"Date of Analysis: {date}",
+        ]
+        if self.packer.shard_tokens is not None:
+            lines.append(f"Shard {shard} of {plan.shard_count}")
+        lines.append("")
+        lines.append(f"Context Index ({counts[FULL]} full, {counts[SKELETON]} skeleton, {counts[OMITTED]} omitted; "
+                     f"~{total_tokens} tokens):")
+        for packed in plan.files:
+            entry = f"{packed.mode:<8} {packed.tokens:>8} tokens  {packed.record.relative_path}"
+            if self.packer.shard_tokens is not None:
+                entry = f"{f'shard {packed.shard}' if packed.shard else '-':>9} {entry}"
+            lines.append(entry)
+        lines.append("")
+        return '\n'.join(lines) + "\nAnalysis Report:\n\n"
+
+    def _write_packed_section(self, outfile, packed: PackedFile):
+        if packed.mode == FULL:
+            self._write_file_section(outfile, packed.record)
+            return
+        record = packed.record
+        outfile.write(f"Filename: {record.relative_path}\n")
+        outfile.write(f"Language: {record.language}\n")
+        outfile.write(f"File Size: {record.size} bytes\n")
+        outfile.write("Skeleton (signatures only):\n")
+        outfile.write(packed.skeleton)
+        outfile.write("\n\n")
 
     def _write_report_header(self, outfile):
         outfile.write(f"Project Name: {os.path.basename(os.path.normpath(self.folder_path))}\n")
         outfile.write(f"Date of Analysis: {FileUtils.get_current_datetime()}\n\n")
         outfile.write("Analysis Report:\n\n")
 
-    def _write_file_analysis(self, outfile, files_content: List[Tuple[str, str, str, int]]):
-        for file_path, content, language, file_size in files_content:
-            outfile.write(f"Filename: {file_path}\n")
-            outfile.write(f"Language: {language}\n")
-            outfile.write(f"File Size: {file_size} bytes\n")
+    def _write_file_section(self, outfile, record: FileRecord):
+        outfile.write(f"Filename: {record.relative_path}\n")
+        outfile.write(f"Language: {record.language}\n")
+        outfile.write(f"File Size: {record.size} bytes\n")
+        if record.identical_to is not None:
+            outfile.write(f"Identical to: {record.identical_to}\n\n")
+        else:
             outfile.write("Content:\n")
-            outfile.write(content)
+            outfile.write(self._file_content(record))
             outfile.write("\n\n")
+        if self.since is not None:
+            outfile.write(f"Diff since {self.since}:\n")
+            outfile.write(self._file_diff(record))
+            outfile.write("\n\n")
+
+    @staticmethod
+    def _file_content(record: FileRecord) -> str:
+        """
+        The content as written into the report; of a file over the byte budget only the beginning.
+
+        The content kept with the record is used when there is one. Otherwise
+        the file is read again, which only records from the cache, a batch's
+        memo or past Config.KEPT_CONTENT_CHARS need.
+        """
+        if record.content is not None:
+            return record.content
+        try:
+            stat_result = os.stat(record.path)
+            if (stat_result.st_size, stat_result.st_mtime_ns) != (record.size, record.mtime_ns):
+                logger.warning("%s changed after it was analyzed; its report section shows the new content",
+                               record.relative_path)
+        except OSError:
+            pass
+        if record.truncated:
+            return (FileUtils.read_file_content(record.path, Config.DEGRADED_CONTENT_CHARS) +
+                    CodeAnalyzer._truncation_note(record.size))
+        return FileUtils.read_file_content(record.path)
+
+    @staticmethod
+    def _truncation_note(size: int) -> str:
+        return f"\n[Truncated: the file has {size} bytes]"
+
+    def _file_diff(self, record: FileRecord) -> str:
+        change = self._changes_by_path.get(record.relative_path.replace(os.sep, '/'))
+        if change is None:
+            return "[No changes]"
+        return GitUtils.diff(self.folder_path, self.since, change.relative_path, change.old_path)
 
     def _write_summary(self, outfile, results: Dict[str, Any]):
         file_count = results['file_count']
@@ -147,10 +556,35 @@ class CodeAnalyzer:
             outfile.write("No code files were analyzed.\n")
         outfile.write("\n")
 
+        self._write_changes_summary(outfile, results['changes'])
+        self._write_line_metrics_summary(outfile, results['line_metrics'])
         self._write_large_files_summary(outfile, results['large_files'])
+        self._write_degraded_files_summary(outfile, results['degraded_files'])
         self._write_todos_summary(outfile, results['todos'])
         self._write_complexity_summary(outfile, results['complexities'])
+        self._write_identical_files_summary(outfile, results['identical_files'])
         self._write_duplication_summary(outfile, results['duplicates'])
+        self._write_near_duplication_summary(outfile, results['near_duplicates'])
+
+    def _write_changes_summary(self, outfile, changes: List[FileChange]):
+        if self.since is not None:
+            outfile.write(f"Changes since {self.since}:\n")
+            for change in changes:
+                renamed = f" (from {change.old_path})" if change.old_path else ""
+                outfile.write(f"{change.status} {change.relative_path}{renamed}: "
+                              f"+{change.added_lines} -{change.deleted_lines}\n")
+            if not changes:
+                outfile.write("No files changed.\n")
+            outfile.write("\n")
+
+    def _write_line_metrics_summary(self, outfile, line_metrics: Dict[str, List[int]]):
+        if line_metrics:
+            outfile.write("Code Metrics:\n")
+            for lang, (code_lines, comment_lines, todo_comments) in line_metrics.items():
+                commented = comment_lines / (code_lines + comment_lines) * 100 if code_lines + comment_lines else 0
+                outfile.write(f"{lang}: {code_lines} code lines, {comment_lines} comment lines "
+                              f"({commented:.2f}% comments), {todo_comments} TODO/FIXME comments\n")
+            outfile.write("\n")
 
     def _write_large_files_summary(self, outfile, large_files: List[Tuple[str, int]]):
         if large_files:
@@ -159,6 +593,26 @@ class CodeAnalyzer:
                 outfile.write(f"{os.path.relpath(file_path, self.folder_path)}: {size/1024:.2f} KB\n")
             outfile.write("\n")
 
+    def _write_degraded_files_summary(self, outfile, degraded_files: List[Tuple[str, int, str, str]]):
+        if degraded_files:
+            outfile.write("Skipped/Degraded Files:\n")
+            for relative_path, size, budget, stage in degraded_files:
+                outfile.write(f"{relative_path}: {self._degradation_reason(size, budget, stage)}\n")
+            outfile.write("\n")
+
+    @staticmethod
+    def _degradation_reason(size: int, budget: str, stage: str) -> str:
+        if budget == 'size' and stage == 'tokens':
+            return (f"{size} bytes exceed the lexing budget of {Config.LEX_BYTE_BUDGET}; token metrics and "
+                    f"non-Python function complexity were skipped")
+        if budget == 'size':
+            return (f"{size} bytes exceed the byte budget of {Config.FILE_BYTE_BUDGET}; only TODOs in the first "
+                    f"{Config.FILE_BYTE_BUDGET} bytes were collected and the content is truncated")
+        if budget == 'time':
+            return (f"the time budget of {Config.FILE_TIME_BUDGET:g} s ran out in {stage}; "
+                    f"the analysis stopped there")
+        return f"nested too deeply for {stage}; the analyzers from there on were skipped"
+
     def _write_todos_summary(self, outfile, todos: List[Tuple[str, int, str]]):
         if todos:
             outfile.write("All TODO/FIXME Comments:\n")
@@ -166,51 +620,87 @@ class CodeAnalyzer:
                 outfile.write(f"{os.path.relpath(file_path, self.folder_path)} (Line {line_num}): {comment}\n")
             outfile.write("\n")
 
-    def _write_complexity_summary(self, outfile, complexities: List[Tuple[str, str, int]]):
+    def _write_complexity_summary(self, outfile, complexities: List[Tuple[str, str, int, int, int]]):
         if complexities:
-            outfile.write(f"Top {Config.TOP_COMPLEX_FUNCTIONS} Most Complex Functions:\n")
-            for file_path, func, complexity in sorted(complexities, key=lambda x: x[2], reverse=True)[:Config.TOP_COMPLEX_FUNCTIONS]:
-                outfile.write(f"{file_path} - {func}: Complexity {complexity}\n")
+            outfile.write(f"Top {self.top} Most Complex Functions:\n")
+            # nlargest keeps the order of equally complex entries, like a stable sort would
+            for file_path, func, complexity, depth, line_count in heapq.nlargest(self.top, complexities, key=lambda x: x[2]):
+                outfile.write(f"{file_path} - {func}: Complexity {complexity} (nesting depth {depth}, {line_count} lines)\n")
             outfile.write("\n")
 
-    def _write_duplication_summary(self, outfile, duplicates: List[Tuple[str, str, int, int, str]]):
+    def _write_identical_files_summary(self, outfile, identical_files: List[Tuple[str, int, List[str]]]):
+        if identical_files:
+            outfile.write("Identical Files (reported once, under the first copy):\n")
+            for first_copy, size, copies in identical_files[:Config.IDENTICAL_FILES_REPORT_LIMIT]:
+                outfile.write(f"{first_copy} ({size} bytes): {len(copies)} "
+                              f"{'copy' if len(copies) == 1 else 'copies'}: {', '.join(copies)}\n")
+            if len(identical_files) > Config.IDENTICAL_FILES_REPORT_LIMIT:
+                outfile.write(f"... and {len(identical_files) - Config.IDENTICAL_FILES_REPORT_LIMIT} "
+                              f"more groups of identical files\n")
+            outfile.write("\n")
+
+    def _write_duplication_summary(self, outfile, duplicates: List[Tuple[str, str, int, int, int, int]]):
         if duplicates:
             outfile.write("Potential Code Duplications:\n")
-            for file1, file2, line1, line2, chunk in duplicates[:10]:
+            for file1, file2, start1, end1, start2, end2 in duplicates[:10]:
+                region = AnalyzerRegistry.load('dup').DuplicationDetector.read_region(os.path.join(self.folder_path, file1), start1, end1)
+                region_lines = region.split('\n')
                 outfile.write(f"Similar code found in:\n")
-                outfile.write(f"  1. {file1} (line {line1})\n")
-                outfile.write(f"  2. {file2} (line {line2})\n")
+                outfile.write(f"  1. {file1} (lines {start1}-{end1})\n")
+                outfile.write(f"  2. {file2} (lines {start2}-{end2})\n")
                 outfile.write("Duplicated code:\n")
-                outfile.write(chunk + "\n\n")
+                outfile.write('\n'.join(region_lines[:Config.DUPLICATION_PREVIEW_LINES]) + "\n")
+                if len(region_lines) > Config.DUPLICATION_PREVIEW_LINES:
+                    outfile.write(f"... ({len(region_lines) - Config.DUPLICATION_PREVIEW_LINES} more lines)\n")
+                outfile.write("\n")
             if len(duplicates) > 10:
                 outfile.write(f"... and {len(duplicates) - 10} more duplications\n")
             outfile.write("\n")
     
+    def _write_near_duplication_summary(self, outfile, pairs: List[Tuple[float, str, str, str, str]]):
+        if pairs:
+            outfile.write("Near-Duplicate Code (estimated similarity):\n")
+            for similarity, file1, label1, file2, label2 in pairs[:Config.NEAR_DUPLICATE_REPORT_LIMIT]:
+                first = f"{file1}:{label1}" if label1 else file1
+                second = f"{file2}:{label2}" if label2 else file2
+                outfile.write(f"{first} ~ {second}: {similarity * 100:.0f}% similar\n")
+            if len(pairs) > Config.NEAR_DUPLICATE_REPORT_LIMIT:
+                outfile.write(f"... and {len(pairs) - Config.NEAR_DUPLICATE_REPORT_LIMIT} more near-duplicate pairs\n")
+            outfile.write("\n")
+
     def _write_conclusion(self, outfile, results: Dict[str, Any]):
         outfile.write("Conclusion and Recommendations:\n")
         
         # Language distribution analysis
-        primary_language = max(results['language_distribution'], key=results['language_distribution'].get)
         language_count = len(results['language_distribution'])
-        outfile.write(f"1. Language Distribution: The project primarily uses {primary_language} ")
-        outfile.write(f"({results['language_distribution'][primary_language]} files) ")
-        outfile.write(f"out of {results['file_count']} total files. ")
+        if language_count == 0:
+            # Nothing to analyze, e.g. no code file changed since the --since revision
+            outfile.write("1. Language Distribution: No code files were analyzed.\n")
+        else:
+            primary_language = max(results['language_distribution'], key=results['language_distribution'].get)
+            outfile.write(f"1. Language Distribution: The project primarily uses {primary_language} ")
+            outfile.write(f"({results['language_distribution'][primary_language]} files) ")
+            outfile.write(f"out of {results['file_count']} total files. ")
         if language_count > 1:
             outfile.write(f"The project is multilingual, using {language_count} different languages. ")
             outfile.write("Consider standardizing on fewer languages if possible to improve maintainability.\n")
-        else:
+        elif language_count == 1:
             outfile.write("The project consistently uses a single language, which is good for maintainability.\n")
 
         # TODO/FIXME analysis
         todo_count = len(results['todos'])
-        if todo_count > 0:
+        if 'todo' not in self.analyzers:
+            outfile.write("2. TODO/FIXME Comments: Not analyzed.\n")
+        elif todo_count > 0:
             outfile.write(f"2. TODO/FIXME Comments: There are {todo_count} TODO/FIXME comments in the project. ")
             outfile.write("Consider addressing these issues to improve code quality and completeness.\n")
         else:
             outfile.write("2. TODO/FIXME Comments: No TODO/FIXME comments found. Good job keeping the codebase clean!\n")
 
         # Complexity analysis
-        if results['complexities']:
+        if 'complexity' not in self.analyzers:
+            outfile.write("3. Code Complexity: Not analyzed.\n")
+        elif results['complexities']:
             max_complexity = max(results['complexities'], key=lambda x: x[2])
             outfile.write(f"3. Code Complexity: The most complex function is '{max_complexity[1]}' ")
             outfile.write(f"in file '{max_complexity[0]}' with a complexity of {max_complexity[2]}. ")
@@ -220,9 +710,18 @@ class CodeAnalyzer:
 
         # Duplication analysis
         duplication_count = len(results['duplicates'])
-        if duplication_count > 0:
-            outfile.write(f"4. Code Duplication: Detected {duplication_count} instances of potential code duplication. ")
-            outfile.write("Review and refactor these areas to improve code maintainability and reduce redundancy.\n")
+        copy_count = sum(len(copies) for _, _, copies in results['identical_files'])
+        copies = ""
+        if copy_count > 0:
+            copies = (f" {copy_count} {'file is an exact copy' if copy_count == 1 else 'files are exact copies'} "
+                      "of other files; consider sharing a single copy, e.g. as a dependency.")
+        if 'dup' not in self.analyzers:
+            outfile.write(f"4. Code Duplication: Not analyzed.{copies}\n")
+        elif duplication_count > 0:
+            outfile.write(f"4. Code Duplication: Detected {duplication_count} duplicated code regions. ")
+            outfile.write(f"Review and refactor these areas to improve code maintainability and reduce redundancy.{copies}\n")
+        elif copy_count > 0:
+            outfile.write(f"4. Code Duplication:{copies}\n")
         else:
             outfile.write("4. Code Duplication: No significant code duplication detected. Great job keeping the code DRY!\n")
 
@@ -241,6 +740,285 @@ class CodeAnalyzer:
         outfile.write("   - Consider using static code analysis tools for ongoing code quality checks.\n")
         outfile.write("   - Maintain up-to-date documentation for better project understanding and onboarding.\n")
 
-def analyze_project(folder_path: str, output_file: str) -> int:
-    analyzer = CodeAnalyzer(folder_path)
-    return analyzer.analyze(output_file)
\ No newline at end of file
+class ReportWriter:
+    """
+    Writes a report incrementally: begin, one section per file as it is
+    analyzed, then the summaries once all files are done.
+    """
+
+    def __init__(self, analyzer: CodeAnalyzer, outfile):
+        self.analyzer = analyzer
+        self.outfile = outfile
+
+    def begin(self):
+        pass
+
+    def write_file(self, record: FileRecord):
+        self.write_section(self.file_section(record))
+
+    def file_section(self, record: FileRecord) -> str:
+        """The section of one file, rendered on its own so that it can be kept and written again."""
+        return ''
+
+    def write_section(self, section: str):
+        self.outfile.write(section)
+
+    def finish(self, results: Dict[str, Any]):
+        pass
+
+
+class TextReportWriter(ReportWriter):
+    """The free-form text report meant to be read by people and LLMs."""
+
+    def begin(self):
+        self.analyzer._write_report_header(self.outfile)
+
+    def write_file(self, record: FileRecord):
+        self.analyzer._write_file_section(self.outfile, record)
+
+    def file_section(self, record: FileRecord) -> str:
+        section = io.StringIO()
+        self.analyzer._write_file_section(section, record)
+        return section.getvalue()
+
+    def finish(self, results: Dict[str, Any]):
+        self.analyzer._write_summary(self.outfile, results)
+        self.analyzer._write_conclusion(self.outfile, results)
+
+
+class StructuredReportWriter(ReportWriter):
+    """The documents shared by the JSON formats, so that they can be consumed without a parse step."""
+
+    def project_document(self) -> Dict[str, Any]:
+        return {
+            'project': os.path.basename(os.path.normpath(self.analyzer.folder_path)),
+            'date': FileUtils.get_current_datetime(),
+            'since': self.analyzer.since,
+        }
+
+    def file_document(self, record: FileRecord) -> Dict[str, Any]:
+        document = {
+            'path': record.relative_path,
+            'language': record.language,
+            'size': record.size,
+        }
+        if record.identical_to is not None:
+            # Copies only point to the first file with their content
+            document['identical_to'] = record.identical_to
+        else:
+            document.update({
+                'todos': [{'line': line, 'text': text} for line, text in record.todos],
+                'complexity': [{'name': name, 'complexity': complexity, 'nesting_depth': depth, 'lines': line_count}
+                               for name, complexity, depth, line_count in record.complexities],
+                'line_metrics': None if record.line_metrics is None else
+                dict(zip(('code_lines', 'comment_lines', 'todo_comments'), record.line_metrics)),
+                'content': self.analyzer._file_content(record),
+            })
+        if record.degraded is not None:
+            document['degraded'] = dict(zip(('budget', 'stage'), record.degraded))
+        if self.analyzer.since is not None:
+            document['diff'] = self.analyzer._file_diff(record)
+        return document
+
+    def summary_document(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        folder_path = self.analyzer.folder_path
+        top_complexities = heapq.nlargest(self.analyzer.top, results['complexities'], key=lambda x: x[2])
+        document = {
+            'file_count': results['file_count'],
+            'languages': results['language_distribution'],
+            'line_metrics': {language: dict(zip(('code_lines', 'comment_lines', 'todo_comments'), totals))
+                             for language, totals in results['line_metrics'].items()},
+            'large_files': [{'path': os.path.relpath(file_path, folder_path), 'size': size}
+                            for file_path, size in sorted(results['large_files'], key=lambda x: x[1], reverse=True)],
+            'degraded_files': [{'path': relative_path, 'size': size, 'budget': budget, 'stage': stage,
+                                'reason': self.analyzer._degradation_reason(size, budget, stage)}
+                               for relative_path, size, budget, stage in results['degraded_files']],
+            'todo_count': len(results['todos']),
+            'complex_functions': [{'path': file_path, 'name': name, 'complexity': complexity,
+                                   'nesting_depth': depth, 'lines': line_count}
+                                  for file_path, name, complexity, depth, line_count in top_complexities],
+            'duplicates': [{'path': file1, 'lines': [start1, end1], 'other_path': file2, 'other_lines': [start2, end2]}
+                           for file1, file2, start1, end1, start2, end2 in results['duplicates']],
+            'near_duplicates': [{'path': file1, 'name': label1, 'other_path': file2, 'other_name': label2,
+                                 'similarity': round(similarity, 4)}
+                                for similarity, file1, label1, file2, label2 in results['near_duplicates']],
+            'identical_files': [{'path': first_copy, 'size': size, 'copies': copies}
+                                for first_copy, size, copies in results['identical_files']],
+        }
+        if self.analyzer.since is not None:
+            document['changes'] = [change._asdict() for change in results['changes']]
+        return document
+
+    @staticmethod
+    def dumps(document: Dict[str, Any]) -> str:
+        return json.dumps(document, ensure_ascii=False)
+
+
+class JsonLinesReportWriter(StructuredReportWriter):
+    """One JSON document per line: the project, then each file, then the summary, each tagged with its type."""
+
+    def begin(self):
+        self._write_line('project', self.project_document())
+
+    def file_section(self, record: FileRecord) -> str:
+        return self.dumps({'type': 'file', **self.file_document(record)}) + "\n"
+
+    def finish(self, results: Dict[str, Any]):
+        self._write_line('summary', self.summary_document(results))
+
+    def _write_line(self, record_type: str, document: Dict[str, Any]):
+        self.outfile.write(self.dumps({'type': record_type, **document}))
+        self.outfile.write("\n")
+
+
+class JsonReportWriter(StructuredReportWriter):
+    """A single JSON document, written piece by piece so that file sections are not held in memory."""
+
+    def begin(self):
+        self.outfile.write(f'{{"project": {self.dumps(self.project_document())}, "files": [')
+        self._first = True
+
+    def file_section(self, record: FileRecord) -> str:
+        return self.dumps(self.file_document(record))
+
+    def write_section(self, section: str):
+        self.outfile.write("\n" if self._first else ",\n")
+        self._first = False
+        self.outfile.write(section)
+
+    def finish(self, results: Dict[str, Any]):
+        self.outfile.write(f'\n], "summary": {self.dumps(self.summary_document(results))}}}\n')
+
+
+REPORT_WRITERS = {
+    'text': TextReportWriter,
+    'jsonl': JsonLinesReportWriter,
+    'json': JsonReportWriter,
+}
+
+def _process_file(file_path: str, folder_path: str, analyzers: FrozenSet[str], profile: bool = False
+                  ) -> Tuple[Optional[FileRecord], Optional[str], Optional[Dict[str, float]]]:
+    """
+    Analyze a single file with the selected analyzers and return its record,
+    an optional message to log and, with `profile`, the seconds spent in
+    each analysis stage.
+
+    Files over Config.FILE_BYTE_BUDGET are only read up to it and get just
+    the TODO scan and a token estimate, and files over
+    Config.LEX_BYTE_BUDGET are not lexed. Reading, decoding and language
+    detection are bounded by those budgets and by the sample sizes of the
+    detector; the analyzers after them run under a watchdog, which is also
+    checked after every stage and while lexing, and once
+    Config.FILE_TIME_BUDGET is used up the remaining ones are skipped.
+    Python is parsed before it is lexed, so that source nested too deeply
+    is found before the expensive stage. Cut short analyses are marked in
+    the record's `degraded`.
+
+    This is a module-level function so that it can be pickled and run in a
+    worker process.
+    """
+    try:
+        if not FileUtils.file_exists(file_path):
+            return None, f"File not found: {file_path}", None
+
+        clock = StageClock()
+        relative_path = FileUtils.get_relative_path(file_path, folder_path)
+        context = FileContext(file_path, relative_path, max_bytes=Config.FILE_BYTE_BUDGET)
+        clock.lap('read')
+        # The lazy decode and parse are forced up front so that they are timed as stages of their own
+        context.text
+        clock.lap('decode')
+        language = LanguageDetector.guess_language(context)
+        context.language = language
+        clock.lap('language')
+
+        todos: List[Tuple[int, str]] = []
+        complexities: List[Tuple[str, int, int, int]] = []
+        line_metrics: Optional[Tuple[int, int, int]] = None
+        chunk_hashes = array('Q')
+        signatures: List[Tuple[str, array]] = []
+        token_estimate = 0
+        degraded = ('size', 'read') if context.truncated else None
+        if language not in SKIPPED_LANGUAGES:
+            watchdog = Watchdog(Config.FILE_TIME_BUDGET)
+            stage = 'todos'
+            try:
+                watchdog.start()
+                if 'todo' in analyzers:
+                    todos = AnalyzerRegistry.load('todo').TodoScanner.scan_todos(context)
+                    clock.lap(stage)
+                    watchdog.check()
+                measure_complexity = 'complexity' in analyzers and not context.truncated
+                if language == "Python" and measure_complexity:
+                    stage = 'ast'
+                    context.python_tree
+                    clock.lap(stage)
+                    watchdog.check()
+                    stage = 'complexity'
+                    complexities = AnalyzerRegistry.load('complexity').ComplexityAnalyzer.analyze_python_complexity(context)
+                    clock.lap(stage)
+                    watchdog.check()
+                if language in Config.SUPPORTED_LANGUAGES and not context.truncated and (
+                        'metrics' in analyzers or (measure_complexity and language != "Python")):
+                    if Config.LEX_BYTE_BUDGET is not None and context.size > Config.LEX_BYTE_BUDGET:
+                        degraded = ('size', 'tokens')
+                    else:
+                        stage = 'tokens'
+                        # One lexing pass gives line metrics everywhere and function complexity outside Python
+                        functions, line_metrics = AnalyzerRegistry.load('metrics').TokenMetricsAnalyzer.analyze(
+                            context, track_functions=measure_complexity, check=watchdog.check)
+                        if language != "Python":
+                            complexities = functions
+                        if 'metrics' not in analyzers:
+                            line_metrics = None
+                        clock.lap(stage)
+                        watchdog.check()
+                if 'dup' in analyzers and not context.truncated:
+                    stage = 'duplication'
+                    chunk_hashes = AnalyzerRegistry.load('dup').DuplicationDetector.hash_chunks(context.display_content)
+                    clock.lap(stage)
+                    watchdog.check()
+                if 'near-dup' in analyzers and not context.truncated:
+                    stage = 'near_duplicates'
+                    signatures = AnalyzerRegistry.load('near-dup').NearDuplicateDetector.signatures(context)
+                    clock.lap(stage)
+                    watchdog.check()
+            except BudgetExceeded:
+                # A truncated file keeps its size reason, the root cause of its cheap treatment
+                degraded = degraded or ('time', stage)
+                clock.lap(stage)
+            except RecursionError:
+                degraded = degraded or ('depth', stage)
+                clock.lap(stage)
+            finally:
+                watchdog.stop()
+            # The estimate is of the content as written into the report
+            content = context.display_content
+            if context.truncated:
+                content = content[:Config.DEGRADED_CONTENT_CHARS]
+            token_estimate = TokenEstimator.estimate(content)
+            if context.truncated:
+                content += CodeAnalyzer._truncation_note(context.size)
+            clock.lap('token_estimate')
+        else:
+            content = None
+
+        # Skipped files still get a record so that the cache remembers them
+        return FileRecord(file_path, relative_path, language, context.size, context.mtime_ns,
+                          context.content_hash, todos, complexities, line_metrics, chunk_hashes, signatures,
+                          token_estimate, degraded=degraded, content=content), None, clock.timings if profile else None
+    except Exception as e:
+        # The type tells an unreadable file from a bug in an analyzer
+        return None, f"Error processing file {file_path}: {type(e).__name__}: {e}", None
+
+def analyze_project(folder_path: str, output_file: str, jobs: int = 1, stream: bool = False,
+                    use_cache: bool = False, near_duplicates: bool = False, top: Optional[int] = None,
+                    max_tokens: Optional[int] = None, shard_tokens: Optional[int] = None, use_git: bool = True,
+                    since: Optional[str] = None, progress: Optional[ProgressListener] = None,
+                    profile: Optional[str] = None, output_format: str = 'text',
+                    analyzers: Optional[Iterable[str]] = None) -> int:
+    analyzer = CodeAnalyzer(folder_path, jobs=jobs, stream=stream, use_cache=use_cache,
+                            near_duplicates=near_duplicates, top=top, max_tokens=max_tokens,
+                            shard_tokens=shard_tokens, use_git=use_git, since=since, progress=progress,
+                            profile_path=profile, output_format=output_format, analyzers=analyzers)
+    return analyzer.analyze(output_file)
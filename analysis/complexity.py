@@ -1,28 +1,80 @@
 import ast
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from .file_context import FileContext
+
+# Each of these adds one decision point to the enclosing scope
+BRANCH_NODES = (ast.If, ast.While, ast.For, ast.AsyncFor, ast.ExceptHandler, ast.Assert)
+# Each of these opens one nesting level
+BLOCK_NODES = (ast.If, ast.While, ast.For, ast.AsyncFor, ast.With, ast.AsyncWith, ast.Try, ast.ExceptHandler)
+if hasattr(ast, 'TryStar'):
+    BLOCK_NODES += (ast.TryStar,)
+if hasattr(ast, 'Match'):
+    BLOCK_NODES += (ast.Match,)
 
 class ComplexityAnalyzer:
     @staticmethod
-    def analyze_python_complexity(file_path: str) -> List[Tuple[str, int]]:
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-            tree = ast.parse(content)
-            function_complexities = []
-            for node in ast.walk(tree):
-                if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-                    complexity = ComplexityAnalyzer._calculate_complexity(node)
-                    function_complexities.append((node.name, complexity))
-            return function_complexities
-        except Exception:
+    def analyze_python_complexity(context: FileContext,
+                                  tree: Optional[ast.AST] = None) -> List[Tuple[str, int, int, int]]:
+        """
+        Compute (qualified name, cyclomatic complexity, nesting depth, line count) per function and class.
+
+        A pre-parsed tree is used when given; otherwise the context's cached
+        parse of its text is. Each node is visited exactly once.
+        """
+        if tree is None:
+            tree = context.python_tree
+        if tree is None:
             return []
+        visitor = ScopeMetricsVisitor()
+        visitor.visit(tree)
+        return visitor.scopes
 
-    @staticmethod
-    def _calculate_complexity(node: ast.AST) -> int:
-        complexity = 1
-        for child in ast.walk(node):
-            if isinstance(child, (ast.If, ast.While, ast.For, ast.AsyncFor, ast.ExceptHandler, ast.Assert)):
-                complexity += 1
-            elif isinstance(child, ast.BoolOp):
-                complexity += len(child.values) - 1
-        return complexity
\ No newline at end of file
+
+class ScopeMetricsVisitor(ast.NodeVisitor):
+    """
+    Single-pass metrics for every function and class scope.
+
+    Decision points are attributed only to the innermost enclosing scope, so
+    a method's branches are not counted again for its class.
+    """
+
+    def __init__(self):
+        self.scopes: List[Tuple[str, int, int, int]] = []
+        # Stack of [qualified name, complexity, current depth, max depth] for the open scopes
+        self._stack: List[list] = []
+
+    def visit_FunctionDef(self, node: ast.AST):
+        self._visit_scope(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+    visit_ClassDef = visit_FunctionDef
+
+    def generic_visit(self, node: ast.AST):
+        if not self._stack:
+            super().generic_visit(node)
+            return
+        scope = self._stack[-1]
+        if isinstance(node, BRANCH_NODES):
+            scope[1] += 1
+        elif isinstance(node, ast.BoolOp):
+            scope[1] += len(node.values) - 1
+        if isinstance(node, BLOCK_NODES):
+            scope[2] += 1
+            scope[3] = max(scope[3], scope[2])
+            super().generic_visit(node)
+            scope[2] -= 1
+        else:
+            super().generic_visit(node)
+
+    def _visit_scope(self, node: ast.AST):
+        parent = self._stack[-1][0] + '.' if self._stack else ''
+        scope = [parent + node.name, 1, 0, 0]
+        position = len(self.scopes)
+        # Reserve the slot so scopes are listed in source order, outer before inner
+        self.scopes.append(None)
+        self._stack.append(scope)
+        for child in ast.iter_child_nodes(node):
+            self.visit(child)
+        self._stack.pop()
+        line_count = (getattr(node, 'end_lineno', None) or node.lineno) - node.lineno + 1
+        self.scopes[position] = (scope[0], scope[1], scope[3], line_count)
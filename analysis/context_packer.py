@@ -0,0 +1,251 @@
+import ast
+import os
+import re
+from typing import Dict, List, NamedTuple, Optional, Set
+from .file_record import FileRecord
+from utils.file_operations import FileUtils
+from config import Config
+
+WORD_PATTERN = re.compile(r'\w+')
+SYMBOL_PATTERN = re.compile(r'[^\w\s]')
+# Lines kept in the skeleton of a file that is not Python (or does not parse): declarations and imports
+DECLARATION_PATTERN = re.compile(
+    r'^\s*(?:(?:export|public|private|protected|internal|static|abstract|final|async|virtual|inline|override)\s+)*'
+    r'(?:def|class|module|interface|struct|enum|trait|impl|function|func|fn|namespace|package|import|from|using|'
+    r'#include|require)\b'
+    r'|^\s*[\w<>\[\],:*&]+(?:\s+[\w<>\[\],:*&]+)*\s+[\w:~]+\s*\([^;]*\)\s*(?:const\s*)?\{?\s*$'
+)
+
+FULL = 'full'
+SKELETON = 'skeleton'
+OMITTED = 'omitted'
+
+
+class TokenEstimator:
+    """
+    Cheap token count for LLM context budgeting.
+
+    Words are weighted by Config.PACKER_TOKENS_PER_WORD for sub-word
+    splitting and every symbol counts as one token, which follows BPE
+    tokenizers on source code much more closely than a characters-per-token
+    ratio while costing only two regex scans.
+    """
+
+    @staticmethod
+    def estimate(text: str) -> int:
+        if not text:
+            return 0
+        words = len(WORD_PATTERN.findall(text))
+        symbols = len(SYMBOL_PATTERN.findall(text))
+        return int(words * Config.PACKER_TOKENS_PER_WORD) + symbols
+
+
+class PackedFile(NamedTuple):
+    record: FileRecord
+    mode: str  # FULL, SKELETON or OMITTED
+    tokens: int  # Estimated tokens of what is written for the file (its full size when omitted)
+    shard: int  # 1-based; 0 when omitted
+    skeleton: Optional[str]
+
+
+class PackingPlan(NamedTuple):
+    files: List[PackedFile]  # In priority order
+    shard_count: int
+
+
+class ContextPacker:
+    """
+    Fit the file sections of a report into token budgets.
+
+    Files are ranked by a priority combining complexity, TODO density,
+    recency and small size, then chosen greedily by rank or with a 0/1
+    knapsack that maximizes the total priority, within the budget less
+    Config.PACKER_SKELETON_SHARE. Files that do not fit are replaced by a
+    signatures-only skeleton when that fits, and are otherwise only listed
+    in the index; what the skeletons leave over goes to more full files.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, shard_tokens: Optional[int] = None,
+                 strategy: Optional[str] = None):
+        self.max_tokens = max_tokens
+        self.shard_tokens = shard_tokens
+        self.strategy = strategy or Config.PACKER_STRATEGY
+
+    @staticmethod
+    def shard_path(output_file: str, shard: int) -> str:
+        """report.txt -> report.part1.txt, report.txt.gz -> report.part1.txt.gz"""
+        base, compression = FileUtils.split_compression(output_file)
+        base, extension = os.path.splitext(base)
+        return f"{base}.part{shard}{extension}{compression}"
+
+    @staticmethod
+    def section_tokens(record: FileRecord) -> int:
+        return record.token_estimate + Config.PACKER_SECTION_OVERHEAD_TOKENS
+
+    def plan(self, records: List[FileRecord], index_tokens: int = 0, summary_tokens: int = 0) -> PackingPlan:
+        """
+        Decide how each file is included and which shard it goes to.
+
+        The index is repeated at the top of every shard, so it is taken off
+        each shard's capacity; the summary goes at the end of the last shard.
+        Both count once against the total budget.
+        """
+        priorities = ContextPacker.priorities(records)
+        ranked = sorted(records, key=lambda record: (-priorities[record.relative_path], record.relative_path))
+        budget = self.max_tokens - index_tokens - summary_tokens if self.max_tokens else None
+        shard_capacity = self.shard_tokens - index_tokens if self.shard_tokens else None
+
+        if budget is None:
+            chosen = {record.relative_path for record in ranked if self._fits_shard(self.section_tokens(record),
+                                                                                   shard_capacity)}
+        else:
+            # Without a reserve, full files take the whole budget and the rest are omitted rather than skeletons
+            full_budget = budget - int(max(budget, 0) * Config.PACKER_SKELETON_SHARE)
+            if self.strategy == 'knapsack':
+                chosen = self._knapsack(ranked, priorities, full_budget, shard_capacity)
+            else:
+                chosen = self._greedy(ranked, full_budget, shard_capacity)
+
+        remaining = None
+        if budget is not None:
+            remaining = budget - sum(self.section_tokens(record) for record in ranked if record.relative_path in chosen)
+        planned = []
+        for record in ranked:
+            if record.relative_path in chosen:
+                planned.append((record, FULL, self.section_tokens(record), None))
+                continue
+            # Files analyzed only in part are too big or too slow to parse for a skeleton
+            skeleton = SkeletonBuilder.build(record) if record.degraded is None else ''
+            tokens = TokenEstimator.estimate(skeleton) + Config.PACKER_SECTION_OVERHEAD_TOKENS
+            if skeleton and (remaining is None or tokens <= remaining) and self._fits_shard(tokens, shard_capacity):
+                if remaining is not None:
+                    remaining -= tokens
+                planned.append((record, SKELETON, tokens, skeleton))
+            else:
+                planned.append((record, OMITTED, self.section_tokens(record), None))
+        if remaining is not None:
+            # Files are upgraded to full by rank with what the skeletons left of the reserve
+            for position, (record, mode, tokens, _) in enumerate(planned):
+                if mode == FULL:
+                    continue
+                full_tokens = self.section_tokens(record)
+                extra = full_tokens - (tokens if mode == SKELETON else 0)
+                if extra <= remaining and self._fits_shard(full_tokens, shard_capacity):
+                    planned[position] = (record, FULL, full_tokens, None)
+                    remaining -= extra
+        return self._assign_shards(planned, shard_capacity, summary_tokens)
+
+    @staticmethod
+    def priorities(records: List[FileRecord]) -> Dict[str, float]:
+        """Score each file in [0, 1] from min-max normalized features weighted by Config.PACKER_WEIGHTS."""
+        if not records:
+            return {}
+        weights = Config.PACKER_WEIGHTS
+        features = {
+            'complexity': [max((complexity[1] for complexity in record.complexities), default=0) for record in records],
+            'todo_density': [len(record.todos) / max(record.token_estimate, 1) for record in records],
+            'recency': [record.mtime_ns for record in records],
+            'small_size': [-record.token_estimate for record in records],
+        }
+        scores = [0.0] * len(records)
+        for name, values in features.items():
+            lowest, highest = min(values), max(values)
+            if highest == lowest:
+                continue
+            for i, value in enumerate(values):
+                scores[i] += weights.get(name, 0) * (value - lowest) / (highest - lowest)
+        total_weight = sum(weights.values()) or 1
+        return {record.relative_path: scores[i] / total_weight for i, record in enumerate(records)}
+
+    @staticmethod
+    def _fits_shard(tokens: int, shard_capacity: Optional[int]) -> bool:
+        return shard_capacity is None or tokens <= shard_capacity
+
+    def _greedy(self, ranked: List[FileRecord], budget: int, shard_capacity: Optional[int]) -> Set[str]:
+        chosen = set()
+        for record in ranked:
+            tokens = self.section_tokens(record)
+            if tokens <= budget and self._fits_shard(tokens, shard_capacity):
+                chosen.add(record.relative_path)
+                budget -= tokens
+        return chosen
+
+    def _knapsack(self, ranked: List[FileRecord], priorities: Dict[str, float], budget: int,
+                  shard_capacity: Optional[int]) -> Set[str]:
+        """0/1 knapsack over token costs scaled down to at most Config.PACKER_KNAPSACK_BUCKETS units."""
+        if budget <= 0:
+            return set()
+        scale = max(1, -(-budget // Config.PACKER_KNAPSACK_BUCKETS))
+        capacity = budget // scale
+        items = [record for record in ranked
+                 if self.section_tokens(record) <= budget and self._fits_shard(self.section_tokens(record),
+                                                                               shard_capacity)]
+        # Rounding costs up keeps the scaled solution within the real budget
+        costs = [-(-self.section_tokens(record) // scale) for record in items]
+        # The small constant prefers more files among otherwise equal choices
+        values = [priorities[record.relative_path] + 1e-6 for record in items]
+        best = [0.0] * (capacity + 1)
+        taken = [bytearray(capacity + 1) for _ in items]
+        for i, (cost, value) in enumerate(zip(costs, values)):
+            row = taken[i]
+            for used in range(capacity, cost - 1, -1):
+                candidate = best[used - cost] + value
+                if candidate > best[used]:
+                    best[used] = candidate
+                    row[used] = 1
+        chosen = set()
+        used = capacity
+        for i in range(len(items) - 1, -1, -1):
+            if taken[i][used]:
+                chosen.add(items[i].relative_path)
+                used -= costs[i]
+        return chosen
+
+    @staticmethod
+    def _assign_shards(planned: list, shard_capacity: Optional[int], summary_tokens: int) -> PackingPlan:
+        files = []
+        shard, used = 1, 0
+        for record, mode, tokens, skeleton in planned:
+            if mode == OMITTED:
+                files.append(PackedFile(record, mode, tokens, 0, None))
+                continue
+            if shard_capacity is not None and used and used + tokens > shard_capacity:
+                shard, used = shard + 1, 0
+            used += tokens
+            files.append(PackedFile(record, mode, tokens, shard, skeleton))
+        if shard_capacity is not None and used and used + summary_tokens > shard_capacity:
+            shard += 1
+        return PackingPlan(files, shard)
+
+
+class SkeletonBuilder:
+    """Signatures-only stand-in for a file that does not fit the budget."""
+
+    @staticmethod
+    def build(record: FileRecord) -> str:
+        content = record.content if record.content is not None else FileUtils.read_file_content(record.path)
+        if record.language == "Python":
+            skeleton = SkeletonBuilder._python_skeleton(content)
+            if skeleton is not None:
+                return skeleton
+        return '\n'.join(line.rstrip() for line in content.splitlines() if DECLARATION_PATTERN.match(line))
+
+    @staticmethod
+    def _python_skeleton(content: str) -> Optional[str]:
+        """Module-level imports plus the decorator and signature lines of every class and function."""
+        try:
+            tree = ast.parse(content)
+        except (SyntaxError, ValueError, RecursionError, MemoryError):
+            return None
+        kept = set()
+        for node in tree.body:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                kept.update(range(node.lineno, node.end_lineno + 1))
+        for node in ast.walk(tree):
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                first = min([node.lineno] + [decorator.lineno for decorator in node.decorator_list])
+                # A signature spans up to the line before its body (or the def line for one-liners)
+                last = max(node.lineno, node.body[0].lineno - 1)
+                kept.update(range(first, last + 1))
+        lines = content.splitlines()
+        return '\n'.join(lines[number - 1].rstrip() for number in sorted(kept) if number <= len(lines))
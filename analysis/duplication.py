@@ -1,31 +1,134 @@
 import hashlib
-from typing import List, Tuple
-from collections import defaultdict
+import logging
+from array import array
+from typing import Dict, List, Tuple
+from .file_record import FileRecord
+from utils.file_operations import FileUtils
+from config import Config
+
+# Polynomial rolling hash over per-line hashes, modulo a Mersenne prime
+HASH_MODULUS = (1 << 61) - 1
+HASH_BASE = 1_000_003
+
+logger = logging.getLogger(__name__)
 
 class DuplicationDetector:
-    CHUNK_SIZE = 6
-    
     @staticmethod
-    def detect_code_duplication(files_content: List[Tuple[str, str, str, int]]) -> List[Tuple[str, str, int, int, str]]:
-        chunk_hashes = defaultdict(list)
-        duplicates = []
+    def hash_chunks(content: str) -> array:
+        """
+        Hash every DUPLICATION_CHUNK_SIZE-line window of a file.
+
+        Each line is normalized (surrounding whitespace stripped) and hashed
+        once; window hashes are then rolled forward in O(1) per line.
+        Index i is the window starting at line i + 1.
+        """
+        window = Config.DUPLICATION_CHUNK_SIZE
+        line_hashes = [
+            int.from_bytes(hashlib.blake2b(line.strip().encode(), digest_size=8).digest(), 'little') % HASH_MODULUS
+            for line in content.splitlines()
+        ]
+        chunk_hashes = array('Q')
+        if len(line_hashes) < window:
+            return chunk_hashes
+
+        leading_weight = pow(HASH_BASE, window - 1, HASH_MODULUS)
+        rolling = 0
+        for line_hash in line_hashes[:window]:
+            rolling = (rolling * HASH_BASE + line_hash) % HASH_MODULUS
+        chunk_hashes.append(rolling)
+        for i in range(window, len(line_hashes)):
+            rolling = ((rolling - line_hashes[i - window] * leading_weight) * HASH_BASE + line_hashes[i]) % HASH_MODULUS
+            chunk_hashes.append(rolling)
+        return chunk_hashes
+
+    @staticmethod
+    def detect_code_duplication(records: List[FileRecord]) -> List[Tuple[str, str, int, int, int, int]]:
+        index = DuplicationIndex()
+        for record in records:
+            index.add(record.relative_path, record.chunk_hashes)
+        return index.duplicates
+
+    @staticmethod
+    def read_region(file_path: str, start_line: int, end_line: int) -> str:
+        """Re-read the 1-based, inclusive line range of a clone region."""
+        lines = FileUtils.read_file_content(file_path).splitlines()
+        return '\n'.join(lines[start_line-1:end_line])
 
-        try:
-            for file_path, content, _, _ in files_content:  # Ignore language and file_size
-                lines = content.splitlines()
-                for i in range(len(lines) - DuplicationDetector.CHUNK_SIZE + 1):
-                    chunk = '\n'.join(lines[i:i+DuplicationDetector.CHUNK_SIZE])
-                    chunk_hash = hashlib.md5(chunk.encode()).hexdigest()
-                    
-                    for other_file, other_line in chunk_hashes[chunk_hash]:
-                        if other_file != file_path:
-                            duplicates.append((file_path, other_file, i+1, other_line+1, chunk))
-                            break
-                    
-                    chunk_hashes[chunk_hash].append((file_path, i))
 
+class DuplicationIndex:
+    """
+    Incremental window-hash index that reports maximal clone regions.
+
+    Files are added one at a time and their hashes can be dropped right
+    after. Postings are packed as (file id << 32 | window) integers: the
+    first occurrence of a hash lives in a plain dict, later ones in compact
+    arrays capped at DUPLICATION_MAX_POSTINGS. While a file is added,
+    matching windows that continue along the same diagonal of the same
+    earlier file are merged, so one 50-line clone becomes a single region
+    instead of 45 overlapping window hits. Matches within one file are not
+    reported.
+    """
+
+    def __init__(self):
+        self._paths: List[str] = []
+        self._first_postings: Dict[int, int] = {}
+        self._more_postings: Dict[int, array] = {}
+        # (file, other file, start line, end line, other start line, other end line), 1-based and inclusive
+        self.duplicates: List[Tuple[str, str, int, int, int, int]] = []
+
+    def add(self, file_path: str, chunk_hashes: array):
+        file_id = len(self._paths)
+        self._paths.append(file_path)
+        try:
+            regions = self._match(chunk_hashes)
+            self._index(file_id, chunk_hashes)
         except Exception as e:
-            print(f"Error in duplicate detection: {str(e)}")
-            # You might want to log this error or handle it in a way that's appropriate for your application
-        
-        return duplicates
\ No newline at end of file
+            logger.error("Error in duplicate detection for %s: %s", file_path, e)
+            return
+
+        window = Config.DUPLICATION_CHUNK_SIZE
+        for start, end, other_file, other_start in sorted(regions):
+            self.duplicates.append((
+                file_path, self._paths[other_file],
+                start + 1, end + window,
+                other_start + 1, other_start + end - start + window,
+            ))
+
+    def _postings(self, chunk_hash: int) -> List[int]:
+        first = self._first_postings.get(chunk_hash)
+        if first is None:
+            return []
+        more = self._more_postings.get(chunk_hash)
+        return [first] + more.tolist() if more is not None else [first]
+
+    def _match(self, chunk_hashes: array) -> List[Tuple[int, int, int, int]]:
+        """Find clone regions as (first window, last window, other file id, other first window)."""
+        regions = []
+        # Active runs keyed by (other file, diagonal offset) -> (first window, other first window)
+        active: Dict[Tuple[int, int], Tuple[int, int]] = {}
+        for i, chunk_hash in enumerate(chunk_hashes):
+            extended: Dict[Tuple[int, int], Tuple[int, int]] = {}
+            for posting in self._postings(chunk_hash):
+                other_file, other_window = posting >> 32, posting & 0xFFFFFFFF
+                key = (other_file, other_window - i)
+                extended[key] = active.get(key, (i, other_window))
+            for key, (start, other_start) in active.items():
+                if key not in extended:
+                    regions.append((start, i - 1, key[0], other_start))
+            active = extended
+        for key, (start, other_start) in active.items():
+            regions.append((start, len(chunk_hashes) - 1, key[0], other_start))
+        return regions
+
+    def _index(self, file_id: int, chunk_hashes: array):
+        for i, chunk_hash in enumerate(chunk_hashes):
+            posting = (file_id << 32) | i
+            first = self._first_postings.get(chunk_hash)
+            if first is None:
+                self._first_postings[chunk_hash] = posting
+                continue
+            more = self._more_postings.get(chunk_hash)
+            if more is None:
+                self._more_postings[chunk_hash] = array('Q', [posting])
+            elif len(more) < Config.DUPLICATION_MAX_POSTINGS - 1:
+                more.append(posting)
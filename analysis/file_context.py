@@ -0,0 +1,122 @@
+import ast
+import codecs
+import hashlib
+import os
+from typing import List, Optional
+
+# Bytes read at a time when hashing a file from its path
+HASH_BLOCK_BYTES = 1024 * 1024
+
+
+class FileContext:
+    """
+    Everything the analyzers need to know about a single file.
+
+    The file is stat'ed once, read once and decoded at most once; every
+    analyzer receives the same context instead of reopening the path. With
+    `max_bytes`, a larger file is only read up to that many bytes and the
+    context is marked as truncated.
+    """
+
+    def __init__(self, path: str, relative_path: str, max_bytes: Optional[int] = None):
+        self.path = path
+        self.relative_path = relative_path
+        stat_result = os.stat(path)
+        self.size = stat_result.st_size
+        self.mtime_ns = stat_result.st_mtime_ns
+        with open(path, 'rb') as file:
+            self.raw = file.read() if max_bytes is None or self.size <= max_bytes else file.read(max_bytes)
+        self.truncated = len(self.raw) < self.size
+        self.language: Optional[str] = None
+        self.lexer_class: Optional[type] = None
+        self._text: Optional[str] = None
+        self._text_decoded = False
+        self._lines: Optional[List[str]] = None
+        self._python_tree: Optional[ast.AST] = None
+        self._python_tree_parsed = False
+
+    @property
+    def content_hash(self) -> str:
+        """A digest identifying the content independently of the path, computed from the bytes read."""
+        digest = FileContext._digest(self.size, self.mtime_ns, self.truncated)
+        digest.update(self.raw)
+        return digest.hexdigest()
+
+    @staticmethod
+    def hash_file(path: str, size: int, mtime_ns: int, max_bytes: Optional[int] = None) -> str:
+        """
+        The content_hash of a FileContext(path, ..., max_bytes) of the file, which has this size and mtime.
+
+        The file is read in blocks, and no further than a FileContext reads it.
+        """
+        truncated = max_bytes is not None and size > max_bytes
+        digest = FileContext._digest(size, mtime_ns, truncated)
+        remaining = max_bytes if truncated else None
+        with open(path, 'rb') as file:
+            while remaining is None or remaining > 0:
+                block = file.read(HASH_BLOCK_BYTES if remaining is None else min(HASH_BLOCK_BYTES, remaining))
+                if not block:
+                    break
+                digest.update(block)
+                if remaining is not None:
+                    remaining -= len(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _digest(size: int, mtime_ns: int, truncated: bool):
+        digest = hashlib.blake2b(digest_size=16)
+        if truncated:
+            # Only a prefix is read, so the size and mtime stand in for the rest of the content
+            digest.update(f"{size}:{mtime_ns}:".encode())
+        return digest
+
+    @property
+    def text(self) -> Optional[str]:
+        """The content decoded as UTF-8 with universal newlines, or None if it is not UTF-8."""
+        if not self._text_decoded:
+            self._text_decoded = True
+            try:
+                if self.truncated:
+                    # The cut may split a multi-byte character, which is left out
+                    decoded = codecs.getincrementaldecoder('utf-8')().decode(self.raw)
+                else:
+                    decoded = self.raw.decode('utf-8')
+            except UnicodeDecodeError:
+                decoded = None
+            if decoded is not None and '\r' in decoded:
+                decoded = decoded.replace('\r\n', '\n').replace('\r', '\n')
+            self._text = decoded
+        return self._text
+
+    @property
+    def lines(self) -> List[str]:
+        """The decoded content split into lines, as iterating over a text-mode file would yield them."""
+        if self._lines is None:
+            text = self.text
+            self._lines = text.split('\n') if text else []
+            if self._lines and self._lines[-1] == '':
+                self._lines.pop()
+        return self._lines
+
+    @property
+    def python_tree(self) -> Optional[ast.AST]:
+        """
+        The text parsed as Python, shared by every analyzer that needs it, or None if it does not parse.
+
+        A RecursionError from source nested too deeply to parse propagates on
+        the first access, so that the caller can report the file as degraded.
+        """
+        if not self._python_tree_parsed:
+            self._python_tree_parsed = True
+            if self.text is not None:
+                try:
+                    self._python_tree = ast.parse(self.text)
+                except (SyntaxError, ValueError, MemoryError):
+                    self._python_tree = None
+        return self._python_tree
+
+    @property
+    def display_content(self) -> str:
+        """The content as written into the report."""
+        text = self.text
+        return text if text is not None else "[Binary content]"
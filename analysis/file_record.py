@@ -0,0 +1,62 @@
+from array import array
+from typing import List, NamedTuple, Optional, Tuple
+
+from config import Config
+
+SKIPPED_LANGUAGES = ("Unknown", "Binary")
+
+
+class FileRecord(NamedTuple):
+    """
+    The compact result of analyzing one file.
+
+    Records hold what the report summaries need and the file's section
+    content, taken from the bytes that were analyzed so that the report
+    needn't read the file again. Where records are kept in bulk the content
+    is dropped; such records are cached, memoized and summarized without it.
+    """
+    path: str
+    relative_path: str
+    language: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+    todos: List[Tuple[int, str]]
+    # (qualified name, cyclomatic complexity, nesting depth, line count)
+    complexities: List[Tuple[str, int, int, int]]
+    # (code lines, comment lines, TODO comments) from the token metrics pass, for supported languages
+    line_metrics: Optional[Tuple[int, int, int]]
+    chunk_hashes: array
+    # MinHash signatures for near-duplicate detection, labelled '' for the whole file
+    signatures: List[Tuple[str, array]]
+    # Estimated LLM tokens of the file content, for the context packer
+    token_estimate: int
+    # Relative path of an earlier file with the same content, set while summarizing; its results stand for both
+    identical_to: Optional[str] = None
+    # (budget, stage) when the analysis was cut short: 'size' (over Config.FILE_BYTE_BUDGET at 'read', or over
+    # Config.LEX_BYTE_BUDGET at 'tokens'), 'time' (over Config.FILE_TIME_BUDGET) or 'depth' (nested too deeply),
+    # and the stage it happened in
+    degraded: Optional[Tuple[str, str]] = None
+    # The content as written into the report, or None once dropped and to be read again
+    content: Optional[str] = None
+
+    @property
+    def is_code(self) -> bool:
+        """Whether the file was recognized as text in a known language and belongs in the report."""
+        return self.language not in SKIPPED_LANGUAGES
+
+    @property
+    def truncated(self) -> bool:
+        """Whether only the beginning of the file, up to Config.FILE_BYTE_BUDGET, was read."""
+        return self.degraded is not None and tuple(self.degraded) == ('size', 'read')
+
+    @property
+    def bytes_read(self) -> int:
+        """
+        The bytes read from disk to produce the record, for the analysis and the content_hash alike.
+
+        Of a file over the byte budget only the prefix is read and hashed.
+        """
+        if self.truncated:
+            return min(self.size, Config.FILE_BYTE_BUDGET)
+        return self.size
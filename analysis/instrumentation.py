@@ -0,0 +1,148 @@
+import heapq
+import json
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+class StageClock:
+    """
+    Splits elapsed time into consecutive stages.
+
+    Each lap costs a single clock read, so a file's analysis can always be
+    timed and only the reporting depends on whether profiling is enabled.
+    """
+    __slots__ = ('timings', '_last')
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._last = time.perf_counter()
+
+    def lap(self, stage: str):
+        """Attribute the time since the previous lap (or creation) to `stage`."""
+        now = time.perf_counter()
+        self.timings[stage] = self.timings.get(stage, 0.0) + now - self._last
+        self._last = now
+
+
+class BudgetExceeded(Exception):
+    """Raised in the analysis of a file whose time budget ran out."""
+
+
+class Watchdog:
+    """
+    Enforces the time budget of one file's analysis.
+
+    In the main thread of a process, which is where the CLI and the worker
+    processes analyze files, a SIGALRM timer interrupts the running
+    analyzer with BudgetExceeded. Other threads (the GUI, --serve) cannot
+    receive signals, so there the budget is only enforced by check() between
+    analyzer stages. A budget of None disables both.
+    """
+
+    def __init__(self, seconds: Optional[float]):
+        self.seconds = seconds
+        self._deadline: Optional[float] = None
+        self._previous_handler = None
+        self._armed = False
+
+    def start(self):
+        if self.seconds is None:
+            return
+        self._deadline = time.perf_counter() + self.seconds
+        if hasattr(signal, 'setitimer') and threading.current_thread() is threading.main_thread():
+            self._previous_handler = signal.signal(signal.SIGALRM, self._expire)
+            self._armed = True
+            signal.setitimer(signal.ITIMER_REAL, self.seconds)
+
+    def check(self):
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise BudgetExceeded()
+
+    def stop(self):
+        self._deadline = None
+        if self._armed:
+            # Disarmed first, so that a signal arriving meanwhile is ignored by _expire
+            self._armed = False
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._previous_handler)
+
+    def _expire(self, signum, frame):
+        if self._armed:
+            raise BudgetExceeded()
+
+
+class Profiler:
+    """
+    Run-level stage timers and counters plus per-file stage breakdowns.
+
+    Stages of the run (discovery, cache lookups, report writing, ...) are
+    timed in the main process; per-file stages are measured where the file
+    is analyzed, possibly in a worker process, and handed over with
+    add_file. Only the slowest files are kept.
+    """
+
+    def __init__(self, slowest_files: int = 20):
+        self.slowest_files = slowest_files
+        self.stage_seconds: Dict[str, float] = {}
+        self.stage_calls: Dict[str, int] = {}
+        self.file_stage_seconds: Dict[str, float] = {}
+        self.counters: Dict[str, int] = {}
+        # Min-heap of (total seconds, relative path, size, per-stage seconds)
+        self._slowest: List[Tuple[float, str, int, Dict[str, float]]] = []
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + time.perf_counter() - started
+            self.stage_calls[name] = self.stage_calls.get(name, 0) + 1
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def add_file(self, relative_path: str, size: int, timings: Dict[str, float]):
+        for stage, seconds in timings.items():
+            self.file_stage_seconds[stage] = self.file_stage_seconds.get(stage, 0.0) + seconds
+        entry = (sum(timings.values()), relative_path, size, timings)
+        if len(self._slowest) < self.slowest_files:
+            heapq.heappush(self._slowest, entry)
+        elif self.slowest_files and entry[0] > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+
+    def report(self) -> Dict:
+        return {
+            'total_seconds': time.perf_counter() - self._started,
+            'stages': {name: {'seconds': seconds, 'calls': self.stage_calls[name]}
+                       for name, seconds in self.stage_seconds.items()},
+            # Summed over files; with several jobs this is CPU time spread over the workers
+            'file_stages': dict(sorted(self.file_stage_seconds.items(), key=lambda item: -item[1])),
+            'counters': dict(sorted(self.counters.items())),
+            'slowest_files': [
+                {'path': relative_path, 'size': size, 'seconds': seconds, 'stages': timings}
+                for seconds, relative_path, size, timings in sorted(self._slowest, reverse=True)
+            ],
+        }
+
+    def write(self, profile_path: str):
+        with open(profile_path, 'w', encoding='utf-8') as file:
+            json.dump(self.report(), file, indent=2)
+
+
+class NullProfiler(Profiler):
+    """Stands in when profiling is off, so call sites need no checks."""
+
+    @contextmanager
+    def stage(self, name: str):
+        yield
+
+    def count(self, name: str, amount: int = 1):
+        pass
+
+    def add_file(self, relative_path: str, size: int, timings: Optional[Dict[str, float]]):
+        pass
@@ -1,18 +1,184 @@
-from pygments.lexers import guess_lexer_for_filename
-from pygments.util import ClassNotFound
-import chardet
+import fnmatch
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from typing import Dict, List, Optional, Tuple
+from .file_context import FileContext
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+GLOB_CHARACTERS = re.compile(r'[*?\[]')
+
+# (lexer name, lexer class name, whether the pattern is primary) for each filename pattern
+PatternEntry = Tuple[str, str, bool]
 
 class LanguageDetector:
+    """
+    Tiered language detection.
+
+    1. Config.LANGUAGE_FAMILIES maps extensions straight to a language family.
+    2. A filename table built once from the pygments lexer registry resolves
+       the lexer candidates for a file name in O(1).
+    3. Only names claimed by several lexers fall back to content-based
+       guessing, and only on a prefix of the text.
+
+    Encoding is sniffed by trying UTF-8 first; chardet only sees a bounded
+    sample when that fails.
+
+    Building the filename table means importing every lexer class, so the
+    patterns are cached on disk per set of installed lexers, and only the
+    classes of actual candidates are imported.
+    """
+    _name_table: Optional[Dict[str, List[PatternEntry]]] = None
+    _suffix_table: Dict[str, List[PatternEntry]] = {}
+    _glob_patterns: List[Tuple[re.Pattern, PatternEntry]] = []
+
+    @staticmethod
+    def guess_language(context: FileContext) -> str:
+        family = Config.LANGUAGE_FAMILIES.get(os.path.splitext(context.path)[1].lower())
+        content = LanguageDetector._decode(context)
+        if content is None:
+            return "Binary"
+        if family:
+            return family
+        lexer_class = LanguageDetector.detect_lexer(os.path.basename(context.path), content)
+        context.lexer_class = lexer_class
+        return lexer_class.name if lexer_class else "Unknown"
+
+    @staticmethod
+    def detect_lexer(filename: str, content: str) -> Optional[type]:
+        """
+        Pick the lexer class for a file name, mirroring guess_lexer_for_filename.
+
+        Content is only consulted when several lexers claim the file name.
+        """
+        candidates = LanguageDetector._candidates(filename)
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0][0]
+
+        sample = content[:Config.LANGUAGE_SNIFF_CHARS]
+        scored = []
+        for lexer_class, primary in candidates:
+            score = lexer_class.analyse_text(sample)
+            if score == 1.0:
+                return lexer_class
+            scored.append(((score, primary, lexer_class.priority, lexer_class.__name__), lexer_class))
+        return max(scored, key=lambda item: item[0])[1]
+
+    @staticmethod
+    def _decode(context: FileContext) -> Optional[str]:
+        if context.text is not None:
+            return context.text
+        import chardet
+        try:
+            encoding = chardet.detect(context.raw[:Config.ENCODING_SAMPLE_BYTES])['encoding']
+            return context.raw.decode(encoding) if encoding else None
+        except (UnicodeDecodeError, LookupError):
+            return None
+
+    @staticmethod
+    @functools.lru_cache(maxsize=8192)
+    def _candidates(filename: str) -> Tuple[Tuple[type, bool], ...]:
+        """Lexer classes whose filename patterns match, with whether the match is a primary pattern."""
+        LanguageDetector._build_tables()
+        matches: Dict[str, Tuple[str, bool]] = {}
+
+        def add(entry: PatternEntry):
+            lexer_name, class_name, primary = entry
+            # As in pygments, a lexer matched by an alias pattern is never primary
+            matches[lexer_name] = (class_name, matches.get(lexer_name, (class_name, True))[1] and primary)
+
+        for entry in LanguageDetector._name_table.get(filename, ()):
+            add(entry)
+        dot = filename.find('.')
+        while dot != -1:
+            for entry in LanguageDetector._suffix_table.get(filename[dot:], ()):
+                add(entry)
+            dot = filename.find('.', dot + 1)
+        for pattern, entry in LanguageDetector._glob_patterns:
+            if pattern.match(filename):
+                add(entry)
+
+        candidates: Dict[type, bool] = {}
+        for lexer_name, (_, primary) in sorted(matches.items(), key=lambda item: item[1][0]):
+            lexer_class = LanguageDetector._lexer_class(lexer_name)
+            if lexer_class is not None:
+                candidates[lexer_class] = candidates.get(lexer_class, True) and primary
+        return tuple(candidates.items())
+
     @staticmethod
-    def guess_language(file_path: str) -> str:
+    @functools.lru_cache(maxsize=None)
+    def _lexer_class(lexer_name: str) -> Optional[type]:
+        from pygments.lexers import find_lexer_class
+        return find_lexer_class(lexer_name)
+
+    @staticmethod
+    def _build_tables():
+        if LanguageDetector._name_table is not None:
+            return
+        name_table: Dict[str, List[PatternEntry]] = {}
+        suffix_table: Dict[str, List[PatternEntry]] = {}
+        glob_patterns: List[Tuple[re.Pattern, PatternEntry]] = []
+        for pattern, lexer_name, class_name, primary in LanguageDetector._filename_patterns():
+            entry = (lexer_name, class_name, primary)
+            if not GLOB_CHARACTERS.search(pattern):
+                name_table.setdefault(pattern, []).append(entry)
+            elif pattern.startswith('*.') and not GLOB_CHARACTERS.search(pattern[1:]):
+                suffix_table.setdefault(pattern[1:], []).append(entry)
+            else:
+                glob_patterns.append((re.compile(fnmatch.translate(pattern)), entry))
+        LanguageDetector._suffix_table = suffix_table
+        LanguageDetector._glob_patterns = glob_patterns
+        LanguageDetector._name_table = name_table
+
+    @staticmethod
+    def _filename_patterns() -> List[Tuple[str, str, str, bool]]:
+        """
+        (pattern, lexer name, lexer class name, primary) for every filename
+        and alias filename pattern of the installed lexers, in registry order.
+
+        The list is read from the on-disk cache when the pygments version and
+        the set of lexers (plugins included) match; otherwise every lexer
+        class is imported to build it, and the result is cached.
+        """
+        # pygments is imported on first use, which keeps it (and importlib.metadata) out of CLI startup
+        import pygments
+        from pygments.lexers import LEXERS, get_all_lexers, find_lexer_class
+        from pygments.plugin import LEXER_ENTRY_POINT, iter_entry_points
+        # Plugin lexers are identified by their entry points, since loading them may import whole applications
+        plugins = [(entry_point.name, entry_point.value) for entry_point in iter_entry_points(LEXER_ENTRY_POINT)]
+        digest = hashlib.blake2b(json.dumps([pygments.__version__, sorted(LEXERS), plugins]).encode('utf-8'),
+                                 digest_size=8).hexdigest()
+        cache_dir = Config.LEXER_CACHE_DIR or os.path.join(
+            os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'llmbridge', 'lexers')
+        cache_path = os.path.join(cache_dir, f"filenames-{digest}.json")
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as file:
+                return [tuple(entry) for entry in json.load(file)]
+        except (OSError, ValueError):
+            pass
+
+        patterns = []
+        for name, _, _, _ in get_all_lexers():
+            lexer_class = find_lexer_class(name)
+            if lexer_class is None:
+                continue
+            for lexer_patterns, primary in ((lexer_class.filenames, True), (lexer_class.alias_filenames, False)):
+                for pattern in lexer_patterns:
+                    patterns.append((pattern, name, lexer_class.__name__, primary))
         try:
-            with open(file_path, 'rb') as file:
-                raw_content = file.read()
-            encoding = chardet.detect(raw_content)['encoding']
-            content = raw_content.decode(encoding)
-            lexer = guess_lexer_for_filename(file_path, content)
-            return lexer.name
-        except ClassNotFound:
-            return "Unknown"
-        except Exception:
-            return "Binary"
\ No newline at end of file
+            os.makedirs(cache_dir, exist_ok=True)
+            # Written to a temporary file first so that concurrent runs never read a partial table
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=cache_dir, delete=False) as file:
+                json.dump(patterns, file)
+            os.replace(file.name, cache_path)
+        except OSError as e:
+            logger.debug("Could not cache the lexer filename table in %s: %s", cache_dir, e)
+        return patterns
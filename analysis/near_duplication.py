@@ -0,0 +1,183 @@
+import ast
+import keyword
+import re
+import zlib
+from array import array
+from typing import Dict, List, Optional, Set, Tuple
+from .file_context import FileContext
+from config import Config
+
+TOKEN_PATTERN = re.compile(r'[A-Za-z_]\w*|\d[\w.]*|"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'|[^\s\w]')
+COMMON_KEYWORDS = frozenset(keyword.kwlist) | frozenset({
+    'function', 'var', 'let', 'const', 'new', 'this', 'self', 'public', 'private', 'protected', 'static',
+    'void', 'int', 'long', 'float', 'double', 'char', 'bool', 'boolean', 'string', 'switch', 'case',
+    'default', 'do', 'catch', 'throw', 'throws', 'extends', 'implements', 'interface', 'struct',
+    'typedef', 'template', 'typename', 'namespace', 'using', 'end', 'begin', 'then', 'unless', 'until',
+    'module', 'require', 'include', 'package', 'null', 'nil', 'true', 'false', 'undefined',
+})
+HASH_MODULUS = (1 << 61) - 1
+HASH_BASE = 1_000_003
+MASK_64 = (1 << 64) - 1
+EMPTY_BIN = MASK_64
+
+class NearDuplicateDetector:
+    """
+    MinHash signatures over normalized token shingles.
+
+    Identifiers, numbers and string literals are normalized so that renamed
+    variables do not hide a copy. Signatures use one-permutation hashing
+    (every shingle hash is routed to one of NEAR_DUPLICATE_SIGNATURE_SIZE
+    bins, each keeping its minimum) with rotation densification for empty
+    bins, which costs O(shingles) instead of O(shingles x permutations).
+    """
+
+    @staticmethod
+    def signatures(context: FileContext) -> List[Tuple[str, array]]:
+        """
+        Signatures for the whole file (labelled '') and, for Python, each function.
+
+        Function labels are "name:start-end" with 1-based inclusive line numbers.
+        """
+        text = context.text
+        if not text:
+            return []
+        result = []
+        file_signature = NearDuplicateDetector.signature(text)
+        if file_signature is not None:
+            result.append(('', file_signature))
+        if context.language == "Python":
+            lines = text.splitlines()
+            for name, start, end in NearDuplicateDetector._python_functions(context.python_tree):
+                signature = NearDuplicateDetector.signature('\n'.join(lines[start-1:end]))
+                if signature is not None:
+                    result.append((f"{name}:{start}-{end}", signature))
+        return result
+
+    @staticmethod
+    def signature(text: str) -> Optional[array]:
+        tokens = [NearDuplicateDetector._token_hash(token) for token in TOKEN_PATTERN.findall(text)]
+        if len(tokens) < Config.NEAR_DUPLICATE_MIN_TOKENS:
+            return None
+
+        size = Config.NEAR_DUPLICATE_SIGNATURE_SIZE
+        width = Config.NEAR_DUPLICATE_SHINGLE_SIZE
+        leading_weight = pow(HASH_BASE, width - 1, HASH_MODULUS)
+        bins = [EMPTY_BIN] * size
+        rolling = 0
+        for i, token_hash in enumerate(tokens):
+            if i >= width:
+                rolling -= tokens[i - width] * leading_weight
+            rolling = (rolling * HASH_BASE + token_hash) % HASH_MODULUS
+            if i + 1 < width:
+                continue
+            # Mix the shingle hash so that both the bin and the value are uniform
+            mixed = (rolling * 0x9E3779B97F4A7C15) & MASK_64
+            mixed ^= mixed >> 29
+            slot, value = mixed % size, mixed // size
+            if value < bins[slot]:
+                bins[slot] = value
+        NearDuplicateDetector._densify(bins)
+        return array('Q', bins)
+
+    @staticmethod
+    def similarity(first: array, second: array) -> float:
+        """Estimated Jaccard similarity of the shingle sets behind two signatures."""
+        return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+    @staticmethod
+    def _densify(bins: List[int]):
+        # Each empty bin borrows the value of the next non-empty bin to its right,
+        # offset by the distance so that borrowed values stay distinguishable.
+        size = len(bins)
+        if all(value == EMPTY_BIN for value in bins):
+            return
+        filled = list(bins)
+        for slot in range(size):
+            if filled[slot] != EMPTY_BIN:
+                continue
+            distance = 1
+            while bins[(slot + distance) % size] == EMPTY_BIN:
+                distance += 1
+            bins_value = bins[(slot + distance) % size]
+            filled[slot] = (bins_value + distance * 0x9E3779B9) & MASK_64
+        bins[:] = filled
+
+    @staticmethod
+    def _token_hash(token: str) -> int:
+        if token[0] in '"\'':
+            token = 'STR'
+        elif token[0].isdigit():
+            token = 'NUM'
+        elif (token[0].isalpha() or token[0] == '_') and token not in COMMON_KEYWORDS:
+            token = 'ID'
+        return zlib.crc32(token.encode())
+
+    @staticmethod
+    def _python_functions(tree: Optional[ast.AST]) -> List[Tuple[str, int, int]]:
+        if tree is None:
+            return []
+        functions = []
+        pending = [(tree, '')]
+        while pending:
+            node, prefix = pending.pop()
+            for child in ast.iter_child_nodes(node):
+                if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                    name = f"{prefix}{child.name}"
+                    if not isinstance(child, ast.ClassDef):
+                        functions.append((name, child.lineno, child.end_lineno))
+                    pending.append((child, f"{name}."))
+                else:
+                    pending.append((child, prefix))
+        return sorted(functions, key=lambda function: function[1])
+
+
+class NearDuplicateIndex:
+    """
+    Locality-sensitive hashing over MinHash signatures.
+
+    Each signature is cut into bands; items sharing any band bucket become
+    candidates, so only plausible pairs are compared instead of all pairs.
+    """
+
+    def __init__(self):
+        self._items: List[Tuple[str, str, array]] = []
+        self._buckets: Dict[Tuple[int, bytes], List[int]] = {}
+
+    def add(self, file_path: str, signatures: List[Tuple[str, array]]):
+        rows = Config.NEAR_DUPLICATE_SIGNATURE_SIZE // Config.NEAR_DUPLICATE_BANDS
+        for label, signature in signatures:
+            item_id = len(self._items)
+            self._items.append((file_path, label, signature))
+            for band in range(Config.NEAR_DUPLICATE_BANDS):
+                key = (band, signature[band * rows:(band + 1) * rows].tobytes())
+                bucket = self._buckets.setdefault(key, [])
+                # Huge buckets (boilerplate shared by many files) would make pairing quadratic
+                if len(bucket) < Config.NEAR_DUPLICATE_MAX_BUCKET:
+                    bucket.append(item_id)
+
+    def pairs(self) -> List[Tuple[float, str, str, str, str]]:
+        """
+        Near-duplicate pairs as (similarity, file, label, other file, other label).
+
+        Whole files are only paired with whole files and functions with
+        functions.
+        """
+        seen: Set[Tuple[int, int]] = set()
+        pairs = []
+        for bucket in self._buckets.values():
+            if len(bucket) < 2:
+                continue
+            for position, first_id in enumerate(bucket):
+                for second_id in bucket[position + 1:]:
+                    if (first_id, second_id) in seen:
+                        continue
+                    seen.add((first_id, second_id))
+                    first_path, first_label, first_signature = self._items[first_id]
+                    second_path, second_label, second_signature = self._items[second_id]
+                    if bool(first_label) != bool(second_label):
+                        continue
+                    similarity = NearDuplicateDetector.similarity(first_signature, second_signature)
+                    if similarity >= Config.NEAR_DUPLICATE_THRESHOLD:
+                        pairs.append((similarity, first_path, first_label, second_path, second_label))
+        pairs.sort(key=lambda pair: (-pair[0], pair[1], pair[2], pair[3], pair[4]))
+        return pairs
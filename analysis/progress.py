@@ -0,0 +1,102 @@
+import sys
+import time
+from typing import NamedTuple, Optional
+from config import Config
+
+DISCOVERING = 'discovering files'
+ANALYZING = 'analyzing files'
+SUMMARIZING = 'summarizing'
+WRITING = 'writing report'
+DONE = 'done'
+
+
+class AnalysisCancelled(Exception):
+    """Raised inside the analysis when its ProgressListener asks to stop."""
+
+
+class ProgressEvent(NamedTuple):
+    stage: str
+    files_discovered: int
+    files_processed: int  # Including files served from the cache
+    bytes_read: int  # Content of the files analyzed in this run
+    elapsed: float  # Seconds since the analysis started
+
+
+class ProgressListener:
+    """
+    Receives progress events from an analysis and can cancel it.
+
+    Both methods are called on the thread running the analysis, so a GUI
+    should hand events over to its own thread instead of touching widgets.
+    """
+
+    def on_progress(self, event: ProgressEvent):
+        pass
+
+    def is_cancelled(self) -> bool:
+        return False
+
+
+class ConsoleProgressListener(ProgressListener):
+    """Prints one progress line per stage and at most one per Config.CONSOLE_PROGRESS_INTERVAL seconds."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stderr
+        self._last_stage = None
+        self._last_print = 0.0
+
+    def on_progress(self, event: ProgressEvent):
+        now = time.monotonic()
+        if event.stage == self._last_stage and now - self._last_print < Config.CONSOLE_PROGRESS_INTERVAL:
+            return
+        self._last_stage, self._last_print = event.stage, now
+        line = f"[{event.elapsed:7.1f}s] {event.stage}"
+        if event.files_discovered:
+            line += (f": {event.files_processed}/{event.files_discovered} files, "
+                     f"{event.bytes_read / (1024 * 1024):.1f} MB read")
+        print(line, file=self.stream, flush=True)
+
+
+class ProgressTracker:
+    """
+    Counts the analyzer's progress and forwards it to an optional listener.
+
+    Events within one stage are throttled to one per Config.PROGRESS_INTERVAL
+    seconds so that reporting stays cheap on projects with many small files.
+    """
+
+    def __init__(self, listener: Optional[ProgressListener] = None):
+        self.listener = listener
+        self.stage = None
+        self.files_discovered = 0
+        self.files_processed = 0
+        self.bytes_read = 0
+        self._started = time.monotonic()
+        self._last_event = 0.0
+
+    def enter_stage(self, stage: str):
+        self.check_cancelled()
+        self.stage = stage
+        self._emit()
+
+    def discovered(self, file_count: int):
+        self.files_discovered = file_count
+        self._emit()
+
+    def file_processed(self, bytes_read: int = 0):
+        self.files_processed += 1
+        self.bytes_read += bytes_read
+        self.check_cancelled()
+        if time.monotonic() - self._last_event >= Config.PROGRESS_INTERVAL:
+            self._emit()
+
+    def check_cancelled(self):
+        if self.listener is not None and self.listener.is_cancelled():
+            raise AnalysisCancelled("Analysis cancelled")
+
+    def _emit(self):
+        if self.listener is None:
+            return
+        self._last_event = time.monotonic()
+        self.listener.on_progress(ProgressEvent(self.stage, self.files_discovered, self.files_processed,
+                                                self.bytes_read, self._last_event - self._started))
@@ -0,0 +1,171 @@
+import functools
+import io
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from .code_analyzer import CodeAnalyzer, _process_file
+from .file_record import FileRecord
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class IndexSnapshot:
+    """
+    The analyzed files at one point in time, never changed once published.
+
+    Request threads keep using the snapshot they started with while the
+    index builds the next one, so reads need no locking.
+    """
+
+    def __init__(self, generation: int, records: Tuple[FileRecord, ...], refreshed_at: float):
+        self.generation = generation
+        self.records = records  # Code files in discovery order, with chunk hashes and signatures
+        self.refreshed_at = refreshed_at
+
+
+class ProjectIndex:
+    """
+    Per-file results of a project, kept in memory and refreshed incrementally.
+
+    A refresh re-lists the project and compares each file's modification
+    time and size with those it was analyzed at; only new and changed files
+    are analyzed again. Full reports are rendered once per snapshot and
+    format and then served from memory; file sections are kept per format
+    until their file is analyzed again, so a new snapshot only renders the
+    sections of changed files. Rendering happens outside any lock, from the
+    snapshot the request started with.
+    """
+
+    def __init__(self, analyzer: CodeAnalyzer):
+        self.analyzer = analyzer
+        self.snapshot = IndexSnapshot(0, (), 0.0)
+        self.last_refresh_seconds = 0.0
+        # (mtime_ns, size) each file was analyzed at, also for non-code files and failures
+        self._stats: Dict[str, Tuple[int, int]] = {}
+        self._records: Dict[str, FileRecord] = {}
+        self._refresh_lock = threading.Lock()
+        # Guards _rendered; renders run outside it
+        self._render_lock = threading.Lock()
+        self._rendered: Dict[Tuple[int, str], bytes] = {}
+        # Per format: file path -> (stamp of the record, rendered section), see CodeAnalyzer.render_report
+        self._sections: Dict[str, Dict[str, Tuple[Tuple, str]]] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def refresh(self) -> int:
+        """Bring the index up to date and return the number of files added, changed or removed."""
+        with self._refresh_lock:
+            started = time.perf_counter()
+            file_paths = self.analyzer._discover_files()
+            changed_paths = []
+            for file_path in file_paths:
+                try:
+                    stat_result = os.stat(file_path)
+                except OSError:
+                    continue
+                if self._stats.get(file_path) != (stat_result.st_mtime_ns, stat_result.st_size):
+                    changed_paths.append(file_path)
+            listed = set(file_paths)
+            removed_paths = [file_path for file_path in self._stats if file_path not in listed]
+            if not changed_paths and not removed_paths and self.snapshot.generation > 0:
+                return 0
+
+            for file_path in removed_paths:
+                del self._stats[file_path]
+                self._records.pop(file_path, None)
+            for sections in list(self._sections.values()):
+                for file_path in changed_paths + removed_paths:
+                    sections.pop(file_path, None)
+            for file_path, stat_key, record in self._analyze(changed_paths):
+                self._stats[file_path] = stat_key
+                if record is not None and record.is_code:
+                    self._records[file_path] = record
+                else:
+                    self._records.pop(file_path, None)
+
+            records = tuple(self._records[file_path] for file_path in file_paths if file_path in self._records)
+            self.snapshot = IndexSnapshot(self.snapshot.generation + 1, records, time.time())
+            with self._render_lock:
+                self._rendered.clear()
+            self.last_refresh_seconds = time.perf_counter() - started
+            logger.info("Index generation %d: %d files re-analyzed, %d removed in %.3f s",
+                        self.snapshot.generation, len(changed_paths), len(removed_paths), self.last_refresh_seconds)
+            return len(changed_paths) + len(removed_paths)
+
+    def _analyze(self, file_paths: List[str]) -> List[Tuple[str, Tuple[int, int], Optional[FileRecord]]]:
+        task = functools.partial(_process_file, folder_path=self.analyzer.folder_path,
+                                 analyzers=self.analyzer.analyzers)
+        if self.analyzer.jobs <= 1 or len(file_paths) < 2:
+            outcomes = map(task, file_paths)
+        else:
+            # The pool is kept between refreshes so that small updates do not pay for starting workers
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.analyzer.jobs)
+            chunk_size = max(1, min(Config.PARALLEL_CHUNK_SIZE, len(file_paths) // (self.analyzer.jobs * 4)))
+            outcomes = self._executor.map(task, file_paths, chunksize=chunk_size)
+
+        results = []
+        for file_path, (record, message, _) in zip(file_paths, outcomes):
+            if message:
+                logger.warning(message)
+            if record is not None:
+                stat_key = (record.mtime_ns, record.size)
+            else:
+                # Failed files are retried once they change
+                try:
+                    stat_result = os.stat(file_path)
+                    stat_key = (stat_result.st_mtime_ns, stat_result.st_size)
+                except OSError:
+                    stat_key = (0, -1)
+            results.append((file_path, stat_key, record))
+        return results
+
+    def watch(self, stop: threading.Event, interval: Optional[float] = None):
+        """Refresh every `interval` seconds (default Config.SERVE_POLL_INTERVAL) until `stop` is set."""
+        interval = interval if interval is not None else Config.SERVE_POLL_INTERVAL
+        while not stop.wait(interval):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Refreshing the index failed")
+
+    def report(self, output_format: str = 'text', path_prefixes: Sequence[str] = ()) -> bytes:
+        """
+        The report of the current snapshot as UTF-8, optionally of only the
+        files under the given relative paths.
+
+        Full reports are cached per snapshot; subsets are rendered on demand
+        with summaries covering just their files.
+        """
+        snapshot = self.snapshot
+        if path_prefixes:
+            prefixes = [prefix.strip('/').replace('/', os.sep) for prefix in path_prefixes]
+            records = [record for record in snapshot.records
+                       if any(record.relative_path == prefix or record.relative_path.startswith(prefix + os.sep)
+                              for prefix in prefixes)]
+            return self._render(records, output_format)
+
+        key = (snapshot.generation, output_format)
+        with self._render_lock:
+            rendered = self._rendered.get(key)
+        if rendered is None:
+            # Concurrent first requests may both render; that costs less than making them queue
+            rendered = self._render(snapshot.records, output_format)
+            with self._render_lock:
+                if snapshot is self.snapshot:
+                    self._rendered[key] = rendered
+        return rendered
+
+    def _render(self, records: Sequence[FileRecord], output_format: str) -> bytes:
+        output = io.StringIO()
+        self.analyzer.render_report(output, records, output_format,
+                                    sections=self._sections.setdefault(output_format, {}))
+        return output.getvalue().encode('utf-8')
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
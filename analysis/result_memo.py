@@ -0,0 +1,62 @@
+import os
+from typing import Dict, Optional, Set, Tuple
+from .file_context import FileContext
+from .file_record import FileRecord
+from config import Config
+
+
+class ResultMemo:
+    """
+    Records of analyzed files by content, shared by the projects of a batch.
+
+    A file is only analyzed once per content and file name (the name takes
+    part in language detection). Files are only hashed when a record of the
+    same size and name exists, so unique files cost a stat, not a read.
+    """
+
+    def __init__(self):
+        self.project: Optional[str] = None
+        self.hits = 0
+        self.hit_bytes = 0
+        self._records: Dict[Tuple[str, str], FileRecord] = {}
+        self._sizes: Set[Tuple[int, str]] = set()
+        # Projects each stored content was seen in
+        self._projects: Dict[Tuple[str, str], Set[str]] = {}
+
+    def begin_project(self, project: str):
+        self.project = project
+
+    def lookup(self, file_path: str, relative_path: str) -> Optional[FileRecord]:
+        name = os.path.basename(file_path)
+        try:
+            stat_result = os.stat(file_path)
+        except OSError:
+            return None
+        if (stat_result.st_size, name) not in self._sizes:
+            return None
+        try:
+            key = (FileContext.hash_file(file_path, stat_result.st_size, stat_result.st_mtime_ns,
+                                         Config.FILE_BYTE_BUDGET), name)
+        except OSError:
+            return None
+        record = self._records.get(key)
+        if record is None:
+            return None
+        self.hits += 1
+        self.hit_bytes += record.size
+        self._projects[key].add(self.project)
+        return record._replace(path=file_path, relative_path=relative_path, mtime_ns=stat_result.st_mtime_ns)
+
+    def store(self, record: FileRecord):
+        name = os.path.basename(record.path)
+        key = (record.content_hash, name)
+        # The content is read again for the projects that share it, rather than kept for the whole batch
+        self._records.setdefault(key, record._replace(content=None))
+        self._sizes.add((record.size, name))
+        self._projects.setdefault(key, set()).add(self.project)
+
+    def shared_files(self, limit: int):
+        """(project count, relative path, size) of the contents found in the most projects, if in more than one."""
+        shared = [(len(projects), self._records[key].relative_path, self._records[key].size)
+                  for key, projects in self._projects.items() if len(projects) > 1]
+        return sorted(shared, key=lambda item: (-item[0], -item[2], item[1]))[:limit]
@@ -1,15 +1,123 @@
 import re
-from typing import List, Tuple
+from typing import Dict, List, Pattern, Sequence, Tuple
+from .file_context import FileContext
+from config import Config
+
+# Non-ASCII characters that re.IGNORECASE matches to ASCII letters in str patterns
+CASE_EQUIVALENTS = {'i': ('İ', 'ı'), 'k': ('K',), 's': ('ſ',)}
+WORD_BYTE = rb'[A-Za-z0-9_]'
+LINE_BREAK = re.compile(rb'[\r\n]')
+
 
 class TodoScanner:
+    """
+    Collects the lines carrying one of Config.TODO_TAGS as a whole word.
+
+    One precompiled bytes pattern runs over the file's raw buffer, and only
+    the lines of its matches are located and decoded. Lines are numbered
+    like FileContext.lines (\\n, \\r\\n and \\r end a line), and each
+    candidate line is confirmed with the equivalent str pattern, so results
+    are identical to matching the decoded lines one by one.
+    """
+
+    _patterns: Dict[Tuple[str, ...], Tuple[Pattern[bytes], Pattern[str]]] = {}
+
     @staticmethod
-    def scan_todos(file_path: str) -> List[Tuple[int, str]]:
+    def patterns(tags: Sequence[str] = None) -> Tuple[Pattern[bytes], Pattern[str]]:
+        """The (bytes, str) patterns for `tags` (default Config.TODO_TAGS), compiled once per tag set."""
+        key = tuple(tags if tags is not None else Config.TODO_TAGS)
+        patterns = TodoScanner._patterns.get(key)
+        if patterns is None:
+            alternatives = '|'.join(re.escape(tag) for tag in key)
+            text_pattern = re.compile(rf'\b(?:{alternatives})\b', re.IGNORECASE)
+            patterns = TodoScanner._patterns[key] = (TodoScanner._byte_pattern(key), text_pattern)
+        return patterns
+
+    @staticmethod
+    def _byte_pattern(tags: Sequence[str]) -> Pattern[bytes]:
+        """
+        A bytes pattern matching at least every occurrence of the str pattern.
+
+        Case variants are spelled out instead of using re.IGNORECASE, and the
+        pattern starts by consuming one byte of a small set before checking
+        the word boundary behind it, which lets the regex engine skip ahead
+        with a fast prefix search. Boundaries only exclude ASCII word bytes,
+        since a multi-byte character may be a word character in str.
+        """
+        first_bytes = set()
+        alternatives = []
+        for tag in tags:
+            rest = b''.join(TodoScanner._byte_class(char) for char in tag[1:])
+            if TodoScanner._is_word_char(tag[-1]):
+                rest += b'(?!' + WORD_BYTE + b')'
+            options = TodoScanner._byte_options(tag[0])
+            first_bytes.update(option[:1] for option in options)
+            single = [option for option in options if len(option) == 1]
+            lookbehind = b'(?<=[' + b''.join(re.escape(option) for option in single) + b'])'
+            alternatives.append(lookbehind + rest)
+            for option in options:
+                if len(option) > 1:
+                    alternatives.append(b'(?<=' + re.escape(option[:1]) + b')' + re.escape(option[1:]) + rest)
+        start = b'[' + b''.join(re.escape(byte) for byte in sorted(first_bytes)) + b']'
+        if all(TodoScanner._is_word_char(tag[0]) for tag in tags):
+            start += b'(?<!' + WORD_BYTE + b'.)'
+        return re.compile(start + b'(?:' + b'|'.join(alternatives) + b')', re.DOTALL)
+
+    @staticmethod
+    def _byte_options(char: str) -> List[bytes]:
+        """The UTF-8 encodings of every character that `char` matches ignoring case."""
+        variants = {char, char.lower(), char.upper()}
+        variants.update(CASE_EQUIVALENTS.get(char.lower(), ()))
+        return sorted(variant.encode('utf-8') for variant in variants)
+
+    @staticmethod
+    def _byte_class(char: str) -> bytes:
+        options = TodoScanner._byte_options(char)
+        single = b'[' + b''.join(re.escape(option) for option in options if len(option) == 1) + b']'
+        multi = [re.escape(option) for option in options if len(option) > 1]
+        return b'(?:' + b'|'.join([single] + multi) + b')' if multi else single
+
+    @staticmethod
+    def _is_word_char(char: str) -> bool:
+        return char.isalnum() or char == '_'
+
+    @staticmethod
+    def scan_todos(context: FileContext) -> List[Tuple[int, str]]:
+        """
+        (line number, stripped line) for every tagged line; lines of non-UTF-8 files are decoded leniently.
+
+        In a file truncated at the byte budget, e.g. minified code, lines
+        longer than Config.TODO_MAX_CHARS are cut and end in an ellipsis.
+        """
+        byte_pattern, text_pattern = TodoScanner.patterns()
+        raw = context.raw
+        # The last line of a truncated file may end in part of a character
+        encoding_errors = 'strict' if context.text is not None and not context.truncated else 'replace'
+        has_carriage_returns = b'\r' in raw
         todos = []
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                for i, line in enumerate(file, 1):
-                    if re.search(r'\b(TODO|FIXME)\b', line, re.IGNORECASE):
-                        todos.append((i, line.strip()))
-        except UnicodeDecodeError:
-            pass
-        return todos
\ No newline at end of file
+        line_number = 1
+        line_start = 0
+        line_end = -1
+        for match in byte_pattern.finditer(raw):
+            position = match.start()
+            if position < line_end:
+                # Further matches on a line that was already checked
+                continue
+            line_number += raw.count(b'\n', line_start, position)
+            if has_carriage_returns:
+                line_number += raw.count(b'\r', line_start, position) - raw.count(b'\r\n', line_start, position)
+                line_start = max(raw.rfind(b'\n', 0, position), raw.rfind(b'\r', 0, position)) + 1
+                line_break = LINE_BREAK.search(raw, position)
+                line_end = line_break.start() if line_break else len(raw)
+            else:
+                line_start = raw.rfind(b'\n', 0, position) + 1
+                line_end = raw.find(b'\n', position)
+                if line_end < 0:
+                    line_end = len(raw)
+            line = raw[line_start:line_end].decode('utf-8', encoding_errors)
+            if text_pattern.search(line):
+                line = line.strip()
+                if context.truncated and len(line) > Config.TODO_MAX_CHARS:
+                    line = line[:Config.TODO_MAX_CHARS] + '…'
+                todos.append((line_number, line))
+        return todos
@@ -0,0 +1,346 @@
+import io
+import tokenize
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from pygments.token import Comment, Keyword, Name, Operator, Punctuation, Text
+from .file_context import FileContext
+from .todo_scanner import TodoScanner
+from config import Config
+
+BRANCH_KEYWORDS = frozenset({
+    'if', 'elif', 'elsif', 'for', 'foreach', 'while', 'case', 'when', 'catch', 'rescue', 'except',
+    'unless', 'until',
+})
+# Tokens between two calls of the check passed to TokenMetricsAnalyzer.analyze
+CHECK_INTERVAL = 4096
+# What the scanner does with a token, by pygments token type
+COMMENT, PREPROCESSOR, TEXT, OPERATOR, KEYWORD, NAME, FUNCTION_NAME, CLASS_NAME, PUNCTUATION, OTHER = range(10)
+# Python tokens that do not make a line count as code
+PYTHON_LAYOUT_TOKENS = frozenset({tokenize.NL, tokenize.NEWLINE, tokenize.INDENT, tokenize.DEDENT,
+                                  tokenize.ENDMARKER, tokenize.ENCODING})
+BOOLEAN_OPERATOR_WORDS = frozenset({'and', 'or'})
+FUNCTION_KEYWORDS = frozenset({'function', 'def', 'func', 'fn', 'sub'})
+# Keyword-delimited languages (e.g. Ruby): these always open a block closed by "end"
+BLOCK_OPENERS = frozenset({'def', 'class', 'module', 'do', 'begin', 'case'})
+# ...and these only when they start a statement, since modifier forms ("x if y") do not
+STATEMENT_BLOCK_OPENERS = frozenset({'if', 'unless', 'while', 'until', 'for'})
+
+
+class LineMetrics(NamedTuple):
+    code_lines: int
+    comment_lines: int
+    todo_comments: int
+
+
+class TokenMetricsAnalyzer:
+    """
+    Complexity and size metrics from one streaming pass over the lexer output.
+
+    The pygments lexer chosen by LanguageDetector is reused, so a file is
+    tokenized once. Branch keywords and boolean operators are attributed to
+    the innermost enclosing function, whose extent is tracked with braces or,
+    for languages in Config.KEYWORD_BLOCK_LANGUAGES, with block keywords and
+    "end". In brace languages a function starts at a name the lexer tags as
+    a function, a name after a function keyword, a name followed by a
+    parameter list and "{" (JavaScript methods) or "=>" followed by "{"
+    (arrow functions, named after the variable or key they are assigned
+    to); arrow functions with an expression body are not tracked. Python only needs line metrics, which the standard tokenizer
+    gives a few times faster than the pygments lexer.
+    """
+
+    @staticmethod
+    def analyze(context: FileContext, track_functions: bool = True, check: Optional[Callable[[], None]] = None
+                ) -> Tuple[List[Tuple[str, int, int, int]], Optional[LineMetrics]]:
+        """
+        Return per-function (qualified name, complexity, nesting depth, line count) and file line metrics.
+
+        Functions are only extracted for non-Python languages, and only with
+        `track_functions`; Python gets precise numbers from ComplexityAnalyzer
+        instead. `check` is called every CHECK_INTERVAL tokens and may raise
+        to stop, e.g. a Watchdog's check off the main thread.
+        """
+        if context.lexer_class is None or context.text is None:
+            return [], None
+        if context.language == "Python":
+            line_metrics = TokenMetricsAnalyzer.python_line_metrics(context.text, check)
+            if line_metrics is not None:
+                return [], line_metrics
+        scanner = _TokenScanner(
+            keyword_blocks=context.language in Config.KEYWORD_BLOCK_LANGUAGES,
+            track_functions=track_functions and context.language != "Python",
+        )
+        scanner.scan(context.lexer_class().get_tokens_unprocessed(context.text), check)
+        return scanner.functions, scanner.line_metrics()
+
+    @staticmethod
+    def python_line_metrics(text: str, check: Optional[Callable[[], None]] = None) -> Optional[LineMetrics]:
+        """
+        Line metrics of Python source from the tokenize module, counted as from
+        the pygments token stream; None if the source does not tokenize.
+        """
+        todo_pattern = TodoScanner.patterns()[1]
+        # Bit 1: line has code, bit 2: line has a comment
+        line_flags = bytearray(text.count('\n') + 2)
+        todo_comments = 0
+        try:
+            for count, token in enumerate(tokenize.generate_tokens(io.StringIO(text).readline)):
+                if check is not None and not count % CHECK_INTERVAL:
+                    check()
+                if token.type in PYTHON_LAYOUT_TOKENS:
+                    continue
+                if token.type == tokenize.COMMENT:
+                    line_flags[token.start[0]] |= 2
+                    todo_comments += len(todo_pattern.findall(token.string))
+                elif token.start[0] == token.end[0]:
+                    if token.string.strip():
+                        line_flags[token.start[0]] |= 1
+                else:
+                    for offset, segment in enumerate(token.string.split('\n')):
+                        if segment.strip():
+                            line_flags[token.start[0] + offset] |= 1
+        except (tokenize.TokenError, SyntaxError):
+            return None
+        return LineMetrics(sum(1 for flags in line_flags if flags & 1),
+                           sum(1 for flags in line_flags if flags & 2), todo_comments)
+
+
+def _token_kind(token_type) -> int:
+    """The kind of a token type; pygments' subtype checks are slow, so each type is classified once."""
+    kind = _TOKEN_KINDS.get(token_type)
+    if kind is None:
+        if token_type in Comment.Preproc or token_type in Comment.PreprocFile:
+            # Lexed as comments, but #include and #define lines are code
+            kind = PREPROCESSOR
+        elif token_type in Comment:
+            kind = COMMENT
+        elif token_type in Text:
+            kind = TEXT
+        elif token_type in Keyword or token_type in Operator.Word:
+            kind = KEYWORD
+        elif token_type in Operator:
+            kind = OPERATOR
+        elif token_type in Name.Function:
+            kind = FUNCTION_NAME
+        elif token_type in Name.Class:
+            kind = CLASS_NAME
+        elif token_type in Name:
+            kind = NAME
+        elif token_type in Punctuation:
+            kind = PUNCTUATION
+        else:
+            kind = OTHER
+        _TOKEN_KINDS[token_type] = kind
+    return kind
+
+
+_TOKEN_KINDS: Dict[object, int] = {}
+
+
+class _TokenScanner:
+    def __init__(self, keyword_blocks: bool, track_functions: bool):
+        self.keyword_blocks = keyword_blocks
+        self.track_functions = track_functions
+        self.functions: List[Tuple[str, int, int, int]] = []
+        self._line = 1
+        # Bit 1: line has code, bit 2: line has a comment
+        self._line_flags = bytearray(2)
+        self._todo_comments = 0
+        self._todo_pattern = TodoScanner.patterns()[1]
+        self._depth = 0
+        # Open scopes: [qualified name, is function, body depth, start line, complexity, max depth, result slot]
+        self._scopes: List[list] = []
+        # Brace languages: a function or class name whose body has not started yet (name, is function, line)
+        self._pending_name: Optional[Tuple[str, bool, int]] = None
+        # Keyword languages: the block opened by "def"/"class"/"module" waiting for its name (depth, is function)
+        self._pending_block: Optional[Tuple[int, bool]] = None
+        self._expect_function_name = False
+        self._expect_class_name = False
+        # Brace languages, for functions whose name the lexer does not tag:
+        # the previous token's value and, if it was a name, (name, line)
+        self._previous_value = ''
+        self._previous_name: Optional[Tuple[str, int]] = None
+        # The name assigned to by "=" or ":", for function expressions and arrow functions
+        self._binding: Optional[str] = None
+        # Per open "(": (name, line) if it follows a name that may be a function's, else None
+        self._parentheses: List[Optional[Tuple[str, int]]] = []
+        # Set for the token right after such a ")" or after "=>"
+        self._after_parameters: Optional[Tuple[str, int]] = None
+        self._after_arrow = False
+        self._statement_start = True
+        self._operator_run = ''
+        self._operator_end = -1
+
+    def scan(self, tokens, check: Optional[Callable[[], None]] = None):
+        for count, (index, token_type, value) in enumerate(tokens):
+            if check is not None and not count % CHECK_INTERVAL:
+                check()
+            kind = _token_kind(token_type)
+            # Some lexers split "||" into two tokens, so adjacent operators are joined first
+            if not (kind == OPERATOR and index == self._operator_end):
+                self._flush_operators()
+            if kind == OPERATOR:
+                self._operator_run += value
+                self._operator_end = index + len(value)
+            self._token(kind, value)
+            self._advance_lines(kind, value)
+        self._flush_operators()
+        while self._scopes:
+            self._close_scope()
+
+    def line_metrics(self) -> LineMetrics:
+        code_lines = sum(1 for flags in self._line_flags if flags & 1)
+        comment_lines = sum(1 for flags in self._line_flags if flags & 2)
+        return LineMetrics(code_lines, comment_lines, self._todo_comments)
+
+    def _token(self, kind: int, value: str):
+        if kind == COMMENT:
+            self._todo_comments += len(self._todo_pattern.findall(value))
+            return
+        if kind == PREPROCESSOR:
+            return
+        if kind == TEXT or not value.strip():
+            if '\n' in value:
+                self._statement_start = True
+            return
+        statement_start = self._statement_start
+        self._statement_start = value == ';'
+        previous_value, self._previous_value = self._previous_value, value
+        previous_name, self._previous_name = self._previous_name, None
+        after_parameters, self._after_parameters = self._after_parameters, None
+        after_arrow, self._after_arrow = self._after_arrow, False
+
+        if kind == KEYWORD:
+            self._keyword(value.strip(), statement_start)
+        elif kind == NAME or kind == FUNCTION_NAME or kind == CLASS_NAME:
+            self._name(kind, value)
+            # "new Name(...) {" is an anonymous class, not a method
+            if previous_value != 'new':
+                self._previous_name = (value, self._line)
+        elif (kind == PUNCTUATION or kind == OPERATOR) and not self.keyword_blocks:
+            self._punctuation(value, previous_value, previous_name, after_parameters, after_arrow)
+        if kind != KEYWORD and value != '*':
+            # The name must follow right away ("function* gen" being the exception)
+            self._expect_function_name = self._expect_class_name = False
+
+    def _keyword(self, word: str, statement_start: bool):
+        if word in BRANCH_KEYWORDS or word in BOOLEAN_OPERATOR_WORDS:
+            self._add_branch()
+        self._expect_function_name = word in FUNCTION_KEYWORDS
+        self._expect_class_name = word == 'class'
+        if not self.keyword_blocks:
+            return
+        if word in BLOCK_OPENERS or (word in STATEMENT_BLOCK_OPENERS and statement_start):
+            self._depth += 1
+            if word in ('def', 'class', 'module'):
+                self._pending_block = (self._depth, word == 'def')
+            self._update_max_depth()
+        elif word == 'end':
+            if self._scopes and self._scopes[-1][2] == self._depth:
+                self._close_scope()
+            self._depth = max(0, self._depth - 1)
+
+    def _name(self, kind: int, value: str):
+        expect_function_name, self._expect_function_name = self._expect_function_name, False
+        expect_class_name, self._expect_class_name = self._expect_class_name, False
+        if self._pending_block is not None:
+            body_depth, is_function = self._pending_block
+            self._pending_block = None
+            self._open_scope(value, is_function, body_depth)
+        elif kind == FUNCTION_NAME or expect_function_name:
+            self._pending_name = (value, True, self._line)
+        elif kind == CLASS_NAME or expect_class_name:
+            self._pending_name = (value, False, self._line)
+
+    def _punctuation(self, value: str, previous_value: str, previous_name: Optional[Tuple[str, int]],
+                     after_parameters: Optional[Tuple[str, int]], after_arrow: bool):
+        if value == '{':
+            self._depth += 1
+            if self._pending_name is not None:
+                name, is_function, line = self._pending_name
+                self._pending_name = None
+                self._open_scope(name, is_function, self._depth, line)
+            elif after_parameters is not None:
+                name, line = after_parameters
+                self._open_scope(name, True, self._depth, line)
+            elif after_arrow:
+                self._open_scope(self._binding or '<anonymous>', True, self._depth)
+            self._binding = None
+            self._update_max_depth()
+        elif value == '}':
+            if self._scopes and self._scopes[-1][2] == self._depth:
+                self._close_scope()
+            self._depth = max(0, self._depth - 1)
+            self._binding = None
+        elif value == ';':
+            # A prototype or forward declaration: no body follows
+            self._pending_name = None
+            self._binding = None
+        elif value == ',':
+            self._binding = None
+        elif value == '(':
+            candidate = None
+            if previous_name is not None:
+                # Function expressions passed to a call are not what the binding names
+                self._binding = None
+            if self._pending_name is None:
+                if previous_name is not None:
+                    candidate = previous_name
+                elif previous_value in FUNCTION_KEYWORDS:
+                    # An anonymous function expression, named after what it is assigned to
+                    candidate = (self._binding or '<anonymous>', self._line)
+            self._parentheses.append(candidate)
+        elif value == ')':
+            if self._parentheses:
+                self._after_parameters = self._parentheses.pop()
+        elif value == '=>':
+            self._after_arrow = True
+        elif value in ('=', ':') and previous_name is not None:
+            self._binding = previous_name[0]
+
+    def _add_branch(self):
+        for scope in reversed(self._scopes):
+            if scope[1]:
+                scope[4] += 1
+                return
+
+    def _update_max_depth(self):
+        for scope in reversed(self._scopes):
+            if scope[1]:
+                scope[5] = max(scope[5], self._depth - scope[2])
+                return
+
+    def _open_scope(self, name: str, is_function: bool, body_depth: int, line: Optional[int] = None):
+        parent = self._scopes[-1][0] + '.' if self._scopes else ''
+        slot = None
+        if is_function and self.track_functions:
+            slot = len(self.functions)
+            self.functions.append(None)
+        self._scopes.append([parent + name, is_function, body_depth, line or self._line, 1, 0, slot])
+
+    def _close_scope(self):
+        name, _, _, start_line, complexity, max_depth, slot = self._scopes.pop()
+        if slot is not None:
+            self.functions[slot] = (name, complexity, max_depth, self._line - start_line + 1)
+
+    def _flush_operators(self):
+        run, self._operator_run = self._operator_run, ''
+        if run:
+            branches = run.count('&&') + run.count('||') + (1 if run == '?' else 0)
+            for _ in range(branches):
+                self._add_branch()
+
+    def _advance_lines(self, kind: int, value: str):
+        flag = 2 if kind == COMMENT else 0 if kind == TEXT else 1
+        if '\n' not in value:
+            # Lines up to the current one are already allocated
+            if flag and value.strip():
+                self._line_flags[self._line] |= flag
+            return
+        segments = value.split('\n')
+        last_line = self._line + len(segments) - 1
+        if last_line >= len(self._line_flags):
+            self._line_flags.extend(bytes(last_line - len(self._line_flags) + 1))
+        if flag:
+            for offset, segment in enumerate(segments):
+                if segment.strip():
+                    self._line_flags[self._line + offset] |= flag
+        self._line = last_line
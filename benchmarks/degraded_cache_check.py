@@ -0,0 +1,100 @@
+"""
+Regression check: results cut short by a per-file budget are never cached.
+
+A batch of two projects sharing one file over a budget is analyzed with the
+cache on, so the second project meets the file in the batch's memo; then the
+second project is analyzed again from its warm cache. Both times the file
+must be listed as degraded, once for the byte budget and once for the time
+budget. Over the byte budget, the warm run must also have read no more of
+the file than the budget, hash included.
+
+Run from the repository root:
+
+    python -m benchmarks.degraded_cache_check
+
+The exit status is 1 when a degraded result was served from the cache.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from typing import Dict, List
+
+from analysis.batch import BatchAnalyzer, BatchEntry
+from analysis.code_analyzer import CodeAnalyzer
+from config import Config
+
+SHARED_FILE = 'shared.py'
+SHARED_CONTENT = ''.join(f"def function_{number}(value):\n    if value > {number}:\n        return value\n"
+                         f"    return {number}\n\n" for number in range(400))
+# Config overrides making the shared file degraded, and the budget expected to be reported
+SCENARIOS = [
+    ({'FILE_BYTE_BUDGET': 4096}, 'size'),
+    ({'FILE_TIME_BUDGET': 1e-6}, 'time'),
+]
+
+
+def degraded_budgets(results: Dict) -> Dict[str, str]:
+    return {relative_path: budget for relative_path, _, budget, _ in results['degraded_files']}
+
+
+def check(overrides: Dict[str, object], budget: str, root: str) -> List[str]:
+    """The failures of one scenario."""
+    projects = []
+    for name in ('first', 'second'):
+        project = os.path.join(root, name)
+        os.makedirs(project)
+        with open(os.path.join(project, SHARED_FILE), 'w', encoding='utf-8') as file:
+            file.write(SHARED_CONTENT)
+        with open(os.path.join(project, f'{name}.py'), 'w', encoding='utf-8') as file:
+            file.write(f"NAME = {name!r}\n")
+        projects.append(project)
+    output_file = os.path.join(root, 'second.txt')
+
+    saved = {key: getattr(Config, key) for key in overrides}
+    try:
+        for key, value in overrides.items():
+            setattr(Config, key, value)
+        batch = BatchAnalyzer([BatchEntry(projects[0], os.path.join(root, 'first.txt')),
+                               BatchEntry(projects[1], output_file)], use_cache=True, use_git=False)
+        failures = [f"batch: {result.error}" for result in batch.run() if result.error]
+        if failures:
+            return failures
+        warm = CodeAnalyzer(projects[1], use_cache=True, use_git=False)
+        warm.analyze(output_file)
+    finally:
+        for key, value in saved.items():
+            setattr(Config, key, value)
+
+    if degraded_budgets(warm.results).get(SHARED_FILE) != budget:
+        failures.append(f"{SHARED_FILE} is not reported as degraded ({budget}) after a cached run")
+    if budget == 'size' and warm.progress.bytes_read != overrides['FILE_BYTE_BUDGET']:
+        failures.append(f"the warm run read {warm.progress.bytes_read} bytes, expected the budget of "
+                        f"{overrides['FILE_BYTE_BUDGET']}")
+    if budget == 'size':
+        with open(output_file, 'r', encoding='utf-8') as file:
+            report = file.read()
+        if SHARED_CONTENT in report:
+            failures.append(f"the content of {SHARED_FILE} is not truncated after a cached run")
+    return failures
+
+
+def main():
+    failed = False
+    for overrides, budget in SCENARIOS:
+        root = tempfile.mkdtemp(prefix='llmbridge_degraded_')
+        try:
+            failures = check(overrides, budget, root)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        print(f"{budget} budget: {'ok' if not failures else 'FAILED'}")
+        for failure in failures:
+            print(f"  {failure}")
+        failed = failed or bool(failures)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
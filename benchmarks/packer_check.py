@@ -0,0 +1,82 @@
+"""
+Regression check: a tight --max-tokens budget still leaves room for skeletons.
+
+A project of 35 Python modules of varied sizes, each far larger than its
+skeleton, is packed into a budget that holds only some of them in full, with both
+strategies. At least half of the files left out in full must be included
+as skeletons, and the plan must stay within the budget.
+
+Run from the repository root:
+
+    python -m benchmarks.packer_check
+
+The exit status is 1 when too few skeletons are planned or the budget is exceeded.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from typing import List
+
+from analysis.analyzer_registry import DEFAULT_ANALYZERS
+from analysis.code_analyzer import _process_file
+from analysis.context_packer import FULL, OMITTED, SKELETON, ContextPacker
+
+FILE_COUNT = 35
+MAX_TOKENS = 6000
+
+
+def module_source(number: int) -> str:
+    functions = []
+    # Sizes vary so that smaller modules can fill what the larger ones leave
+    for function in range(1 + number % 8):
+        body = ''.join(f"    total += value * {step} if value > {step} else {step}\n" for step in range(10))
+        functions.append(f"def function_{number}_{function}(value):\n    total = 0\n{body}    return total\n")
+    return "import os\n\n\n" + "\n\n".join(functions)
+
+
+def check(root: str, strategy: str) -> List[str]:
+    records = []
+    for number in range(FILE_COUNT):
+        path = os.path.join(root, f"module_{number}.py")
+        if not os.path.exists(path):
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(module_source(number))
+        record, message, _ = _process_file(path, root, DEFAULT_ANALYZERS, False)
+        if record is None:
+            return [message]
+        records.append(record)
+
+    plan = ContextPacker(max_tokens=MAX_TOKENS, strategy=strategy).plan(records)
+    counts = {mode: sum(1 for packed in plan.files if packed.mode == mode) for mode in (FULL, SKELETON, OMITTED)}
+    used = sum(packed.tokens for packed in plan.files if packed.mode != OMITTED)
+    summary = f"{counts[FULL]} full, {counts[SKELETON]} skeleton, {counts[OMITTED]} omitted, {used} tokens"
+    failures = []
+    if counts[SKELETON] < counts[OMITTED]:
+        failures.append(f"more files omitted than included as skeletons ({summary})")
+    if counts[FULL] == 0:
+        failures.append(f"no full files ({summary})")
+    if used > MAX_TOKENS:
+        failures.append(f"over the budget of {MAX_TOKENS} ({summary})")
+    return failures
+
+
+def main():
+    root = tempfile.mkdtemp(prefix='llmbridge_packer_')
+    failed = False
+    try:
+        for strategy in ('greedy', 'knapsack'):
+            failures = check(root, strategy)
+            print(f"{strategy}: {'ok' if not failures else 'FAILED'}")
+            for failure in failures:
+                print(f"  {failure}")
+            failed = failed or bool(failures)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Benchmark harness for the analysis pipeline.
+
+Each scenario generates a deterministic synthetic repository and is measured
+in a fresh interpreter, so peak RSS belongs to that scenario alone:
+
+- the end-to-end analysis (wall time, peak RSS and the time of each
+  analyzer stage as reported through its progress events), then
+- each analysis step in isolation over the same files: walk, read,
+  language detection, TODO scan, complexity, duplication.
+
+Run from the repository root:
+
+    python -m benchmarks.run_benchmarks                      # all scenarios
+    python -m benchmarks.run_benchmarks --scenarios small,deep --repeat 3
+    python -m benchmarks.run_benchmarks --save-baseline      # store benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --tolerance 0.15     # compare against it
+
+Every run is compared with the baseline, which is committed; each metric is
+printed with its change. The exit status is 1 when a metric regressed by
+more than the tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.synthetic_repo import RepoSpec, SyntheticRepoGenerator
+
+SCENARIOS = {
+    'small': RepoSpec(file_count=200),
+    'mixed': RepoSpec(file_count=1500),
+    'large-files': RepoSpec(file_count=40, median_lines=4000, size_sigma=0.5),
+    'duplicated': RepoSpec(file_count=600, duplication_rate=0.7),
+    'binary-heavy': RepoSpec(file_count=600, binary_rate=0.4),
+    'deep': RepoSpec(file_count=600, max_depth=40),
+    'vendored': RepoSpec(file_count=300, vendor_files=5000),
+}
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+# Timings below this many seconds are too noisy to call a regression
+MIN_COMPARED_SECONDS = 0.05
+
+
+def scaled_spec(name: str, scale: float) -> RepoSpec:
+    spec = SCENARIOS[name]
+    return spec._replace(file_count=max(1, int(spec.file_count * scale)),
+                         vendor_files=int(spec.vendor_files * scale))
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def machine() -> Dict[str, Any]:
+    """What the timings depend on besides the code, recorded with each result."""
+    return {'platform': platform.platform(), 'python': platform.python_version(), 'cpus': os.cpu_count()}
+
+
+def stage_result(seconds: float, files: int, size: int) -> Dict[str, float]:
+    return {
+        'seconds': seconds,
+        'files': files,
+        'megabytes': size / (1024 * 1024),
+        'files_per_second': files / seconds if seconds else 0.0,
+        'megabytes_per_second': size / (1024 * 1024) / seconds if seconds else 0.0,
+    }
+
+
+def timed(function: Callable[[], Any]):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def measure_scenario(spec: RepoSpec, root: str) -> Dict[str, Any]:
+    """Generate the scenario's repository under `root` and measure it."""
+    from analysis.code_analyzer import analyze_project
+    from analysis.complexity import ComplexityAnalyzer
+    from analysis.duplication import DuplicationDetector, DuplicationIndex
+    from analysis.file_context import FileContext
+    from analysis.file_record import SKIPPED_LANGUAGES
+    from analysis.language_detection import LanguageDetector
+    from analysis.progress import ProgressListener
+    from analysis.todo_scanner import TodoScanner
+    from analysis.token_metrics import TokenMetricsAnalyzer
+    from utils.gitignore import GitignoreWalker
+    from config import Config
+
+    class StageTimer(ProgressListener):
+        def __init__(self):
+            self.started: Dict[str, float] = {}
+
+        def on_progress(self, event):
+            self.started.setdefault(event.stage, event.elapsed)
+
+    project = os.path.join(root, 'project')
+    generated_files, generated_bytes = SyntheticRepoGenerator(spec).generate(project)
+
+    # End to end first, so that the peak RSS is the pipeline's and not that of the isolated steps below
+    timer = StageTimer()
+    output_file = os.path.join(root, 'report.txt')
+    file_count, wall_seconds = timed(lambda: analyze_project(project, output_file, use_git=False, progress=timer))
+    rss = peak_rss_mb()
+    stage_starts = sorted(timer.started.items(), key=lambda item: item[1])
+    pipeline = {stage: next_start - start
+                for (stage, start), (_, next_start) in zip(stage_starts, stage_starts[1:])}
+
+    stages = {}
+    paths, seconds = timed(lambda: [entry.path for entry in GitignoreWalker(project).walk()])
+    stages['walk'] = stage_result(seconds, len(paths), 0)
+
+    def read():
+        contexts = [FileContext(path, os.path.relpath(path, project)) for path in paths]
+        for context in contexts:
+            # Decoding is lazy, so touch the text to include it in this step
+            context.text
+        return contexts
+    contexts, seconds = timed(read)
+    total_bytes = sum(context.size for context in contexts)
+    stages['read'] = stage_result(seconds, len(contexts), total_bytes)
+
+    def detect():
+        for context in contexts:
+            context.language = LanguageDetector.guess_language(context)
+    _, seconds = timed(detect)
+    stages['detection'] = stage_result(seconds, len(contexts), total_bytes)
+
+    code = [context for context in contexts if context.language not in SKIPPED_LANGUAGES]
+    code_bytes = sum(context.size for context in code)
+    _, seconds = timed(lambda: [TodoScanner.scan_todos(context) for context in code])
+    stages['todo'] = stage_result(seconds, len(code), code_bytes)
+
+    def complexity():
+        for context in code:
+            if context.language in Config.SUPPORTED_LANGUAGES:
+                TokenMetricsAnalyzer.analyze(context)
+            if context.language == "Python":
+                ComplexityAnalyzer.analyze_python_complexity(context)
+    _, seconds = timed(complexity)
+    stages['complexity'] = stage_result(seconds, len(code), code_bytes)
+
+    def duplication():
+        index = DuplicationIndex()
+        for context in code:
+            index.add(context.relative_path, DuplicationDetector.hash_chunks(context.display_content))
+        return index.duplicates
+    _, seconds = timed(duplication)
+    stages['duplication'] = stage_result(seconds, len(code), code_bytes)
+
+    return {
+        'spec': {key: value for key, value in spec._asdict().items()},
+        'machine': machine(),
+        'generated_files': generated_files,
+        'generated_megabytes': generated_bytes / (1024 * 1024),
+        'code_files': file_count,
+        'wall_seconds': wall_seconds,
+        'peak_rss_mb': rss,
+        'pipeline_stages': pipeline,
+        'stages': stages,
+    }
+
+
+def run_isolated(name: str, scale: float) -> Dict[str, Any]:
+    """Measure one scenario in a fresh interpreter and return its results."""
+    repository_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    # Results go through a file because the analysis itself may print to stdout
+    handle, result_file = tempfile.mkstemp(prefix='llmbridge_benchmark_', suffix='.json')
+    os.close(handle)
+    try:
+        completed = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.run_benchmarks', '--run-scenario', name, '--scale', str(scale),
+             '--output', result_file],
+            cwd=repository_root, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f"Scenario {name} failed:\n{completed.stderr}")
+        with open(result_file, encoding='utf-8') as file:
+            return json.load(file)
+    finally:
+        os.remove(result_file)
+
+
+def best_of(runs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Keep the fastest time of each metric over repeated runs, which filters out scheduling noise."""
+    best = runs[0]
+    for run in runs[1:]:
+        best['wall_seconds'] = min(best['wall_seconds'], run['wall_seconds'])
+        if run['peak_rss_mb'] is not None:
+            best['peak_rss_mb'] = min(best['peak_rss_mb'], run['peak_rss_mb'])
+        for stage, seconds in run['pipeline_stages'].items():
+            best['pipeline_stages'][stage] = min(best['pipeline_stages'].get(stage, seconds), seconds)
+        for stage, result in run['stages'].items():
+            if result['seconds'] < best['stages'][stage]['seconds']:
+                best['stages'][stage] = result
+    return best
+
+
+def compared_metrics(result: Dict[str, Any]) -> Dict[str, float]:
+    metrics = {'wall seconds': result['wall_seconds']}
+    if result['peak_rss_mb'] is not None:
+        metrics['peak RSS MB'] = result['peak_rss_mb']
+    for stage, seconds in result['pipeline_stages'].items():
+        metrics[f"pipeline {stage} seconds"] = seconds
+    for stage, stage_result_ in result['stages'].items():
+        metrics[f"{stage} seconds"] = stage_result_['seconds']
+    return metrics
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print each metric against the baseline and return descriptions of the regressions."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"\n{name}: not in the baseline, not compared")
+            continue
+        if baseline[name]['spec'] != result['spec']:
+            print(f"\n{name}: scenario changed since the baseline, not compared")
+            continue
+        print(f"\n{name} vs baseline:")
+        if baseline[name].get('machine') != result['machine']:
+            print(f"  (baseline recorded on {baseline[name].get('machine') or 'an unknown machine'}, "
+                  f"so the timings are only indicative)")
+        if baseline[name].get('repeat', 1) != result['repeat']:
+            print(f"  (baseline is the best of {baseline[name].get('repeat', 1)} runs, this of {result['repeat']}; "
+                  f"pass the same --repeat for a fair comparison)")
+        previous = compared_metrics(baseline[name])
+        for metric, value in compared_metrics(result).items():
+            old = previous.get(metric)
+            if not old:
+                continue
+            change = value / old - 1
+            flag = ''
+            if change > tolerance and (not metric.endswith('seconds') or old >= MIN_COMPARED_SECONDS):
+                flag = '  REGRESSION'
+                regressions.append(f"{name}: {metric} {old:.3f} -> {value:.3f} ({change:+.0%})")
+            print(f"  {metric:<36} {old:>10.3f} -> {value:>10.3f} ({change:+.0%}){flag}")
+    return regressions
+
+
+def print_results(name: str, result: Dict[str, Any]):
+    rss = f"{result['peak_rss_mb']:.1f} MB" if result['peak_rss_mb'] is not None else "n/a"
+    print(f"\n{name}: {result['generated_files']} files, {result['generated_megabytes']:.1f} MB generated, "
+          f"{result['code_files']} code files")
+    print(f"  end to end: {result['wall_seconds']:.3f} s, peak RSS {rss}")
+    for stage, seconds in result['pipeline_stages'].items():
+        print(f"    {stage:<20} {seconds:8.3f} s")
+    for stage, stage_result_ in result['stages'].items():
+        print(f"  {stage:<12} {stage_result_['seconds']:8.3f} s  {stage_result_['files_per_second']:10.0f} files/s  "
+              f"{stage_result_['megabytes_per_second']:8.2f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the analysis pipeline on synthetic repositories")
+    parser.add_argument("--scenarios", default=','.join(SCENARIOS),
+                        help=f"Comma-separated scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every scenario's file counts")
+    parser.add_argument("--repeat", type=int, default=1, help="Run each scenario N times and keep the best times")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Relative slowdown (or memory growth) reported as a regression")
+    parser.add_argument("--run-scenario", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_scenario:
+        root = tempfile.mkdtemp(prefix='llmbridge_benchmark_')
+        try:
+            result = measure_scenario(scaled_spec(args.run_scenario, args.scale), root)
+            with open(args.output, 'w', encoding='utf-8') as file:
+                json.dump(result, file)
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+        return
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+
+    results = {}
+    for name in names:
+        results[name] = best_of([run_isolated(name, args.scale) for _ in range(max(1, args.repeat))])
+        results[name]['repeat'] = max(1, args.repeat)
+        print_results(name, results[name])
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding='utf-8') as file:
+                baseline = json.load(file)
+        baseline.update(results)
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(baseline, file, indent=2, sort_keys=True)
+        print(f"\nBaseline written to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"\nNo regressions over {args.tolerance:.0%} against {args.baseline}")
+    else:
+        print(f"\nNo baseline at {args.baseline}; record one with --save-baseline")
+
+
+if __name__ == "__main__":
+    main()
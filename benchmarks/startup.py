@@ -0,0 +1,119 @@
+"""
+Startup benchmark for the CLI.
+
+Every measurement runs in a fresh interpreter:
+
+- `import main`, timed with -X importtime, with the modules that take the
+  largest share of it;
+- `main.py --help`, the floor of any CLI invocation;
+- a CLI run over a tiny synthetic repository for each analyzer selection,
+  where startup dominates the total.
+
+Run from the repository root:
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --repeat 5 --import-budget-ms 120
+
+The exit status is 1 when importing main takes longer than the budget.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from benchmarks.synthetic_repo import RepoSpec, SyntheticRepoGenerator
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANALYZER_SELECTIONS = ['todo', 'metrics', 'complexity', 'dup', 'todo,metrics,complexity,dup',
+                       'todo,metrics,complexity,dup,near-dup']
+TINY_REPO = RepoSpec(file_count=20)
+
+
+def import_times() -> Tuple[float, List[Tuple[str, float]]]:
+    """Seconds to import main and (module, cumulative seconds) of its direct imports, slowest first."""
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=ROOT,
+                               capture_output=True, text=True, check=True)
+    modules = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        seconds = int(cumulative) / 1e6
+        depth = (len(name) - len(name.lstrip())) // 2
+        # Imports are listed after the modules they pull in, so main's direct imports are the
+        # depth 1 lines since the previous top-level module
+        if depth == 0 and name.strip() == 'main':
+            return seconds, sorted(modules, key=lambda item: -item[1])
+        if depth == 0:
+            modules = []
+        elif depth == 1:
+            modules.append((name.strip(), seconds))
+    raise RuntimeError("main missing from the -X importtime output")
+
+
+def wall_time(arguments: List[str]) -> float:
+    started = time.perf_counter()
+    subprocess.run([sys.executable, 'main.py'] + arguments, cwd=ROOT, stdout=subprocess.DEVNULL,
+                   stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - started
+
+
+def measure(repeat: int) -> Dict[str, object]:
+    root = tempfile.mkdtemp(prefix='llmbridge_startup_')
+    try:
+        project = os.path.join(root, 'project')
+        SyntheticRepoGenerator(TINY_REPO).generate(project)
+        output_file = os.path.join(root, 'report.txt')
+
+        def cli_run(analyzers: str) -> float:
+            return wall_time(['--cli', '--project_path', project, '--output_file', output_file, '--no-git',
+                              '--no-progress', '--analyzers', analyzers])
+
+        # The first run fills the lexer table cache; startup is measured warm
+        cli_run(ANALYZER_SELECTIONS[0])
+        imports = [import_times() for _ in range(repeat)]
+        import_seconds, modules = min(imports, key=lambda item: item[0])
+        return {
+            'import_main_seconds': import_seconds,
+            'slowest_imports': modules[:10],
+            'help_seconds': min(wall_time(['--help']) for _ in range(repeat)),
+            'cli_seconds': {analyzers: min(cli_run(analyzers) for _ in range(repeat))
+                            for analyzers in ANALYZER_SELECTIONS},
+        }
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CLI's startup time")
+    parser.add_argument("--repeat", type=int, default=3, help="Run each measurement N times and keep the best")
+    parser.add_argument("--output", help="Also write the results as JSON to this file")
+    parser.add_argument("--import-budget-ms", type=float, default=None,
+                        help="Exit with 1 when importing main takes longer than this")
+    args = parser.parse_args()
+
+    results = measure(max(1, args.repeat))
+    print(f"import main          {results['import_main_seconds'] * 1000:8.1f} ms")
+    for name, seconds in results['slowest_imports']:
+        print(f"  {name:<30} {seconds * 1000:8.1f} ms")
+    print(f"main.py --help       {results['help_seconds'] * 1000:8.1f} ms")
+    print(f"CLI run on {TINY_REPO.file_count} files:")
+    for analyzers, seconds in results['cli_seconds'].items():
+        print(f"  --analyzers {analyzers:<40} {seconds * 1000:8.1f} ms")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    if args.import_budget_ms is not None and results['import_main_seconds'] * 1000 > args.import_budget_ms:
+        print(f"\nImporting main exceeds the budget of {args.import_budget_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
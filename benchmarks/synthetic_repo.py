@@ -0,0 +1,184 @@
+"""
+Deterministic synthetic repositories for benchmarking.
+
+The same RepoSpec (including its seed) always produces byte-identical
+trees, so timings from different commits are comparable.
+"""
+
+import math
+import os
+import random
+from typing import Dict, List, NamedTuple, Tuple
+
+
+class RepoSpec(NamedTuple):
+    file_count: int = 500
+    # File sizes in lines follow a log-normal distribution with this median and spread
+    median_lines: int = 120
+    size_sigma: float = 1.0
+    max_lines: int = 20000
+    language_mix: Dict[str, float] = {
+        'Python': 0.45, 'JavaScript': 0.2, 'Java': 0.1, 'C++': 0.1, 'Ruby': 0.05, 'Text': 0.1,
+    }
+    duplication_rate: float = 0.1  # Share of files that contain a block copied from an earlier file
+    binary_rate: float = 0.05  # Share of files with random binary content
+    max_depth: int = 4  # Deepest directory nesting of project files
+    vendor_files: int = 0  # Files in a vendor/ tree that .gitignore excludes
+    todo_rate: float = 0.05  # Chance of a TODO/FIXME comment per generated function
+    seed: int = 1
+
+
+EXTENSIONS = {
+    'Python': '.py', 'JavaScript': '.js', 'Java': '.java', 'C++': '.cpp', 'Ruby': '.rb', 'Text': '.md',
+}
+WORDS = ('alpha', 'beta', 'gamma', 'delta', 'value', 'count', 'item', 'node', 'buffer', 'index', 'result',
+         'config', 'state', 'total', 'offset', 'record', 'entry', 'cache', 'token', 'limit')
+
+
+class SyntheticRepoGenerator:
+    """Writes a project tree described by a RepoSpec."""
+
+    def __init__(self, spec: RepoSpec):
+        self.spec = spec
+        self.random = random.Random(spec.seed)
+        # Functions of the generated files per language, for copying into later files
+        self._written: Dict[str, List[List[List[str]]]] = {}
+
+    def generate(self, root: str) -> Tuple[int, int]:
+        """Create the tree under `root` and return (files written, bytes written)."""
+        os.makedirs(root, exist_ok=True)
+        languages = list(self.spec.language_mix)
+        weights = [self.spec.language_mix[language] for language in languages]
+        file_count = total_bytes = 0
+        with open(os.path.join(root, '.gitignore'), 'w', encoding='utf-8') as gitignore:
+            gitignore.write("vendor/\n*.log\nbuild/\n")
+
+        for number in range(self.spec.file_count):
+            directory = self._directory(root)
+            if self.random.random() < self.spec.binary_rate:
+                path = os.path.join(directory, f"asset_{number}.bin")
+                data = self.random.randbytes(self.random.randint(256, 65536))
+            else:
+                language = self.random.choices(languages, weights)[0]
+                path = os.path.join(directory, f"{self._word()}_{number}{EXTENSIONS[language]}")
+                data = '\n'.join(self._source_lines(language)).encode('utf-8') + b'\n'
+            total_bytes += self._write(path, data)
+            file_count += 1
+
+        for number in range(self.spec.vendor_files):
+            directory = os.path.join(root, 'vendor', f"package_{number // 50}", 'lib')
+            data = '\n'.join(self._source_lines('JavaScript')).encode('utf-8') + b'\n'
+            total_bytes += self._write(os.path.join(directory, f"module_{number}.js"), data)
+            file_count += 1
+        return file_count, total_bytes
+
+    def _directory(self, root: str) -> str:
+        depth = self.random.randint(0, self.spec.max_depth)
+        parts = [f"{self._word()}{self.random.randint(0, 3)}" for _ in range(depth)]
+        return os.path.join(root, *parts)
+
+    @staticmethod
+    def _write(path: str, data: bytes) -> int:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(data)
+        return len(data)
+
+    def _word(self) -> str:
+        return self.random.choice(WORDS)
+
+    def _line_count(self) -> int:
+        lines = int(self.spec.median_lines * math.exp(self.random.gauss(0, self.spec.size_sigma)))
+        return max(5, min(self.spec.max_lines, lines))
+
+    def _source_lines(self, language: str) -> List[str]:
+        target = self._line_count()
+        lines: List[str] = []
+        if language == 'Text':
+            while len(lines) < target:
+                lines.append(' '.join(self._word() for _ in range(self.random.randint(4, 14))))
+                if self.random.random() < 0.2:
+                    lines.append('')
+            return lines[:target]
+
+        previous = self._written.get(language)
+        copy_block = previous and self.random.random() < self.spec.duplication_rate
+        functions: List[List[str]] = []
+        while len(lines) < target:
+            if copy_block and len(lines) >= target // 3:
+                # Whole functions are copied so that the result still parses
+                source = self.random.choice(previous)
+                start = self.random.randrange(len(source))
+                for function in source[start:start + self.random.randint(1, 3)]:
+                    lines.extend(function)
+                copy_block = False
+            function = self._function(language, len(lines))
+            functions.append(function)
+            lines.extend(function)
+        self._written.setdefault(language, []).append(functions)
+        if language == 'Java':
+            lines = [f"public class {self._word().capitalize()}{len(self._written['Java'])} {{"] + lines + ["}"]
+        return lines
+
+    def _function(self, language: str, position: int) -> List[str]:
+        name = f"{self._word()}_{self._word()}_{position}"
+        variable, other = self._word(), self._word()
+        body = []
+        for _ in range(self.random.randint(1, 6)):
+            kind = self.random.random()
+            if kind < 0.4:
+                body.append(('if', f"{variable} > {self.random.randint(0, 99)}", f"{other} = {variable} * 2"))
+            elif kind < 0.7:
+                body.append(('for', variable, f"{other} += {variable}"))
+            else:
+                body.append(('stmt', f"{other} = {variable} + {self.random.randint(1, 9)}", None))
+        todo = self.random.random() < self.spec.todo_rate
+        return self._render(language, name, variable, other, body, todo)
+
+    def _render(self, language, name, variable, other, body, todo) -> List[str]:
+        tag = self.random.choice(('TODO', 'FIXME'))
+        if language == 'Python':
+            lines = [f"def {name}({variable}, {other}=0):"]
+            if todo:
+                lines.append(f"    # {tag}: handle {self._word()} {self._word()}")
+            for kind, head, statement in body:
+                if kind == 'if':
+                    lines += [f"    if {head}:", f"        {statement}"]
+                elif kind == 'for':
+                    lines += [f"    for {head} in range({other}):", f"        {statement}"]
+                else:
+                    lines.append(f"    {head}")
+            return lines + [f"    return {other}", ""]
+        if language == 'Ruby':
+            lines = [f"def {name}({variable}, {other} = 0)"]
+            if todo:
+                lines.append(f"  # {tag}: handle {self._word()} {self._word()}")
+            for kind, head, statement in body:
+                if kind == 'if':
+                    lines += [f"  if {head}", f"    {statement}", "  end"]
+                elif kind == 'for':
+                    lines += [f"  {other}.times do |{head}|", f"    {statement}", "  end"]
+                else:
+                    lines.append(f"  {head}")
+            return lines + [f"  {other}", "end", ""]
+
+        # Brace languages share a body; only the signature differs
+        signatures = {
+            'JavaScript': f"function {name}({variable}, {other}) {{",
+            'Java': f"    public static int {name}(int {variable}, int {other}) {{",
+            'C++': f"int {name}(int {variable}, int {other}) {{",
+        }
+        indent = '        ' if language == 'Java' else '    '
+        lines = [signatures[language]]
+        if todo:
+            lines.append(f"{indent}// {tag}: handle {self._word()} {self._word()}")
+        for kind, head, statement in body:
+            if kind == 'if':
+                lines += [f"{indent}if ({head}) {{", f"{indent}    {statement};", f"{indent}}}"]
+            elif kind == 'for':
+                lines += [f"{indent}for (int {head} = 0; {head} < {other}; {head}++) {{",
+                          f"{indent}    {statement};", f"{indent}}}"]
+            else:
+                lines.append(f"{indent}{head};")
+        closing = '    }' if language == 'Java' else '}'
+        return lines + [f"{indent}return {other};", closing, ""]
@@ -0,0 +1,95 @@
+"""
+Regression check: functions and line metrics found by the token scanner.
+
+Small sources with known answers go through language detection and
+TokenMetricsAnalyzer as in a run: JavaScript function declarations, class
+methods, function expressions and arrow functions (an arrow function with
+an expression body is not tracked), and C++ preprocessor lines, which count
+as code.
+
+Run from the repository root:
+
+    python -m benchmarks.token_metrics_check
+
+The exit status is 1 when a result differs from the expected one.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from typing import List, Tuple
+
+from analysis.file_context import FileContext
+from analysis.language_detection import LanguageDetector
+from analysis.token_metrics import LineMetrics, TokenMetricsAnalyzer
+
+JAVASCRIPT = """\
+function plain(a) {
+  if (a && a.ready) { return 1; }
+  return 0;
+}
+class Widget {
+  render(props) {
+    if (props) { return props.items.map((item) => { if (item) { return item; } }); }
+  }
+}
+const handler = (event) => {
+  while (event) { event = event.parent; }
+};
+const square = x => x * x;
+const legacy = function (value) { return value ? 1 : 2; };
+"""
+CPP = """\
+#include <vector>
+#define TWICE(a) ((a) * 2)
+// Doubles positive values
+int twice(int a) {
+  if (a > 0) return TWICE(a);
+  return a;
+}
+"""
+# (file name, source, expected (name, complexity, nesting depth, line count), expected line metrics)
+CASES: List[Tuple[str, str, List[Tuple[str, int, int, int]], LineMetrics]] = [
+    ('widget.js', JAVASCRIPT, [
+        ('plain', 3, 1, 4),
+        ('Widget.render', 2, 1, 3),
+        ('Widget.render.<anonymous>', 2, 1, 1),
+        ('handler', 2, 1, 3),
+        ('legacy', 2, 0, 1),
+    ], LineMetrics(14, 0, 0)),
+    ('twice.cpp', CPP, [('twice', 2, 0, 4)], LineMetrics(6, 1, 0)),
+]
+
+
+def check(root: str) -> List[str]:
+    failures = []
+    for name, source, functions, line_metrics in CASES:
+        path = os.path.join(root, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(source)
+        context = FileContext(path, name)
+        context.language = LanguageDetector.guess_language(context)
+        found_functions, found_metrics = TokenMetricsAnalyzer.analyze(context)
+        if found_functions != functions:
+            failures.append(f"{name}: functions {found_functions}, expected {functions}")
+        if found_metrics != line_metrics:
+            failures.append(f"{name}: line metrics {tuple(found_metrics or ())}, expected {tuple(line_metrics)}")
+    return failures
+
+
+def main():
+    root = tempfile.mkdtemp(prefix='llmbridge_tokens_')
+    try:
+        failures = check(root)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    print('token metrics: ' + ('ok' if not failures else 'FAILED'))
+    for failure in failures:
+        print(f"  {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,58 @@
 class Config:
     LARGE_FILE_THRESHOLD = 100000  # 100KB
-    DUPLICATION_CHUNK_SIZE = 6
+    DUPLICATION_CHUNK_SIZE = 6  # Minimum number of matching lines for a duplicated region
+    DUPLICATION_MAX_POSTINGS = 16  # Occurrences remembered per window hash
+    DUPLICATION_PREVIEW_LINES = 20  # Lines of each duplicated region shown in the report
     TOP_COMPLEX_FUNCTIONS = 10
-    SUPPORTED_LANGUAGES = ['Python', 'JavaScript', 'Java', 'C++', 'Ruby']  # Add more as needed
\ No newline at end of file
+    TODO_TAGS = ['TODO', 'FIXME']  # Comment tags collected as whole words, ignoring case; e.g. add 'HACK', 'XXX', 'NOTE'
+    TODO_MAX_CHARS = 300  # TODO lines of files over the byte budget, e.g. minified code, are cut to this length
+    SUPPORTED_LANGUAGES = ['Python', 'JavaScript', 'Java', 'C++', 'Ruby']  # Add more as needed
+    PARALLEL_CHUNK_SIZE = 64  # Upper bound on files sent to a worker process per batch
+    ENCODING_SAMPLE_BYTES = 65536  # chardet only sees this much of a file that is not valid UTF-8
+    LANGUAGE_SNIFF_CHARS = 16384  # Prefix used when several lexers claim the same file name
+    FILE_BYTE_BUDGET = 1024 * 1024  # Larger files are read only this far, get only the cheap analyzers and a truncated section; None disables
+    FILE_TIME_BUDGET = 10.0  # Seconds of analysis per file before the remaining analyzers are skipped; None disables
+    LEX_BYTE_BUDGET = 256 * 1024  # Larger files are not lexed, so they get no token metrics or non-Python complexity; None disables
+    DEGRADED_CONTENT_CHARS = 20000  # Beginning of a file over the byte budget shown in the report
+    KEPT_CONTENT_CHARS = 64 * 1024 * 1024  # Content held for a report written after the analysis; files past it are read again
+    # Extensions reported as one language family instead of the pygments lexer name
+    LANGUAGE_FAMILIES = {
+        '.txt': 'Text',
+        '.text': 'Text',
+        '.md': 'Text',
+        '.markdown': 'Text',
+        '.rst': 'Text',
+    }
+    CACHE_FILE_SUFFIX = '.cache.sqlite'  # Appended to the report name for the incremental analysis cache
+    NEAR_DUPLICATE_THRESHOLD = 0.8  # Minimum estimated Jaccard similarity for near-duplicate pairs
+    NEAR_DUPLICATE_SIGNATURE_SIZE = 64  # MinHash signature length
+    NEAR_DUPLICATE_BANDS = 16  # LSH bands; SIGNATURE_SIZE / BANDS rows per band
+    NEAR_DUPLICATE_SHINGLE_SIZE = 5  # Tokens per shingle
+    NEAR_DUPLICATE_MIN_TOKENS = 50  # Smaller files and functions are not fingerprinted
+    NEAR_DUPLICATE_MAX_BUCKET = 64  # Items kept per LSH bucket
+    NEAR_DUPLICATE_REPORT_LIMIT = 20  # Pairs listed in the report
+    IDENTICAL_FILE_MIN_BYTES = 1  # Smaller files, such as empty __init__.py files, are never reported as copies
+    IDENTICAL_FILES_REPORT_LIMIT = 20  # Groups of identical files listed in the report
+    KEYWORD_BLOCK_LANGUAGES = ['Ruby']  # Languages whose blocks end with "end" rather than braces
+    PACKER_STRATEGY = 'greedy'  # How --max-tokens picks full files: 'greedy' by priority or 'knapsack'
+    PACKER_TOKENS_PER_WORD = 1.3  # Estimated tokens per word; each symbol counts as one token
+    PACKER_SECTION_OVERHEAD_TOKENS = 20  # Tokens for the header lines of a file section
+    PACKER_KNAPSACK_BUCKETS = 1024  # Token budget resolution of the knapsack strategy
+    PACKER_SKELETON_SHARE = 0.25  # Share of the --max-tokens budget held back for skeletons of files not included in full
+    # Relative weight of each file feature in the packer's priority
+    PACKER_WEIGHTS = {
+        'complexity': 3,
+        'todo_density': 2,
+        'recency': 1,
+        'small_size': 1,
+    }
+    MIRROR_CACHE_DIR = None  # Where mirrors of remote repositories are kept; None uses ~/.cache/llmbridge/mirrors
+    LEXER_CACHE_DIR = None  # Where the pygments filename patterns are cached; None uses ~/.cache/llmbridge/lexers
+    ALLOW_FILE_URLS = False  # Accept file:// repository URLs like GitHub URLs, e.g. local bare repos in tests
+    PROGRESS_INTERVAL = 0.1  # Minimum seconds between progress events within one stage
+    CONSOLE_PROGRESS_INTERVAL = 1.0  # Minimum seconds between progress lines printed by the CLI
+    PROFILE_SLOWEST_FILES = 20  # Files listed with their per-stage timings in a --profile report
+    SERVE_HOST = '127.0.0.1'  # Interface the --serve HTTP API listens on
+    SERVE_PORT = 8765  # Port of the --serve HTTP API
+    SERVE_POLL_INTERVAL = 1.0  # Seconds between checks of the project for changed files in --serve mode
+    BATCH_SHARED_FILES_LIMIT = 20  # Files found identical in several projects listed in a --batch summary
@@ -6,12 +6,41 @@ It provides a window for users to input project locations (local or GitHub),
 select output locations, and initiate the code analysis process.
 """
 
+import queue
+import threading
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, ttk
+from analysis.progress import AnalysisCancelled, ProgressEvent, ProgressListener, ANALYZING
 from utils.file_operations import FileUtils
 from utils.github_utils import GitHubUtils
 from config import Config
 
+# Milliseconds between checks of the worker thread's message queue
+PROGRESS_POLL_MS = 100
+
+
+class QueueProgressListener(ProgressListener):
+    """
+    Hands progress events from the analysis thread to the GUI thread.
+
+    Tkinter widgets may only be used from the thread running the main loop,
+    so events are queued and picked up by Application.poll_progress.
+    """
+
+    def __init__(self, messages: queue.Queue):
+        self.messages = messages
+        self.cancelled = threading.Event()
+
+    def on_progress(self, event: ProgressEvent):
+        self.messages.put(('progress', event))
+
+    def is_cancelled(self) -> bool:
+        return self.cancelled.is_set()
+
+    def cancel(self):
+        self.cancelled.set()
+
+
 class Application(tk.Frame):
     """
     Main application window for LLMBridge.
@@ -30,7 +59,8 @@ class Application(tk.Frame):
         super().__init__(master)
         self.master = master
         self.master.title("LLMBridge: Comprehensive Code Analyzer")
-        self.master.geometry("600x350")
+        self.master.geometry("600x560")
+        self.listener = None
         self.pack(fill=tk.BOTH, expand=True)
         self.create_widgets()
 
@@ -38,7 +68,9 @@ class Application(tk.Frame):
         """Create and arrange all GUI elements in the application window."""
         self.create_project_input_widgets()
         self.create_output_selection_widgets()
+        self.create_jobs_widgets()
         self.create_analysis_button()
+        self.create_progress_widgets()
 
     def create_project_input_widgets(self):
         """Create widgets for project input (local folder or GitHub URL)."""
@@ -62,11 +94,49 @@ class Application(tk.Frame):
         self.browse_output_button = tk.Button(self, text="Browse", command=self.browse_output_location)
         self.browse_output_button.pack(pady=(5,0))
 
+    def create_jobs_widgets(self):
+        """Create widgets for choosing worker processes and result caching."""
+        self.jobs_label = tk.Label(self, text="Worker Processes (0 = all CPU cores):")
+        self.jobs_label.pack(pady=(20,0))
+
+        self.jobs_spinbox = tk.Spinbox(self, from_=0, to=256, width=5)
+        self.jobs_spinbox.delete(0, tk.END)
+        self.jobs_spinbox.insert(0, "1")
+        self.jobs_spinbox.pack()
+
+        self.use_cache_var = tk.BooleanVar(value=False)
+        self.use_cache_checkbutton = tk.Checkbutton(self, text="Reuse cached results for unchanged files",
+                                                    variable=self.use_cache_var)
+        self.use_cache_checkbutton.pack(pady=(5,0))
+
+    def get_jobs(self):
+        """
+        Read the number of worker processes from the jobs spinbox.
+
+        Returns:
+            int: The requested number of workers, or 1 if the input is invalid.
+        """
+        try:
+            return max(0, int(self.jobs_spinbox.get()))
+        except ValueError:
+            return 1
+
     def create_analysis_button(self):
         """Create the button to initiate the analysis process."""
         self.analyze_button = tk.Button(self, text="Analyze Project", command=self.analyze_project)
         self.analyze_button.pack(pady=(20,0))
 
+    def create_progress_widgets(self):
+        """Create the progress bar, the status line and the Cancel button."""
+        self.progress_bar = ttk.Progressbar(self, length=400, mode='determinate')
+        self.progress_bar.pack(pady=(20,0))
+
+        self.status_label = tk.Label(self, text="")
+        self.status_label.pack(pady=(5,0))
+
+        self.cancel_button = tk.Button(self, text="Cancel", command=self.cancel_analysis, state=tk.DISABLED)
+        self.cancel_button.pack(pady=(5,0))
+
     def browse_local_folder(self):
         """
         Open a file dialog for selecting a local project folder.
@@ -108,10 +178,10 @@ class Application(tk.Frame):
 
     def analyze_project(self):
         """
-        Initiate the project analysis process.
+        Validate the input and start the analysis on a background thread.
 
-        This method validates input, handles GitHub repositories if necessary,
-        and runs the analysis. It displays success or error messages to the user.
+        The window stays responsive while the worker runs; its progress and
+        outcome are picked up by poll_progress.
         """
         project_path = self.project_input_entry.get()
         output_file = self.output_entry.get()
@@ -124,19 +194,114 @@ class Application(tk.Frame):
             messagebox.showerror("Error", "Please specify an output file.")
             return
 
-        try:
-            # Check if the input is a GitHub URL and clone the repository if necessary
-            if GitHubUtils.is_github_url(project_path):
-                project_path = GitHubUtils.clone_repository(project_path)
-                self.update_default_output_path(project_path)
-                output_file = self.output_entry.get()
+        # Widgets are read here because the worker thread must not touch them
+        options = {'jobs': self.get_jobs(), 'use_cache': self.use_cache_var.get()}
+        self.listener = QueueProgressListener(queue.Queue())
+        self.analyze_button.config(state=tk.DISABLED)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.progress_bar.config(mode='indeterminate', value=0)
+        self.progress_bar.start()
+        self.status_label.config(text="Starting analysis...")
+        worker = threading.Thread(target=self.run_analysis, args=(self.listener, project_path, output_file, options),
+                                  daemon=True)
+        worker.start()
+        self.after(PROGRESS_POLL_MS, self.poll_progress)
+
+    def run_analysis(self, listener, project_path, output_file, options):
+        """
+        Run the analysis on the worker thread and queue its outcome.
 
+        Args:
+            listener (QueueProgressListener): Receives progress and carries the cancellation flag.
+            project_path (str): Local folder or GitHub URL.
+            output_file (str): Where the report is written.
+            options (dict): Keyword arguments for analyze_project.
+        """
+        try:
             # Import analysis module here to avoid circular imports
             from analysis.code_analyzer import analyze_project
-            file_count = analyze_project(project_path, output_file)
-            
-            messagebox.showinfo("Success", 
-                                f"Analysis complete. {file_count} code files processed.\n"
-                                f"Output written to {output_file}")
+
+            # GitHub repositories are analyzed in a temporary checkout of their cached mirror
+            if GitHubUtils.is_github_url(project_path):
+                listener.messages.put(('stage', "Fetching repository..."))
+                with GitHubUtils.checkout(project_path) as checkout_path:
+                    file_count = analyze_project(checkout_path, output_file, progress=listener, **options)
+            else:
+                file_count = analyze_project(project_path, output_file, progress=listener, **options)
+            listener.messages.put(('done', f"Analysis complete. {file_count} code files processed.\n"
+                                           f"Output written to {output_file}"))
+        except AnalysisCancelled:
+            listener.messages.put(('cancelled', None))
         except Exception as e:
-            messagebox.showerror("Error", f"An error occurred: {str(e)}")
\ No newline at end of file
+            listener.messages.put(('error', f"An error occurred: {str(e)}"))
+
+    def cancel_analysis(self):
+        """Ask the running analysis to stop at the next file."""
+        if self.listener is not None:
+            self.listener.cancel()
+            self.cancel_button.config(state=tk.DISABLED)
+            self.status_label.config(text="Cancelling...")
+
+    def poll_progress(self):
+        """Apply the worker's queued messages to the widgets and reschedule until it finishes."""
+        listener = self.listener
+        while True:
+            try:
+                kind, payload = listener.messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                self.show_progress(payload)
+            elif kind == 'stage':
+                self.status_label.config(text=payload)
+            else:
+                self.finish_analysis(kind, payload)
+                return
+        self.after(PROGRESS_POLL_MS, self.poll_progress)
+
+    def show_progress(self, event):
+        """
+        Update the progress bar and status line with throughput and estimated time left.
+
+        Args:
+            event (ProgressEvent): The latest progress of the analysis.
+        """
+        if event.files_discovered:
+            if str(self.progress_bar.cget('mode')) != 'determinate':
+                self.progress_bar.stop()
+                self.progress_bar.config(mode='determinate')
+            self.progress_bar.config(maximum=event.files_discovered, value=event.files_processed)
+        status = f"{event.stage.capitalize()}: {event.files_processed}/{event.files_discovered} files"
+        if event.elapsed > 0 and event.files_processed:
+            files_per_second = event.files_processed / event.elapsed
+            status += (f" | {files_per_second:.1f} files/s, "
+                       f"{event.bytes_read / (1024 * 1024) / event.elapsed:.2f} MB/s")
+            if event.stage == ANALYZING:
+                remaining = int((event.files_discovered - event.files_processed) / files_per_second)
+                status += f" | ETA {remaining // 60}:{remaining % 60:02d}"
+        if not self.listener.is_cancelled():
+            self.status_label.config(text=status)
+
+    def finish_analysis(self, outcome, message):
+        """
+        Restore the controls and report how the analysis ended.
+
+        Args:
+            outcome (str): 'done', 'cancelled' or 'error'.
+            message (str): Text shown to the user, if any.
+        """
+        self.progress_bar.stop()
+        self.progress_bar.config(mode='determinate')
+        self.analyze_button.config(state=tk.NORMAL)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.listener = None
+        if outcome == 'done':
+            self.progress_bar.config(value=self.progress_bar.cget('maximum'))
+            self.status_label.config(text="Analysis complete.")
+            messagebox.showinfo("Success", message)
+        elif outcome == 'cancelled':
+            self.progress_bar.config(value=0)
+            self.status_label.config(text="Analysis cancelled.")
+        else:
+            self.status_label.config(text="Analysis failed.")
+            messagebox.showerror("Error", message)
@@ -1,19 +1,77 @@
 import argparse
+import logging
 import sys
+from analysis.analyzer_registry import ANALYZERS, AnalyzerRegistry
 from analysis.code_analyzer import analyze_project
-from gui.application import Application
-import tkinter as tk
+from analysis.context_packer import ContextPacker
+from analysis.progress import ConsoleProgressListener
+from utils.github_utils import GitHubUtils
+
+# The batch, server and GUI modules (and tkinter) are imported by their run_* functions, so that a CLI run
+# does not pay for them at startup
 
 def run_cli(args):
     try:
-        file_count = analyze_project(args.project_path, args.output_file)
+        if GitHubUtils.is_github_url(args.project_path):
+            # Remote repositories are analyzed in a temporary checkout of their cached mirror
+            with GitHubUtils.checkout(args.project_path, ref=args.ref, sparse_paths=args.sparse) as checkout_path:
+                file_count = analyze_cli_project(checkout_path, args)
+        else:
+            file_count = analyze_cli_project(args.project_path, args)
         print(f"Analysis complete. {file_count} code files processed.")
-        print(f"Output written to {args.output_file}")
+        if args.shard_tokens:
+            print(f"Output written to {ContextPacker.shard_path(args.output_file, 1)} and following shards")
+        else:
+            print(f"Output written to {args.output_file}")
+    except Exception as e:
+        print(f"An error occurred: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+def analyze_cli_project(project_path, args):
+    return analyze_project(project_path, args.output_file, jobs=args.jobs, stream=args.stream,
+                           use_cache=args.cache, near_duplicates=args.near_duplicates,
+                           top=args.top, max_tokens=args.max_tokens, shard_tokens=args.shard_tokens,
+                           use_git=not args.no_git, since=args.since,
+                           progress=None if args.no_progress else ConsoleProgressListener(),
+                           profile=args.profile, output_format=args.format, analyzers=args.analyzers)
+
+def run_batch(args):
+    from analysis.batch import BatchAnalyzer
+    try:
+        entries = BatchAnalyzer.load_manifest(args.batch)
+        batch = BatchAnalyzer(entries, jobs=args.jobs, output_format=args.format, use_cache=args.cache,
+                              near_duplicates=args.near_duplicates, top=args.top, use_git=not args.no_git,
+                              analyzers=args.analyzers)
+
+        def report(result):
+            if result.error is None:
+                print(f"{result.entry.project_path}: {result.file_count} code files processed "
+                      f"in {result.seconds:.2f} s, output written to {result.entry.output_file}")
+            else:
+                print(f"{result.entry.project_path}: failed: {result.error}", file=sys.stderr)
+
+        results = batch.run(on_result=report)
+        batch.write_summary(args.output_file, results)
+        print(f"Batch summary written to {args.output_file}")
+    except Exception as e:
+        print(f"An error occurred: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    if any(result.error is not None for result in results):
+        sys.exit(1)
+
+def run_server(args):
+    from server.index_server import serve_project
+    try:
+        serve_project(args.project_path, host=args.host, port=args.port, jobs=args.jobs,
+                      near_duplicates=args.near_duplicates, top=args.top, use_git=not args.no_git,
+                      analyzers=args.analyzers)
     except Exception as e:
         print(f"An error occurred: {str(e)}", file=sys.stderr)
         sys.exit(1)
 
 def run_gui():
+    import tkinter as tk
+    from gui.application import Application
     root = tk.Tk()
     app = Application(master=root)
     app.mainloop()
@@ -23,12 +81,77 @@ def main():
     parser.add_argument("--cli", action="store_true", help="Run in CLI mode")
     parser.add_argument("--project_path", help="Path to the project folder or GitHub URL")
     parser.add_argument("--output_file", help="Path to the output file")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Number of worker processes for file analysis (0 uses all CPU cores)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write each file section as soon as it is analyzed to keep memory usage flat")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse per-file results from a cache next to the output file and only re-analyze changed files")
+    parser.add_argument("--near-duplicates", action="store_true",
+                        help="Also report near-duplicate files and Python functions (MinHash/LSH); "
+                             "the same as adding near-dup to --analyzers")
+    parser.add_argument("--analyzers", default=None, metavar="NAMES",
+                        help="Comma-separated analyzers to run, of " + ", ".join(ANALYZERS) +
+                             " (default: todo, complexity and dup); the others are neither imported nor run")
+    parser.add_argument("--top", type=int, default=None,
+                        help="Number of most complex functions to list (defaults to Config.TOP_COMPLEX_FUNCTIONS)")
+    parser.add_argument("--max-tokens", type=int, default=None,
+                        help="Fit the report into about N LLM tokens, keeping the highest-priority files in full")
+    parser.add_argument("--shard-tokens", type=int, default=None,
+                        help="Split the report into numbered shards of at most about N tokens each")
+    parser.add_argument("--format", choices=["text", "jsonl", "json"], default="text",
+                        help="Report format: free-form text, JSON Lines (one record per file, then the summary) "
+                             "or one JSON document; a .gz or .zst output file is compressed")
+    parser.add_argument("--no-git", action="store_true",
+                        help="Walk the project folder instead of listing the files tracked by git")
+    parser.add_argument("--since", default=None, metavar="REF",
+                        help="Only analyze files changed since the git revision REF and include their diffs")
+    parser.add_argument("--ref", default=None,
+                        help="Branch, tag or commit to analyze when --project_path is a GitHub URL (default: its HEAD)")
+    parser.add_argument("--sparse", nargs="+", default=None, metavar="PATH",
+                        help="Only check out (and download) these directories or patterns of a GitHub repository")
+    parser.add_argument("--no-progress", action="store_true",
+                        help="Do not print progress to stderr")
+    parser.add_argument("--profile", default=None, metavar="FILE",
+                        help="Write per-stage timings, the slowest files and cache statistics to FILE as JSON")
+    parser.add_argument("--batch", default=None, metavar="MANIFEST",
+                        help="Analyze every project of a JSON manifest on one worker pool, writing a consolidated "
+                             "summary to --output_file")
+    parser.add_argument("--serve", action="store_true",
+                        help="Keep the analyzed project in memory, re-analyze changed files and serve reports over HTTP")
+    parser.add_argument("--host", default=None, help="Interface for --serve (defaults to Config.SERVE_HOST)")
+    parser.add_argument("--port", type=int, default=None, help="Port for --serve (defaults to Config.SERVE_PORT)")
+    parser.add_argument("--log-level", default="WARNING", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Minimum level of log messages printed to stderr (default: WARNING)")
 
     args = parser.parse_args()
+    logging.basicConfig(level=args.log_level, format="%(levelname)s: %(message)s")
+    try:
+        args.analyzers = AnalyzerRegistry.parse(args.analyzers)
+    except ValueError as e:
+        parser.error(str(e))
 
-    if args.cli:
+    if args.batch:
+        if not args.output_file:
+            parser.error("--batch needs --output_file for the consolidated summary")
+        if args.max_tokens or args.shard_tokens or args.since or args.stream:
+            parser.error("--batch cannot be combined with --max-tokens, --shard-tokens, --since or --stream")
+        run_batch(args)
+    elif args.serve:
+        if not args.project_path or GitHubUtils.is_github_url(args.project_path):
+            parser.error("--serve needs --project_path of a local project folder")
+        run_server(args)
+    elif args.cli:
         if not args.project_path or not args.output_file:
             parser.error("--project_path and --output_file are required in CLI mode")
+        if args.stream and (args.max_tokens or args.shard_tokens):
+            parser.error("--stream cannot be combined with --max-tokens or --shard-tokens")
+        if args.format != "text" and (args.max_tokens or args.shard_tokens):
+            parser.error("--max-tokens and --shard-tokens only apply to --format text")
+        if (args.ref or args.sparse) and not GitHubUtils.is_github_url(args.project_path):
+            parser.error("--ref and --sparse only apply to GitHub URLs")
+        if args.since and args.no_git:
+            parser.error("--since cannot be combined with --no-git")
         run_cli(args)
     else:
         run_gui()
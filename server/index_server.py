@@ -0,0 +1,106 @@
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, Optional
+from urllib.parse import parse_qs, urlparse
+from analysis.code_analyzer import REPORT_WRITERS, CodeAnalyzer
+from analysis.project_index import ProjectIndex
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPES = {
+    'text': 'text/plain; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'json': 'application/json; charset=utf-8',
+}
+
+
+class IndexRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET /report?format=text|jsonl|json&path=src/app  the report, optionally of the files under some paths
+    GET /files                                       code files of the current snapshot
+    GET /status                                      snapshot generation and refresh timings
+    """
+
+    server: 'IndexServer'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        index = self.server.index
+        if url.path == '/report':
+            output_format = query.get('format', ['text'])[0]
+            if output_format not in REPORT_WRITERS:
+                self._send_json(400, {'error': f"Unknown format: {output_format}"})
+                return
+            self._send(200, CONTENT_TYPES[output_format], index.report(output_format, query.get('path', [])))
+        elif url.path == '/files':
+            self._send_json(200, [{'path': record.relative_path, 'language': record.language, 'size': record.size}
+                                  for record in index.snapshot.records])
+        elif url.path == '/status':
+            snapshot = index.snapshot
+            self._send_json(200, {
+                'project': index.analyzer.folder_path,
+                'generation': snapshot.generation,
+                'files': len(snapshot.records),
+                'refreshed_at': snapshot.refreshed_at,
+                'last_refresh_seconds': index.last_refresh_seconds,
+            })
+        else:
+            self._send_json(404, {'error': f"Not found: {url.path}"})
+
+    def _send_json(self, status: int, document):
+        self._send(status, CONTENT_TYPES['json'], json.dumps(document).encode('utf-8'))
+
+    def _send(self, status: int, content_type: str, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class IndexServer(ThreadingHTTPServer):
+    """Serves a ProjectIndex, one thread per request."""
+
+    daemon_threads = True
+
+    def __init__(self, address, index: ProjectIndex):
+        super().__init__(address, IndexRequestHandler)
+        self.index = index
+
+
+def serve_project(folder_path: str, host: Optional[str] = None, port: Optional[int] = None, jobs: int = 1,
+                  near_duplicates: bool = False, top: Optional[int] = None, use_git: bool = True,
+                  analyzers: Optional[Iterable[str]] = None):
+    """
+    Analyze the project once, then keep the index current and serve it until interrupted.
+
+    The project is polled every Config.SERVE_POLL_INTERVAL seconds on a
+    background thread; requests are answered from the latest snapshot.
+    """
+    analyzer = CodeAnalyzer(folder_path, jobs=jobs, near_duplicates=near_duplicates, top=top, use_git=use_git,
+                            analyzers=analyzers)
+    index = ProjectIndex(analyzer)
+    index.refresh()
+    logger.info("Indexed %d code files in %.2f s", len(index.snapshot.records), index.last_refresh_seconds)
+
+    stop = threading.Event()
+    watcher = threading.Thread(target=index.watch, args=(stop,), daemon=True)
+    watcher.start()
+    server = IndexServer((host or Config.SERVE_HOST, port if port is not None else Config.SERVE_PORT), index)
+    print(f"Serving {analyzer.folder_path} on http://{server.server_address[0]}:{server.server_address[1]}/report")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.server_close()
+        watcher.join()
+        index.close()
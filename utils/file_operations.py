@@ -1,6 +1,13 @@
+import gzip
+import logging
 import os
 import pathlib
 from datetime import datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+COMPRESSED_EXTENSIONS = ('.gz', '.zst')
 
 class FileUtils:
     @staticmethod
@@ -9,24 +16,56 @@ class FileUtils:
 
     @staticmethod
     def get_file_size(file_path: str) -> int:
-        print(f"trying to get file size of: {file_path}")
         try:
             return os.path.getsize(file_path)
         except OSError as e:
-            print(f"Warning: Unable to get file size for {file_path}: {str(e)}")
+            logger.warning("Unable to get file size for %s: %s", file_path, e)
             return 0
 
     @staticmethod
-    def read_file_content(file_path: str) -> str:
+    def read_file_content(file_path: str, max_chars: Optional[int] = None) -> str:
+        """The file decoded as UTF-8 with universal newlines, optionally only its first `max_chars` characters."""
         try:
             with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
+                return file.read(max_chars)
         except OSError as e:
-            print(f"Warning: Unable to read file {file_path}: {str(e)}")
+            logger.warning("Unable to read file %s: %s", file_path, e)
             return f"[Unable to read file: {file_path}]"
         except UnicodeDecodeError:
             return "[Binary content]"
 
+    @staticmethod
+    def split_compression(file_path: str):
+        """report.txt.gz -> ('report.txt', '.gz'); the extension is '' for uncompressed paths."""
+        base, extension = os.path.splitext(file_path)
+        if extension.lower() in COMPRESSED_EXTENSIONS:
+            return base, extension
+        return file_path, ''
+
+    @staticmethod
+    def open_output(file_path: str):
+        """
+        Open a UTF-8 text stream for writing, compressed according to the extension.
+
+        .gz is written with gzip; .zst needs the optional zstandard package
+        (or Python's compression.zstd).
+        """
+        compression = FileUtils.split_compression(file_path)[1].lower()
+        if compression == '.gz':
+            return gzip.open(file_path, 'wt', encoding='utf-8', compresslevel=6)
+        if compression == '.zst':
+            try:
+                from compression import zstd
+                return zstd.open(file_path, 'wt', encoding='utf-8')
+            except ImportError:
+                pass
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("Writing .zst output needs the zstandard package (pip install zstandard)")
+            return zstandard.open(file_path, 'wt', encoding='utf-8')
+        return open(file_path, 'w', encoding='utf-8')
+
     @staticmethod
     def get_project_name(folder_path: str) -> str:
         return os.path.basename(folder_path)
@@ -0,0 +1,115 @@
+import os
+from typing import List, NamedTuple, Optional
+
+
+class FileChange(NamedTuple):
+    status: str  # git's status letter: A(dded), M(odified), D(eleted), R(enamed), T(ype changed), ...
+    relative_path: str
+    old_path: Optional[str]  # Previous path of a rename or copy
+    added_lines: int
+    deleted_lines: int
+
+
+class GitUtils:
+    """
+    File enumeration and change detection for folders inside a git work tree.
+
+    Commands run in the analyzed folder itself, so git limits their output to
+    that folder and prints paths relative to it, with '/' separators.
+
+    GitPython is imported on first use, as it takes a noticeable part of the
+    CLI's startup time.
+    """
+
+    @staticmethod
+    def is_work_tree(folder_path: str) -> bool:
+        # Most folders outside a repository are ruled out without importing GitPython
+        if not GitUtils._has_git_ancestor(folder_path):
+            return False
+        from git import Repo
+        from git.exc import InvalidGitRepositoryError, NoSuchPathError
+        try:
+            Repo(folder_path, search_parent_directories=True)
+            return True
+        except (InvalidGitRepositoryError, NoSuchPathError):
+            return False
+
+    @staticmethod
+    def _has_git_ancestor(folder_path: str) -> bool:
+        """Whether the folder or a parent has a .git entry or is itself a git directory, like a bare repository."""
+        path = os.path.abspath(folder_path)
+        while True:
+            if os.path.exists(os.path.join(path, '.git')) or os.path.isfile(os.path.join(path, 'HEAD')):
+                return True
+            parent = os.path.dirname(path)
+            if parent == path:
+                return False
+            path = parent
+
+    @staticmethod
+    def list_files(folder_path: str) -> List[str]:
+        """
+        Relative paths of the files tracked in the index, in index order.
+
+        This is git's own view of the tree, so ignore rules are exact and no
+        directory is walked. Files deleted from the work tree and submodules
+        are left out.
+        """
+        from git import Git
+        output = Git(folder_path).ls_files('-z', '--cached')
+        return [path for path in output.split('\0')
+                if path and os.path.isfile(GitUtils.full_path(folder_path, path))]
+
+    @staticmethod
+    def changed_files(folder_path: str, ref: str) -> List[FileChange]:
+        """
+        Files whose work tree version differs from `ref`, with added/deleted line counts.
+
+        Staged and unstaged changes both count; untracked files do not.
+        """
+        from git import Git
+        from git.exc import GitCommandError
+        git = Git(folder_path)
+        try:
+            git.rev_parse('--verify', '--quiet', f"{ref}^{{commit}}")
+        except GitCommandError:
+            raise ValueError(f"Unknown git revision: {ref}")
+        statuses = git.diff('--relative', '--name-status', '-z', '-M', ref).split('\0')
+        counts = git.diff('--relative', '--numstat', '-z', '-M', ref).split('\0')
+
+        line_counts = {}
+        position = 0
+        while position < len(counts) and counts[position]:
+            added, deleted, path = counts[position].split('\t', 2)
+            position += 1
+            if not path:
+                # A rename: the old and new paths follow as separate fields
+                path = counts[position + 1]
+                position += 2
+            # Binary files show '-' instead of line counts
+            line_counts[path] = (int(added) if added != '-' else 0, int(deleted) if deleted != '-' else 0)
+
+        changes = []
+        position = 0
+        while position < len(statuses) and statuses[position]:
+            status = statuses[position][0]
+            if status in 'RC':
+                old_path, path = statuses[position + 1], statuses[position + 2]
+                position += 3
+            else:
+                old_path, path = None, statuses[position + 1]
+                position += 2
+            added, deleted = line_counts.get(path, (0, 0))
+            changes.append(FileChange(status, path, old_path, added, deleted))
+        return changes
+
+    @staticmethod
+    def diff(folder_path: str, ref: str, relative_path: str, old_path: Optional[str] = None) -> str:
+        """The unified diff of one file against `ref`."""
+        paths = [old_path, relative_path] if old_path else [relative_path]
+        from git import Git
+        return Git(folder_path).diff('--relative', '-M', ref, '--', *paths)
+
+    @staticmethod
+    def full_path(folder_path: str, relative_path: str) -> str:
+        return os.path.join(folder_path, *relative_path.split('/'))
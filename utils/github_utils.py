@@ -1,25 +1,151 @@
 import re
+import hashlib
+import shutil
 import tempfile
 import os
-from git import Repo
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
 from urllib.parse import urlparse
+from config import Config
 
 class GitHubUtils:
+    """
+    Access to remote repositories through persistent local mirrors.
+
+    Each remote gets one bare mirror in the mirror cache. Fetches are shallow
+    (depth 1) and blobless, so only commits and trees travel up front; file
+    contents are fetched lazily when a checkout or read needs them, and a
+    sparse checkout only ever fetches the blobs under its paths. Later runs
+    fetch into the existing mirror, which only transfers what changed.
+    """
+
     @staticmethod
-    def is_github_url(url):
+    def is_github_url(url, allow_local=None):
+        """
+        Whether `url` names a GitHub repository.
+
+        With `allow_local` (default Config.ALLOW_FILE_URLS), file:// URLs of
+        local repositories are accepted as well, e.g. to stand in for GitHub
+        in tests.
+        """
         github_pattern = r'^https?://github\.com/[\w-]+/[\w.-]+/?$'
-        return re.match(github_pattern, url) is not None
+        if re.match(github_pattern, url) is not None:
+            return True
+        if allow_local is None:
+            allow_local = Config.ALLOW_FILE_URLS
+        return bool(allow_local) and url.startswith('file://') and len(urlparse(url).path.strip('/')) > 0
+
+    @staticmethod
+    def repository_name(url):
+        name = os.path.basename(urlparse(url).path.rstrip('/'))
+        return name[:-4] if name.endswith('.git') else name
+
+    @staticmethod
+    def mirror_path(url):
+        """The mirror's location: readable name plus a hash of the full URL to keep remotes apart."""
+        cache_dir = Config.MIRROR_CACHE_DIR or os.path.join(
+            os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'llmbridge', 'mirrors')
+        digest = hashlib.blake2b(url.rstrip('/').encode('utf-8'), digest_size=6).hexdigest()
+        return os.path.join(cache_dir, f"{GitHubUtils.repository_name(url)}-{digest}.git")
 
     @staticmethod
-    def clone_repository(url):
+    def update_mirror(url, ref=None):
+        """
+        Make sure the mirror has `ref` (default: the remote's HEAD) and return (mirror command runner, commit sha).
+
+        A full commit sha already in the mirror is used without contacting
+        the remote; branch and tag names are always re-fetched to pick up
+        new commits.
+        """
         if not GitHubUtils.is_github_url(url):
             raise ValueError("Invalid GitHub URL")
+        # GitPython is imported here so that local runs do not pay for it at startup
+        from git import Git
+        from git.exc import GitCommandError
+        path = GitHubUtils.mirror_path(url)
+        if not os.path.isdir(path) and GitHubUtils._create_mirror(url, path, ref):
+            mirror = Git(path)
+            return mirror, GitHubUtils._resolve(mirror, ref)
+
+        # Commands run inside the bare mirror rather than through Repo, whose bare detection
+        # relies on core.bare, which sparse worktrees move out of the main config
+        mirror = Git(path)
+        if ref is not None and re.fullmatch(r'[0-9a-f]{40}', ref):
+            try:
+                return mirror, mirror.rev_parse('--verify', '--quiet', f"{ref}^{{commit}}")
+            except GitCommandError:
+                pass
+        # Checkouts of crashed runs leave worktree entries behind
+        mirror.worktree('prune')
+        GitHubUtils._fetch(mirror, ref)
+        return mirror, GitHubUtils._resolve(mirror, ref)
 
-        repo_name = os.path.basename(urlparse(url).path)
-        temp_dir = tempfile.mkdtemp(prefix=f"llmbridge_{repo_name}_")
-        
+    @staticmethod
+    @contextmanager
+    def checkout(url, ref=None, sparse_paths: Optional[List[str]] = None) -> Iterator[str]:
+        """
+        Check `ref` out into a temporary directory for the duration of the with-block.
+
+        `sparse_paths` limits the checkout (and the blobs fetched for it) to
+        the given directories or gitignore-style patterns. The directory is
+        named after the repository and removed, together with its worktree
+        entry in the mirror, when the block exits for any reason.
+        """
+        from git import Git
+        from git.exc import GitCommandError
+        mirror, sha = GitHubUtils.update_mirror(url, ref)
+        temp_root = tempfile.mkdtemp(prefix='llmbridge_')
+        checkout_path = os.path.join(temp_root, GitHubUtils.repository_name(url))
         try:
-            Repo.clone_from(url, temp_dir)
-            return temp_dir
-        except Exception as e:
-            raise Exception(f"Failed to clone repository: {str(e)}")
\ No newline at end of file
+            mirror.worktree('add', '--detach', '--no-checkout', checkout_path, sha)
+            worktree = Git(checkout_path)
+            if sparse_paths:
+                worktree.sparse_checkout('set', '--no-cone', *sparse_paths)
+            worktree.checkout(sha)
+            yield checkout_path
+        finally:
+            shutil.rmtree(temp_root, ignore_errors=True)
+            try:
+                mirror.worktree('prune')
+            except GitCommandError:
+                pass
+
+    @staticmethod
+    def read_blob(url, file_path, ref=None) -> bytes:
+        """Read one file at `ref` straight from the mirror, fetching only that blob."""
+        mirror, sha = GitHubUtils.update_mirror(url, ref)
+        return mirror.cat_file('blob', f"{sha}:{file_path}", stdout_as_string=False)
+
+    @staticmethod
+    def _create_mirror(url, path, ref) -> bool:
+        """Create the mirror with a first fetch of `ref`; False if another run created it meanwhile."""
+        from git import Git, Repo
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Build the mirror under a temporary name so that an interrupted first fetch leaves nothing behind
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=os.path.dirname(path))
+        try:
+            Repo.init(staging, bare=True).create_remote('origin', url)
+            GitHubUtils._fetch(Git(staging), ref)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        try:
+            os.rename(staging, path)
+            return True
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            return False
+
+    @staticmethod
+    def _fetch(mirror, ref):
+        mirror.fetch('--depth=1', '--filter=blob:none', 'origin',
+                         f"+{ref or 'HEAD'}:{GitHubUtils._fetched_ref(ref)}")
+
+    @staticmethod
+    def _resolve(mirror, ref):
+        return mirror.rev_parse(f"{GitHubUtils._fetched_ref(ref)}^{{commit}}")
+
+    @staticmethod
+    def _fetched_ref(ref):
+        # Fetched refs are kept under their own namespace so that the objects stay reachable
+        return f"refs/llmbridge/{hashlib.blake2b((ref or 'HEAD').encode('utf-8'), digest_size=8).hexdigest()}"
@@ -0,0 +1,200 @@
+import logging
+import os
+import re
+from typing import Generator, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class GitignoreRules:
+    """
+    The patterns of one .gitignore file, compiled once.
+
+    All patterns are folded into a single combined regex so that the common
+    case, a path no rule matches, costs one regex call. Only when something
+    matches and the file contains negations are the rules scanned to find
+    the last matching one, which decides as in git.
+    """
+
+    def __init__(self, lines: List[str], base: str = ''):
+        self.base = base
+        self._rules: List[Tuple[re.Pattern, bool, bool]] = []
+        for line in lines:
+            parsed = GitignoreRules._parse_line(line)
+            if parsed:
+                regex, negate, dir_only = parsed
+                try:
+                    compiled = re.compile(regex)
+                except re.error as e:
+                    # Git ignores a pattern it cannot use, e.g. a range like [z-a], instead of failing
+                    logger.warning("Skipping invalid .gitignore pattern %r in %s: %s", line, base or '.', e)
+                    continue
+                self._rules.append((compiled, negate, dir_only))
+        self._has_negation = any(negate for _, negate, _ in self._rules)
+        self._any_regex = GitignoreRules._combine(self._rules)
+        self._any_file_regex = GitignoreRules._combine([rule for rule in self._rules if not rule[2]])
+
+    @classmethod
+    def from_file(cls, gitignore_path: str, base: str = '') -> 'GitignoreRules':
+        with open(gitignore_path, 'r', encoding='utf-8', errors='replace') as f:
+            return cls(f.read().splitlines(), base)
+
+    def __bool__(self) -> bool:
+        return bool(self._rules)
+
+    def match(self, relative_path: str, is_dir: bool) -> Optional[bool]:
+        """
+        Decide a path relative to this file's directory (using '/' separators).
+
+        Returns True if it is ignored, False if a negation re-includes it and
+        None if no pattern in this file applies.
+        """
+        combined = self._any_regex if is_dir else self._any_file_regex
+        if combined is None or not combined.match(relative_path):
+            return None
+        if not self._has_negation:
+            return True
+        for regex, negate, dir_only in reversed(self._rules):
+            if (is_dir or not dir_only) and regex.match(relative_path):
+                return not negate
+        return None
+
+    @staticmethod
+    def _combine(rules: List[Tuple[re.Pattern, bool, bool]]) -> Optional[re.Pattern]:
+        if not rules:
+            return None
+        return re.compile('|'.join(f'(?:{regex.pattern})' for regex, _, _ in rules))
+
+    @staticmethod
+    def _parse_line(line: str) -> Optional[Tuple[str, bool, bool]]:
+        if not line.strip() or line.startswith('#'):
+            return None
+        # Trailing spaces are ignored unless escaped with a backslash
+        pattern = re.sub(r'(?<!\\)\s+$', '', line)
+        negate = pattern.startswith('!')
+        if negate:
+            pattern = pattern[1:]
+        elif pattern.startswith('\\!') or pattern.startswith('\\#'):
+            pattern = pattern[1:]
+        dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        if not pattern:
+            return None
+        # A slash at the start or in the middle anchors the pattern to the .gitignore directory
+        anchored = '/' in pattern
+        pattern = pattern.lstrip('/')
+        body = GitignoreRules._translate(pattern)
+        prefix = '' if anchored or body.startswith('(?:.*/)?') else '(?:.*/)?'
+        return f'{prefix}{body}\\Z', negate, dir_only
+
+    @staticmethod
+    def _translate(pattern: str) -> str:
+        """Translate gitignore glob syntax into a regex body."""
+        parts = []
+        i, n = 0, len(pattern)
+        while i < n:
+            c = pattern[i]
+            if pattern.startswith('**', i):
+                at_start = i == 0 or pattern[i - 1] == '/'
+                at_end = i + 2 == n or pattern[i + 2] == '/'
+                if at_start and at_end:
+                    if i + 2 == n:
+                        # Trailing "/**" matches everything inside
+                        parts.append('.*')
+                        i += 2
+                    else:
+                        # Leading "**/" and inner "/**/" match zero or more directories
+                        parts.append('(?:.*/)?')
+                        i += 3
+                    continue
+                parts.append('[^/]*')
+                while i < n and pattern[i] == '*':
+                    i += 1
+                continue
+            if c == '*':
+                parts.append('[^/]*')
+            elif c == '?':
+                parts.append('[^/]')
+            elif c == '[':
+                end = pattern.find(']', i + 2 if pattern[i + 1:i + 2] in ('!', '^', ']') else i + 1)
+                if end == -1:
+                    parts.append(re.escape(c))
+                else:
+                    body = pattern[i + 1:end]
+                    if body[:1] in ('!', '^'):
+                        body = '^' + body[1:]
+                    parts.append('[' + body.replace('\\', '\\\\') + ']')
+                    i = end
+            elif c == '\\' and i + 1 < n:
+                i += 1
+                parts.append(re.escape(pattern[i]))
+            else:
+                parts.append(re.escape(c))
+            i += 1
+        return ''.join(parts)
+
+
+class GitignoreWalker:
+    """
+    Walk a project tree with os.scandir, honouring nested .gitignore files.
+
+    Ignored directories are pruned before descending, so ignored vendor
+    trees are never listed. Entries whose name starts with a dot are
+    skipped, as are symlinked directories (like os.walk). Files are yielded
+    in the same order os.walk would visit them.
+    """
+
+    def __init__(self, root: str, use_gitignore: bool = True):
+        self.root = root
+        self.use_gitignore = use_gitignore
+
+    def walk(self) -> Iterator[os.DirEntry]:
+        # Explicit stack instead of recursion so deep trees cost nothing extra per file
+        stack: List[Tuple[str, str, List[GitignoreRules]]] = [(self.root, '', [])]
+        while stack:
+            path, relative_dir, rules = stack.pop()
+            subdirs = yield from self._scan_dir(path, relative_dir, rules)
+            stack.extend(reversed(subdirs))
+
+    def _scan_dir(self, path: str, relative_dir: str,
+                  rules: List[GitignoreRules]) -> Generator[os.DirEntry, None, List[Tuple[str, str, List[GitignoreRules]]]]:
+        """Yield the kept files of one directory and return the subdirectories to descend into."""
+        try:
+            with os.scandir(path) as iterator:
+                entries = list(iterator)
+        except OSError:
+            return []
+
+        if self.use_gitignore and any(entry.name == '.gitignore' for entry in entries):
+            try:
+                local_rules = GitignoreRules.from_file(os.path.join(path, '.gitignore'), relative_dir)
+                if local_rules:
+                    rules = rules + [local_rules]
+            except OSError:
+                pass
+
+        subdirs = []
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                continue
+            relative_path = f'{relative_dir}/{entry.name}' if relative_dir else entry.name
+            if rules and GitignoreWalker._is_ignored(relative_path, is_dir, rules):
+                continue
+            if not is_dir:
+                yield entry
+            elif not entry.is_symlink():
+                subdirs.append((entry.path, relative_path, rules))
+        return subdirs
+
+    @staticmethod
+    def _is_ignored(relative_path: str, is_dir: bool, rules: List[GitignoreRules]) -> bool:
+        # Deeper .gitignore files take precedence over their parents
+        for rule_set in reversed(rules):
+            local_path = relative_path[len(rule_set.base) + 1:] if rule_set.base else relative_path
+            decision = rule_set.match(local_path, is_dir)
+            if decision is not None:
+                return decision
+        return False